@@ -0,0 +1,33 @@
+"""game settings version
+
+Revision ID: 3f8a6c1d2e47
+Revises: 7c2d4e9a1b53
+Create Date: 2026-10-17 12:05:00.000000
+
+Версия настроек игры: увеличивается при каждом изменении, процессы
+бота сверяют её, чтобы обновить снимок настроек в памяти.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a6c1d2e47'
+down_revision = '7c2d4e9a1b53'
+branch_labels = None
+depends_on = None
+
+
+def _has_version_column():
+    return 'version' in {column['name'] for column in sa.inspect(op.get_bind()).get_columns('game_settings')}
+
+
+def upgrade():
+    if not _has_version_column():
+        op.add_column('game_settings', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    if _has_version_column():
+        with op.batch_alter_table('game_settings') as batch_op:
+            batch_op.drop_column('version')
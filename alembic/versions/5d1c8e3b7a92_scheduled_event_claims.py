@@ -0,0 +1,38 @@
+"""scheduled event claims
+
+Revision ID: 5d1c8e3b7a92
+Revises: 9b4e2f7a6c10
+Create Date: 2026-10-17 18:40:00.000000
+
+Захват событий планировщика: экземпляр бота, выполняющий событие, записывает
+себя и срок аренды, чтобы другие экземпляры не выполнили его повторно.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1c8e3b7a92'
+down_revision = '9b4e2f7a6c10'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('scheduled_events')}
+
+
+def upgrade():
+    columns = _columns()
+    if 'claimed_by' not in columns:
+        op.add_column('scheduled_events', sa.Column('claimed_by', sa.String(length=100), nullable=True))
+    if 'claimed_until' not in columns:
+        op.add_column('scheduled_events', sa.Column('claimed_until', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    columns = _columns() & {'claimed_by', 'claimed_until'}
+    if columns:
+        with op.batch_alter_table('scheduled_events') as batch_op:
+            for column in columns:
+                batch_op.drop_column(column)
@@ -0,0 +1,52 @@
+"""game participant counters
+
+Revision ID: 7c2d4e9a1b53
+Revises: e1419651b6fa
+Create Date: 2026-10-17 10:20:00.000000
+
+Денормализованные счетчики участников, водителей, найденных и
+спрятавшихся водителей на таблице games. Колонки добавляются только
+если их еще нет (база могла быть создана create_tables() с новыми
+моделями), после чего значения пересчитываются по game_participants.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d4e9a1b53'
+down_revision = 'e1419651b6fa'
+branch_labels = None
+depends_on = None
+
+COUNTER_COLUMNS = {
+    'participants_count': '',
+    'drivers_count': "AND gp.role = 'DRIVER'",
+    'found_drivers_count': "AND gp.role = 'DRIVER' AND gp.is_found",
+    'hidden_drivers_count': "AND gp.role = 'DRIVER' AND gp.has_hidden",
+}
+
+
+def _existing_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('games')}
+
+
+def upgrade():
+    existing = _existing_columns()
+    for name in COUNTER_COLUMNS:
+        if name not in existing:
+            op.add_column('games', sa.Column(name, sa.Integer(), nullable=False, server_default='0'))
+
+    assignments = ', '.join(
+        f"{name} = (SELECT COUNT(*) FROM game_participants gp WHERE gp.game_id = games.id {condition})"
+        for name, condition in COUNTER_COLUMNS.items()
+    )
+    op.execute(f"UPDATE games SET {assignments}")
+
+
+def downgrade():
+    existing = _existing_columns()
+    with op.batch_alter_table('games') as batch_op:
+        for name in reversed(list(COUNTER_COLUMNS)):
+            if name in existing:
+                batch_op.drop_column(name)
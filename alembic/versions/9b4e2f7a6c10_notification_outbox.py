@@ -0,0 +1,51 @@
+"""notification outbox
+
+Revision ID: 9b4e2f7a6c10
+Revises: 3f8a6c1d2e47
+Create Date: 2026-10-17 15:20:00.000000
+
+Очередь исходящих уведомлений: записи добавляются в транзакции изменения
+состояния игры, фоновый диспетчер отправляет их с повторами.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2f7a6c10'
+down_revision = '3f8a6c1d2e47'
+branch_labels = None
+depends_on = None
+
+
+def _has_outbox_table():
+    return sa.inspect(op.get_bind()).has_table('notification_outbox')
+
+
+def upgrade():
+    if not _has_outbox_table():
+        op.create_table(
+            'notification_outbox',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('kind', sa.String(length=50), nullable=False),
+            sa.Column('game_id', sa.Integer(), sa.ForeignKey('games.id'), nullable=True),
+            sa.Column('chat_id', sa.BigInteger(), nullable=True),
+            sa.Column('text', sa.Text(), nullable=True),
+            sa.Column('payload', sa.JSON(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+        )
+    op.create_index('ix_notification_outbox_id', 'notification_outbox', ['id'], if_not_exists=True)
+    op.create_index(
+        'ix_notification_outbox_status_next_attempt_at', 'notification_outbox',
+        ['status', 'next_attempt_at'], if_not_exists=True
+    )
+
+
+def downgrade():
+    if _has_outbox_table():
+        op.drop_table('notification_outbox')
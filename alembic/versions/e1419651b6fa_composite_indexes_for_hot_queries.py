@@ -0,0 +1,68 @@
+"""composite indexes for hot queries
+
+Revision ID: e1419651b6fa
+Revises:
+Create Date: 2026-10-16 23:40:00.000000
+
+Таблицы создаются create_tables() при запуске бота, поэтому ревизия
+только добавляет индексы. Индексы создаются с IF NOT EXISTS: в базе,
+созданной уже с новыми моделями, они существуют заранее.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1419651b6fa'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Перед созданием уникального индекса удаляем повторные записи участника на игру
+    op.execute(
+        """
+        DELETE FROM game_participants
+        WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id
+                FROM game_participants
+                GROUP BY game_id, user_id
+            ) AS first_participations
+        )
+        """
+    )
+    op.create_index(
+        'uq_game_participants_game_user', 'game_participants',
+        ['game_id', 'user_id'], unique=True, if_not_exists=True
+    )
+    op.create_index(
+        'ix_game_participants_user_game', 'game_participants',
+        ['user_id', 'game_id'], if_not_exists=True
+    )
+    op.create_index(
+        'ix_locations_game_user_timestamp', 'locations',
+        ['game_id', 'user_id', sa.text('"timestamp" DESC')], if_not_exists=True
+    )
+    op.create_index(
+        'ix_photos_game_user_type', 'photos',
+        ['game_id', 'user_id', 'photo_type'], if_not_exists=True
+    )
+    op.create_index(
+        'ix_games_status_scheduled_at', 'games',
+        ['status', 'scheduled_at'], if_not_exists=True
+    )
+    op.create_index(
+        'ix_scheduled_events_executed_scheduled_at', 'scheduled_events',
+        ['is_executed', 'scheduled_at'], if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('ix_scheduled_events_executed_scheduled_at', table_name='scheduled_events', if_exists=True)
+    op.drop_index('ix_games_status_scheduled_at', table_name='games', if_exists=True)
+    op.drop_index('ix_photos_game_user_type', table_name='photos', if_exists=True)
+    op.drop_index('ix_locations_game_user_timestamp', table_name='locations', if_exists=True)
+    op.drop_index('ix_game_participants_user_game', table_name='game_participants', if_exists=True)
+    op.drop_index('uq_game_participants_game_user', table_name='game_participants', if_exists=True)
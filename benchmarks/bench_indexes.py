@@ -0,0 +1,200 @@
+"""
+Бенчмарк составных индексов (ревизия e1419651b6fa).
+
+Создает временную SQLite-БД без новых индексов, наполняет её данными
+(по умолчанию 100 000 геолокаций), показывает план и время горячих
+запросов, применяет миграции Alembic и повторяет замеры.
+
+Запуск из корня проекта:
+    python benchmarks/bench_indexes.py [--locations 100000] [--repeat 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+from src.models.base import Base  # noqa: E402
+import src.models  # noqa: E402,F401  регистрация всех моделей в metadata
+
+NEW_INDEXES = [
+    "uq_game_participants_game_user",
+    "ix_game_participants_user_game",
+    "ix_locations_game_user_timestamp",
+    "ix_photos_game_user_type",
+    "ix_games_status_scheduled_at",
+    "ix_scheduled_events_executed_scheduled_at",
+]
+
+USERS = 2000
+GAMES = 500
+PARTICIPANTS_PER_GAME = 20
+
+QUERIES = {
+    "latest_location": (
+        "SELECT * FROM locations WHERE user_id = :user_id AND game_id = :game_id "
+        "ORDER BY timestamp DESC LIMIT 1"
+    ),
+    "user_games": "SELECT game_id FROM game_participants WHERE user_id = :user_id",
+    "participant_exists": (
+        "SELECT id FROM game_participants WHERE game_id = :game_id AND user_id = :user_id"
+    ),
+    "user_photos": (
+        "SELECT id FROM photos WHERE game_id = :game_id AND user_id = :user_id "
+        "AND photo_type = 'HIDING_SPOT'"
+    ),
+    "upcoming_games": (
+        "SELECT id FROM games WHERE status IN ('RECRUITING', 'UPCOMING') "
+        "AND scheduled_at > :now ORDER BY scheduled_at LIMIT 10"
+    ),
+    "pending_events": (
+        "SELECT id FROM scheduled_events WHERE is_executed = 0 "
+        "AND scheduled_at BETWEEN :now AND :horizon ORDER BY scheduled_at"
+    ),
+}
+
+
+def seed(engine, locations: int) -> list:
+    """Наполнение БД; возвращает пары (game_id, user_id) участников"""
+    rnd = random.Random(42)
+    now = datetime.now()
+    statuses = ["RECRUITING", "UPCOMING", "HIDING_PHASE", "SEARCHING_PHASE", "COMPLETED", "CANCELED"]
+
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, telegram_id, name, district, default_role, rules_accepted) "
+                 "VALUES (:id, :telegram_id, :name, 'Центр', 'PLAYER', 1)"),
+            [{"id": i, "telegram_id": 100000 + i, "name": f"user{i}"} for i in range(1, USERS + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO games (id, district, max_participants, max_drivers, status, scheduled_at, creator_id) "
+                 "VALUES (:id, 'Центр', 25, 2, :status, :scheduled_at, 1)"),
+            [{
+                "id": i,
+                "status": rnd.choice(statuses),
+                "scheduled_at": now + timedelta(hours=rnd.randint(-2000, 2000)),
+            } for i in range(1, GAMES + 1)],
+        )
+        pairs = []
+        for game_id in range(1, GAMES + 1):
+            for user_id in rnd.sample(range(1, USERS + 1), PARTICIPANTS_PER_GAME):
+                pairs.append((game_id, user_id))
+        conn.execute(
+            text("INSERT INTO game_participants (game_id, user_id, is_ready, is_found, has_hidden) "
+                 "VALUES (:game_id, :user_id, 0, 0, 0)"),
+            [{"game_id": g, "user_id": u} for g, u in pairs],
+        )
+        conn.execute(
+            text("INSERT INTO locations (game_id, user_id, latitude, longitude, timestamp) "
+                 "VALUES (:game_id, :user_id, 55.75, 37.61, :timestamp)"),
+            [{
+                "game_id": g,
+                "user_id": u,
+                "timestamp": now - timedelta(seconds=rnd.randint(0, 86400)),
+            } for g, u in (rnd.choice(pairs) for _ in range(locations))],
+        )
+        conn.execute(
+            text("INSERT INTO photos (game_id, user_id, file_id, photo_type) "
+                 "VALUES (:game_id, :user_id, 'file', :photo_type)"),
+            [{
+                "game_id": g,
+                "user_id": u,
+                "photo_type": rnd.choice(["HIDING_SPOT", "FOUND_CAR"]),
+            } for g, u in (rnd.choice(pairs) for _ in range(locations // 5))],
+        )
+        conn.execute(
+            text("INSERT INTO scheduled_events (game_id, event_type, scheduled_at, is_executed) "
+                 "VALUES (:game_id, :event_type, :scheduled_at, :is_executed)"),
+            [{
+                "game_id": game_id,
+                "event_type": event_type,
+                "scheduled_at": now + timedelta(minutes=rnd.randint(-100000, 100000) + index),
+                "is_executed": rnd.random() < 0.8,
+            } for game_id in range(1, GAMES + 1)
+              for index, event_type in enumerate(["reminder", "game_start", "hiding_warning", "hiding_phase_end"])],
+        )
+    return pairs
+
+
+def measure(engine, pairs: list, repeat: int) -> dict:
+    """План и среднее время каждого запроса"""
+    rnd = random.Random(7)
+    now = datetime.now()
+    results = {}
+    with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            samples = []
+            for _ in range(repeat):
+                game_id, user_id = rnd.choice(pairs)
+                samples.append({
+                    "game_id": game_id,
+                    "user_id": user_id,
+                    "now": now,
+                    "horizon": now + timedelta(minutes=10),
+                })
+            plan_rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql), samples[0]).fetchall()
+            plan = "; ".join(row[-1] for row in plan_rows)
+            start = time.perf_counter()
+            for params in samples:
+                conn.execute(text(sql), params).fetchall()
+            elapsed = (time.perf_counter() - start) / repeat
+            results[name] = (elapsed, plan)
+    return results
+
+
+def upgrade(url: str) -> None:
+    """Применение миграций Alembic к БД бенчмарка"""
+    from alembic import command
+    from alembic.config import Config
+
+    os.environ["DATABASE_URL"] = url
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    command.upgrade(config, "head")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--locations", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            for index_name in NEW_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+        started = time.perf_counter()
+        pairs = seed(engine, args.locations)
+        print(f"Наполнение: {args.locations} геолокаций, {len(pairs)} участников "
+              f"за {time.perf_counter() - started:.1f}s")
+
+        before = measure(engine, pairs, args.repeat)
+        upgrade(url)
+        # новые соединения, чтобы не использовать подготовленные до миграции выражения
+        engine.dispose()
+        after = measure(engine, pairs, args.repeat)
+        engine.dispose()
+
+    print(f"\n{'запрос':<20} {'до, мс':>10} {'после, мс':>10} {'ускорение':>10}")
+    for name in QUERIES:
+        before_time, before_plan = before[name]
+        after_time, after_plan = after[name]
+        speedup = before_time / after_time if after_time else float("inf")
+        print(f"{name:<20} {before_time * 1000:>10.3f} {after_time * 1000:>10.3f} {speedup:>9.1f}x")
+        print(f"    до:    {before_plan}")
+        print(f"    после: {after_plan}")
+
+
+if __name__ == "__main__":
+    main()
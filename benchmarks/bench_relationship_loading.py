@@ -0,0 +1,171 @@
+"""
+Бенчмарк стратегий загрузки связей Game / GameParticipant.
+
+Сравнивает прежнюю схему (lazy="joined" на Game.participants,
+GameParticipant.game и GameParticipant.user) с текущей: связи по умолчанию
+не загружаются (lazy="raise"), а запросы, которым нужен состав игры,
+передают WITH_PARTICIPANTS (selectinload участников и их пользователей).
+Для каждого сценария выводятся число SQL-запросов, число строк и ячеек,
+которые вернула БД, и среднее время.
+
+Запуск из корня проекта:
+    python benchmarks/bench_relationship_loading.py [--games 50] [--participants 20] [--repeat 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.orm import sessionmaker, joinedload  # noqa: E402
+
+from src.models.base import Base  # noqa: E402
+import src.models  # noqa: E402,F401  регистрация всех моделей в metadata
+from src.models.game import Game, GameParticipant, GameStatus  # noqa: E402
+from src.services.game_service import WITH_PARTICIPANTS  # noqa: E402
+
+# Прежние lazy="joined" в виде эквивалентных опций запроса
+LEGACY_GAME_OPTIONS = (
+    joinedload(Game.participants).joinedload(GameParticipant.user),
+    joinedload(Game.participants).joinedload(GameParticipant.game),
+)
+
+
+def seed(engine, games: int, participants: int) -> None:
+    """Игры с участниками; каждый участник - отдельный пользователь"""
+    now = datetime.now()
+    users = games * participants
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, telegram_id, name, district, default_role, rules_accepted) "
+                 "VALUES (:id, :telegram_id, :name, 'Центр', 'PLAYER', 1)"),
+            [{"id": i, "telegram_id": 100000 + i, "name": f"user{i}"} for i in range(1, users + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO games (id, district, max_participants, max_drivers, status, scheduled_at, creator_id, "
+                 "participants_count) VALUES (:id, 'Центр', :max_participants, 2, 'RECRUITING', :scheduled_at, 1, "
+                 ":participants_count)"),
+            [{
+                "id": i,
+                "max_participants": participants + 5,
+                "participants_count": participants,
+                "scheduled_at": now + timedelta(hours=i),
+            } for i in range(1, games + 1)],
+        )
+        conn.execute(
+            text("INSERT INTO game_participants (game_id, user_id, is_ready, is_found, has_hidden) "
+                 "VALUES (:game_id, :user_id, 0, 0, 0)"),
+            [{"game_id": g, "user_id": (g - 1) * participants + p}
+             for g in range(1, games + 1) for p in range(1, participants + 1)],
+        )
+
+
+def list_games(session, legacy: bool):
+    """Список игр со счетчиками участников (как в GameListService)"""
+    query = session.query(Game)
+    if legacy:
+        query = query.options(*LEGACY_GAME_OPTIONS)
+    games = query.filter(Game.status == GameStatus.RECRUITING).order_by(Game.scheduled_at).all()
+    return sum(game.participants_count for game in games)
+
+
+def game_card(session, legacy: bool, game_id: int):
+    """Карточка игры с именами участников (как после GameService.get_game_by_id)"""
+    options = LEGACY_GAME_OPTIONS if legacy else (WITH_PARTICIPANTS,)
+    game = session.query(Game).options(*options).filter(Game.id == game_id).first()
+    return [participant.user.name for participant in game.participants]
+
+
+def status_check(session, legacy: bool, game_id: int):
+    """Проверка статуса одной игры (как в can_edit_game / join_game)"""
+    query = session.query(Game)
+    if legacy:
+        query = query.options(*LEGACY_GAME_OPTIONS)
+    game = query.filter(Game.id == game_id).first()
+    return game.status
+
+
+class StatementRecorder:
+    """Запоминает выполненные запросы, чтобы затем посчитать их результат"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    def result_size(self):
+        """Число строк и ячеек, возвращённых записанными запросами"""
+        rows = cells = 0
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for statement, parameters in self.statements:
+                cursor.execute(statement, parameters)
+                fetched = cursor.fetchall()
+                rows += len(fetched)
+                cells += sum(len(row) for row in fetched)
+        finally:
+            raw.close()
+        return rows, cells
+
+
+def measure(engine, scenario, legacy: bool, repeat: int, *args) -> dict:
+    Session = sessionmaker(bind=engine)
+
+    with StatementRecorder(engine) as recorder:
+        with Session() as session:
+            scenario(session, legacy, *args)
+    rows, cells = recorder.result_size()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with Session() as session:
+            scenario(session, legacy, *args)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    return {"queries": len(recorder.statements), "rows": rows, "cells": cells, "time": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--participants", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine, args.games, args.participants)
+
+        scenarios = {
+            "list_games": (list_games, ()),
+            "game_card": (game_card, (args.games // 2,)),
+            "status_check": (status_check, (args.games // 2,)),
+        }
+        print(f"{args.games} игр × {args.participants} участников\n")
+        print(f"{'сценарий':<14} {'схема':<8} {'запросов':>9} {'строк':>7} {'ячеек':>8} {'мс':>9}")
+        for name, (scenario, extra) in scenarios.items():
+            for label, legacy in (("joined", True), ("новая", False)):
+                result = measure(engine, scenario, legacy, args.repeat, *extra)
+                print(f"{name:<14} {label:<8} {result['queries']:>9} {result['rows']:>7} "
+                      f"{result['cells']:>8} {result['time'] * 1000:>9.3f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
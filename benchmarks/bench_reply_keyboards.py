@@ -0,0 +1,133 @@
+"""
+Микробенчмарк главной клавиатуры DynamicKeyboardService.
+
+Сравнивает прежний путь (контекст пользователя читается из БД, клавиатура
+строится заново на каждое сообщение) с текущим (контекст из кэша,
+готовая клавиатура по ключу). Отдельно сравнивается только построение
+разметки: заново по ключу и из кэша готовых клавиатур.
+Результат - клавиатур в секунду.
+
+Запуск из корня проекта:
+    python benchmarks/bench_reply_keyboards.py [--users 200] [--repeat 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_directory = tempfile.TemporaryDirectory()
+# БД бенчмарка должна быть выбрана до импорта моделей: движок создается при импорте
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory.name, 'bench.db')}"
+os.environ.setdefault("ADMIN_USER_IDS", "100001")
+
+from sqlalchemy import text  # noqa: E402
+
+from src.models.base import Base, engine  # noqa: E402
+import src.models  # noqa: E402,F401  регистрация всех моделей в metadata
+from src.services.dynamic_keyboard_service import DynamicKeyboardService, keyboard_cache  # noqa: E402
+from src.services.user_context_service import UserContextService  # noqa: E402
+from src.services.user_service import user_cache  # noqa: E402
+
+# Статусы игр, на которые записаны пользователи: поровну в каждом контексте
+GAME_STATES = ["RECRUITING", "HIDING_PHASE", "SEARCHING_PHASE", "COMPLETED", None]
+
+
+def seed(users: int) -> list:
+    """Пользователи в разных контекстах; у каждой игры по 10 участников"""
+    now = datetime.now()
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (id, telegram_id, name, district, default_role, rules_accepted) "
+                 "VALUES (:id, :telegram_id, :name, 'Центр', 'PLAYER', 1)"),
+            [{"id": i, "telegram_id": 100000 + i, "name": f"user{i}"} for i in range(1, users + 1)],
+        )
+        games = []
+        participants = []
+        for index in range(1, users + 1):
+            state = GAME_STATES[index % len(GAME_STATES)]
+            if state is None:
+                continue
+            game_id = (index - 1) // 10 * len(GAME_STATES) + GAME_STATES.index(state) + 1
+            if not any(game["id"] == game_id for game in games):
+                games.append({
+                    "id": game_id,
+                    "status": state,
+                    "scheduled_at": now + timedelta(hours=1),
+                    "ended_at": now if state == "COMPLETED" else None,
+                })
+            role = None if state == "RECRUITING" else ("DRIVER" if index % 3 == 0 else "SEEKER")
+            participants.append({"game_id": game_id, "user_id": index, "role": role})
+        conn.execute(
+            text("INSERT INTO games (id, district, max_participants, max_drivers, status, scheduled_at, "
+                 "ended_at, creator_id) VALUES (:id, 'Центр', 20, 2, :status, :scheduled_at, :ended_at, 1)"),
+            games,
+        )
+        conn.execute(
+            text("INSERT INTO game_participants (game_id, user_id, role, is_ready, is_found, has_hidden) "
+                 "VALUES (:game_id, :user_id, :role, 0, 0, 0)"),
+            participants,
+        )
+    return [100000 + i for i in range(1, users + 1)]
+
+
+def clear_caches() -> None:
+    UserContextService.clear_cache()
+    user_cache.clear()
+    keyboard_cache.clear()
+
+
+def rate(func, items: list, repeat: int) -> float:
+    """Клавиатур в секунду"""
+    start = time.perf_counter()
+    for index in range(repeat):
+        func(items[index % len(items)])
+    return repeat / (time.perf_counter() - start)
+
+
+def legacy_keyboard(telegram_id: int):
+    """Прежний путь: без кэшей контекста, пользователей и клавиатур"""
+    clear_caches()
+    return DynamicKeyboardService.get_contextual_main_keyboard(telegram_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    telegram_ids = seed(args.users)
+
+    clear_caches()
+    keys = [
+        DynamicKeyboardService.get_keyboard_key(UserContextService.get_context_snapshot(telegram_id), False)
+        for telegram_id in telegram_ids
+    ]
+    print(f"{args.users} пользователей, {len(set(keys))} различных клавиатур\n")
+    print(f"{'сценарий':<26} {'до':>12} {'после':>12} {'ускорение':>10}")
+
+    # Сообщение пользователя: контекст + клавиатура
+    before = rate(legacy_keyboard, telegram_ids, max(args.repeat // 10, 1))
+    # установившийся режим: контексты и клавиатуры уже в кэше
+    clear_caches()
+    for telegram_id in telegram_ids:
+        DynamicKeyboardService.get_contextual_main_keyboard(telegram_id)
+    after = rate(DynamicKeyboardService.get_contextual_main_keyboard, telegram_ids, args.repeat)
+    print(f"{'контекст + клавиатура':<26} {before:>12.0f} {after:>12.0f} {after / before:>9.1f}x")
+
+    # Только разметка по готовому ключу
+    before = rate(DynamicKeyboardService._build_keyboard, keys, args.repeat)
+    after = rate(DynamicKeyboardService.get_keyboard_for_key, keys, args.repeat)
+    print(f"{'разметка по ключу':<26} {before:>12.0f} {after:>12.0f} {after / before:>9.1f}x")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -45,10 +45,16 @@ from src.handlers.callback_handler import callback_handler
 from src.handlers.location import location_handlers
 from src.handlers.photo import photo_handlers
 from src.utils.logger import setup_logger
+from src.middlewares import unit_of_work
+from src.utils.db_executor import db_executor
+from src.utils.query_stats import track_queries
+from src.utils.telegram_request import create_bot_request
 from src.models import create_tables
-from src.models.base import engine
+from src.models.base import engine, dispose_async_engine
 from src.services.enhanced_scheduler_service import init_enhanced_scheduler
 from src.services.metrics_service import metrics_service
+from src.services.admin_digest_service import admin_digest
+from src.services.settings_service import SettingsService
 
 # Загрузка переменных окружения
 load_dotenv()
@@ -68,12 +74,15 @@ def wrap_callback(fn, threshold: float):
     @wraps(fn)
     async def wrapper(update, context, *args, **kwargs):
         start = time.perf_counter()
+        name = getattr(fn, "__name__", repr(fn))
         try:
-            return await fn(update, context, *args, **kwargs)
+            # Одна сессия БД на обновление: фиксируется или откатывается по завершении.
+            # Запросы обновления учитываются в метриках с именем обработчика
+            with track_queries(name), unit_of_work(name):
+                return await fn(update, context, *args, **kwargs)
         finally:
             duration = time.perf_counter() - start
             metrics_service.observe_latency(duration)
-            name = getattr(fn, "__name__", repr(fn))
             user = update.effective_user.id if update.effective_user else "unknown"
             if duration > threshold:
                 metrics_service.record_error()
@@ -148,12 +157,15 @@ async def main():
     # Создание таблиц в БД, если их нет
     create_tables()
     logger.info("База данных инициализирована")
+    
+    # Предзагрузка справочников (районы, роли, правила)
+    SettingsService.reload_reference_data()
 
     # Запуск сервиса метрик
     metrics_service.start()
     
     # Создание экземпляра приложения
-    application = Application.builder().token(TOKEN).build()
+    application = Application.builder().token(TOKEN).request(create_bot_request()).build()
 
     
     # Инициализация улучшенного планировщика задач
@@ -295,6 +307,9 @@ async def main():
         # Корректное завершение работы бота
         logger.info("Остановка бота...")
         
+        # Накопленные сводки для администраторов отправляются до остановки бота
+        await admin_digest.flush_all(application.bot)
+        
         # Остановка планировщика
         scheduler.shutdown()
         metrics_service.update_scheduler_jobs(0)
@@ -303,6 +318,8 @@ async def main():
         await application.updater.stop()
         await application.stop()
         await application.shutdown()
+        await dispose_async_engine()
+        db_executor.shutdown(wait=False)
         logger.info("Бот остановлен")
 
 if __name__ == "__main__":
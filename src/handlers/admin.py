@@ -10,6 +10,7 @@ from telegram.ext import (
 from datetime import datetime, timedelta
 import re
 from loguru import logger
+from sqlalchemy.orm import selectinload
 import os
 import pytz
 import asyncio
@@ -1188,7 +1189,7 @@ async def process_confirmation(update: Update, context: CallbackContext) -> int:
     game_zone = context.user_data.get("game_zone")
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = UserService.get_cached_user(telegram_id)
     if not user:
         await update.message.reply_text(
             "❌ Ошибка: пользователь не найден в базе данных.",
@@ -2891,7 +2892,7 @@ async def set_participant_role_button(update: Update, context: CallbackContext)
     db = next(db_generator)
     
     try:
-        participant = db.query(GameParticipant).filter(
+        participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
             GameParticipant.game_id == game_id,
             GameParticipant.id == participant_id
         ).first()
@@ -2899,6 +2900,7 @@ async def set_participant_role_button(update: Update, context: CallbackContext)
         if not participant:
             await query.edit_message_text("❌ Участник не найден")
             return
+        participant_name = participant.user.name
         
         # Устанавливаем новую роль
         from src.models.game import GameRole
@@ -2924,6 +2926,7 @@ async def set_participant_role_button(update: Update, context: CallbackContext)
         
         old_role = participant.role
         participant.role = new_role
+        GameService.recalculate_counters(db, game_id)
         db.commit()
         
         # Логируем изменение
@@ -2931,8 +2934,6 @@ async def set_participant_role_button(update: Update, context: CallbackContext)
         logger.info(f"Админ {user_id} установил роль '{role_text}' участнику {participant_id} в игре {game_id}")
         
         # Показываем промежуточное сообщение с подтверждением
-        participant_name = participant.user.name
-        
         if new_role is None:
             status_text = f"✅ Роль участника <b>{participant_name}</b> убрана"
             status_emoji = "❓"
@@ -3030,6 +3031,7 @@ async def auto_fill_roles_button(update: Update, context: CallbackContext) -> No
             participant.role = GameRole.SEEKER
             assigned_count += 1
         
+        GameService.recalculate_counters(db, game_id)
         db.commit()
         
         logger.info(f"Админ {user_id} автоматически назначил роли {assigned_count} участникам в игре {game_id}")
@@ -3087,6 +3089,7 @@ async def reset_all_roles_button(update: Update, context: CallbackContext) -> No
         for participant in participants:
             participant.role = None
         
+        GameService.recalculate_counters(db, game_id)
         db.commit()
         logger.info(f"Админ {user_id} сбросил все роли в игре {game_id}")
         
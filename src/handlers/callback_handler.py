@@ -12,6 +12,7 @@ from src.handlers.games import (
 )
 from src.handlers.photo import handle_admin_photo_approval
 from src.services.user_service import UserService
+from src.utils.db_executor import run_db
 
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Центральный обработчик всех callback'ов"""
@@ -152,13 +153,13 @@ async def handle_send_location_callback(update: Update, context: ContextTypes.DE
         from src.services.game_service import GameService
         from src.keyboards.reply import get_game_location_keyboard
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             await query.edit_message_text("❌ Игра не найдена")
             return
         
         # Получаем роль пользователя в игре
-        user, _ = UserService.get_user_by_telegram_id(user_id)
+        user = await run_db(UserService.get_cached_user, user_id)
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
             return
@@ -233,13 +234,13 @@ async def handle_send_photo_callback(update: Update, context: ContextTypes.DEFAU
     try:
         from src.services.game_service import GameService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             await query.edit_message_text("❌ Игра не найдена")
             return
         
         # Получаем роль пользователя в игре
-        user, _ = UserService.get_user_by_telegram_id(user_id)
+        user = await run_db(UserService.get_cached_user, user_id)
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
             return
@@ -303,13 +304,13 @@ async def handle_found_car_callback(update: Update, context: ContextTypes.DEFAUL
     
     try:
         from src.services.game_service import GameService
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             await query.edit_message_text("❌ Игра не найдена")
             return
         
         GameService.mark_participant_found(game_id, user_id)
-        user, _ = UserService.get_user_by_telegram_id(user_id)
+        user = await run_db(UserService.get_cached_user, user_id)
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
             return
@@ -348,12 +349,12 @@ async def handle_found_me_callback(update: Update, context: ContextTypes.DEFAULT
     try:
         from src.services.game_service import GameService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             await query.edit_message_text("❌ Игра не найдена")
             return
         
-        user, _ = UserService.get_user_by_telegram_id(user_id)
+        user = await run_db(UserService.get_cached_user, user_id)
         if not user:
             await query.edit_message_text("❌ Пользователь не найден")
             return
@@ -405,7 +406,7 @@ async def handle_game_status_callback(update: Update, context: ContextTypes.DEFA
         from src.services.user_context_service import UserContextService
         from src.services.game_service import GameService
         
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if not game_context.game or game_context.game.id != game_id:
             await query.edit_message_text("❌ У вас нет доступа к этой игре")
@@ -476,7 +477,7 @@ async def handle_found_driver_callback(update: Update, context: ContextTypes.DEF
         from src.services.game_service import GameService
         from src.services.user_service import UserService
         
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await query.edit_message_text("❌ Эта функция доступна только во время активной игры")
@@ -516,7 +517,7 @@ async def handle_found_seeker_callback(update: Update, context: ContextTypes.DEF
         from src.services.game_service import GameService
         from src.services.user_service import UserService
         
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await query.edit_message_text("❌ Эта функция доступна только во время активной игры")
@@ -562,7 +563,7 @@ async def handle_photo_place_callback(update: Update, context: ContextTypes.DEFA
     try:
         from src.services.user_context_service import UserContextService
         
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await query.edit_message_text("❌ Отправка фотографий доступна только во время активной игры")
@@ -600,7 +601,7 @@ async def handle_photo_find_callback(update: Update, context: ContextTypes.DEFAU
     try:
         from src.services.user_context_service import UserContextService
         
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await query.edit_message_text("❌ Отправка фотографий доступна только во время активной игры")
@@ -636,7 +637,7 @@ async def handle_game_help_callback(update: Update, context: ContextTypes.DEFAUL
     user_id = query.from_user.id
     
     from src.services.user_context_service import UserContextService
-    game_context = UserContextService.get_user_game_context(user_id)
+    game_context = await run_db(UserContextService.get_user_game_context, user_id)
     
     if game_context.status != UserContextService.STATUS_IN_GAME:
         await query.edit_message_text("⚠️ Помощь в игре доступна только во время активной игры")
@@ -696,14 +697,14 @@ async def notify_drivers_about_found(context: ContextTypes.DEFAULT_TYPE, game_id
     try:
         from src.services.game_service import GameService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             return
         
         # Находим всех водителей в игре
         for participant in game.participants:
             if participant.role.value == 'driver':
-                user, _ = UserService.get_user_by_id(participant.user_id)
+                user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
                 if user:
                     try:
                         await context.bot.send_message(
@@ -727,13 +728,13 @@ async def notify_participants_about_found_driver(context: ContextTypes.DEFAULT_T
     try:
         from src.services.game_service import GameService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             return
         
         # Уведомляем всех участников кроме найденного водителя
         for participant in game.participants:
-            user, _ = UserService.get_user_by_id(participant.user_id)
+            user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
             if user and user.name != driver_name:
                 try:
                     await context.bot.send_message(
@@ -760,7 +761,7 @@ async def check_game_completion_callback(context: ContextTypes.DEFAULT_TYPE, gam
         
         logger.info(f"Проверка завершения игры {game_id}")
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             logger.warning(f"Игра {game_id} не найдена")
             return
@@ -801,7 +802,7 @@ async def notify_game_completion_callback(context: ContextTypes.DEFAULT_TYPE, ga
         
         logger.info(f"Отправка уведомлений о завершении игры {game_id}")
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             logger.warning(f"Игра {game_id} не найдена при отправке уведомлений")
             return
@@ -836,7 +837,7 @@ async def notify_game_completion_callback(context: ContextTypes.DEFAULT_TYPE, ga
         # Отправляем уведомления всем участникам
         sent_count = 0
         for participant in game.participants:
-            user, _ = UserService.get_user_by_id(participant.user_id)
+            user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
             if user:
                 try:
                     logger.info(f"Отправка уведомления о завершении игры участнику {user.telegram_id} ({user.name})")
@@ -860,14 +861,14 @@ async def notify_drivers_about_found_inline(context: ContextTypes.DEFAULT_TYPE,
         from src.services.game_service import GameService
         from src.services.user_service import UserService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             return
         
         # Находим всех водителей в игре
         for participant in game.participants:
             if participant.role and participant.role.value == 'driver' and not participant.is_found:
-                user, _ = UserService.get_user_by_id(participant.user_id)
+                user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
                 if user:
                     try:
                         await context.bot.send_message(
@@ -892,13 +893,13 @@ async def notify_participants_about_found_driver_inline(context: ContextTypes.DE
         from src.services.game_service import GameService
         from src.services.user_service import UserService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             return
         
         # Уведомляем всех участников кроме найденного водителя
         for participant in game.participants:
-            user, _ = UserService.get_user_by_id(participant.user_id)
+            user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
             if user and user.name != driver_name:
                 try:
                     await context.bot.send_message(
@@ -923,7 +924,7 @@ async def check_game_completion_inline(context: ContextTypes.DEFAULT_TYPE, game_
         from src.services.game_service import GameService
         from src.models.game import GameStatus
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game or game.status not in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
             return
         
@@ -951,7 +952,7 @@ async def notify_game_completion_inline(context: ContextTypes.DEFAULT_TYPE, game
         from src.services.game_service import GameService
         from src.services.user_service import UserService
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game:
             return
         
@@ -981,7 +982,7 @@ async def notify_game_completion_inline(context: ContextTypes.DEFAULT_TYPE, game
         
         # Отправляем уведомления всем участникам
         for participant in game.participants:
-            user, _ = UserService.get_user_by_id(participant.user_id)
+            user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
             if user:
                 try:
                     await context.bot.send_message(
@@ -1381,7 +1382,7 @@ async def handle_edit_profile_callback(update: Update, context: ContextTypes.DEF
     await query.answer()
     
     user_id = query.from_user.id
-    user, _ = UserService.get_user_by_telegram_id(user_id)
+    user = await run_db(UserService.get_cached_user, user_id)
     
     if not user:
         await query.edit_message_text("❌ Пользователь не найден")
@@ -1414,7 +1415,7 @@ async def handle_back_to_profile_callback(update: Update, context: ContextTypes.
     await query.answer()
     
     user_id = query.from_user.id
-    user, participations = UserService.get_user_by_telegram_id(user_id)
+    user, participations = await run_db(UserService.get_user_by_telegram_id, user_id)
     
     if not user:
         await query.edit_message_text("❌ Пользователь не найден")
@@ -1546,7 +1547,7 @@ async def handle_confirm_profile_edit_callback(update: Update, context: ContextT
         return
     
     # Обновляем поле пользователя
-    user, _ = UserService.get_user_by_telegram_id(user_id)
+    user = await run_db(UserService.get_cached_user, user_id)
     if not user:
         await query.edit_message_text("❌ Пользователь не найден")
         return
@@ -6,13 +6,14 @@ from src.services.user_context_service import UserContextService
 from src.services.game_service import GameService
 from src.keyboards.reply import get_contextual_main_keyboard, get_game_location_keyboard
 from src.keyboards.inline import get_game_actions_keyboard
+from src.utils.db_executor import run_db
 
 async def handle_my_game_button(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик кнопки 'Моя игра' - показывает информацию о текущей игре пользователя"""
     user_id = update.effective_user.id
     
     try:
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if not game_context.game:
             await update.message.reply_text(
@@ -72,7 +73,7 @@ async def handle_game_status_button(update: Update, context: ContextTypes.DEFAUL
     user_id = update.effective_user.id
     
     try:
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if not game_context.game:
             await update.message.reply_text(
@@ -143,7 +144,7 @@ async def handle_send_location_button(update: Update, context: ContextTypes.DEFA
     user_id = update.effective_user.id
     
     try:
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await update.message.reply_text(
@@ -241,7 +242,7 @@ async def handle_game_results_button(update: Update, context: ContextTypes.DEFAU
     user_id = update.effective_user.id
     
     try:
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if not game_context.game or game_context.status != UserContextService.STATUS_GAME_FINISHED:
             await update.message.reply_text(
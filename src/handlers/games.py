@@ -14,6 +14,7 @@ from telegram.error import BadRequest
 
 from src.services.user_service import UserService
 from src.services.game_service import GameService
+from src.services.game_list_service import GameListService
 from src.models.game import GameStatus, GameRole
 from src.keyboards.inline import (
     get_game_list_keyboard,
@@ -45,23 +46,19 @@ async def games_command(update: Update, context: CallbackContext) -> None:
     """Обработчик команды /games - показывает список доступных игр"""
     user_id = update.effective_user.id
     
-    # Получаем список предстоящих игр
-    upcoming_games = GameService.get_upcoming_games(limit=5)
+    # Общий для всех пользователей список предстоящих игр
+    game_list = await GameListService.get_public_game_list()
     
-    if not upcoming_games:
+    if game_list.reply_markup is None:
         await update.message.reply_text(
-            "Сейчас нет запланированных игр. Загляните позже или создайте свою игру!",
+            game_list.text,
             reply_markup=get_contextual_main_keyboard(user_id)
         )
         return
     
-    # Создаем клавиатуру со списком игр
-    keyboard = get_game_list_keyboard(upcoming_games)
-    
     await update.message.reply_text(
-        "📋 <b>Список доступных игр</b>\n\n"
-        "Выберите игру из списка для получения подробной информации и возможности записаться:",
-        reply_markup=keyboard,
+        game_list.text,
+        reply_markup=game_list.reply_markup,
         parse_mode="HTML"
     )
 
@@ -70,7 +67,7 @@ async def my_games_command(update: Update, context: CallbackContext) -> None:
     telegram_id = update.effective_user.id
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = await UserService.get_cached_user_async(telegram_id)
     if not user:
         await update.message.reply_text(
             "❌ Ошибка: пользователь не найден в базе данных. Пожалуйста, перезапустите бота командой /start",
@@ -79,7 +76,7 @@ async def my_games_command(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем список игр пользователя, используя правильный user.id
-    user_games = GameService.get_user_games_not_completed(user.id)
+    user_games = await GameService.get_user_games_not_completed_async(user.id)
     
     if not user_games:
         await update.message.reply_text(
@@ -114,7 +111,7 @@ async def game_button(update: Update, context: CallbackContext) -> None:
     
     game_id = int(match.group(1))
     logger.info(f"Показываем информацию об игре {game_id} для пользователя {telegram_id}")
-    game = GameService.get_game_by_id(game_id)
+    game = await GameService.get_game_by_id_async(game_id)
     
     if not game:
         logger.warning(f"Игра {game_id} не найдена")
@@ -122,7 +119,7 @@ async def game_button(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = await UserService.get_cached_user_async(telegram_id)
     if not user:
         logger.error(f"Пользователь {telegram_id} не найден в БД")
         await query.edit_message_text(
@@ -188,7 +185,7 @@ async def join_game_button(update: Update, context: CallbackContext) -> None:
     game_id = int(match.group(1))
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = await UserService.get_cached_user_async(telegram_id)
     if not user:
         await query.edit_message_text(
             "❌ Ошибка: пользователь не найден в базе данных.",
@@ -211,7 +208,7 @@ async def join_game_button(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем обновленную информацию об игре
-    game = GameService.get_game_by_id(game_id)
+    game = await GameService.get_game_by_id_async(game_id)
     
     # Готовим информацию об игре
     game_info = (
@@ -247,7 +244,7 @@ async def leave_game_button(update: Update, context: CallbackContext) -> None:
     game_id = int(match.group(1))
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = await UserService.get_cached_user_async(telegram_id)
     if not user:
         await query.edit_message_text(
             "❌ Ошибка: пользователь не найден в базе данных.",
@@ -286,26 +283,20 @@ async def back_to_games_button(update: Update, context: CallbackContext) -> None
     telegram_id = query.from_user.id
     logger.info(f"Пользователь {telegram_id} нажал кнопку 'Назад к списку игр'")
 
+    # Общий для всех пользователей список предстоящих игр: при частых обновлениях
+    # все запросы получают один и тот же готовый снимок
+    game_list = await GameListService.get_public_game_list()
     
-    
-    # Получаем список предстоящих игр
-    upcoming_games = GameService.get_upcoming_games(limit=5)
-    
-    if not upcoming_games:
+    if game_list.reply_markup is None:
         logger.info(f"Нет доступных игр для показа пользователю {telegram_id}")
-        await query.edit_message_text(
-            "Сейчас нет запланированных игр. Загляните позже или создайте свою игру!"
-        )
+        await query.edit_message_text(game_list.text)
         return
     
-    logger.info(f"Показываем {len(upcoming_games)} доступных игр пользователю {telegram_id}")
-    # Создаем клавиатуру со списком игр
-    keyboard = get_game_list_keyboard(upcoming_games)
+    logger.info(f"Показываем {game_list.games_count} доступных игр пользователю {telegram_id}")
     try:
         await query.edit_message_text(
-            "📋 <b>Список доступных игр</b>\n\n"
-            "Выберите игру из списка для получения подробной информации и возможности записаться:",
-            reply_markup=keyboard,
+            game_list.text,
+            reply_markup=game_list.reply_markup,
             parse_mode="HTML"
         )
     except BadRequest as err:
@@ -331,7 +322,7 @@ async def game_info_button(update: Update, context: CallbackContext) -> None:
         return
     
     game_id = int(match.group(1))
-    game = GameService.get_game_by_id(game_id)
+    game = await GameService.get_game_by_id_async(game_id)
     
     if not game:
         logger.warning(f"Игра {game_id} не найдена")
@@ -339,7 +330,7 @@ async def game_info_button(update: Update, context: CallbackContext) -> None:
         return
     
     # Получаем пользователя из базы данных по telegram_id
-    user, _ = UserService.get_user_by_telegram_id(telegram_id)
+    user = await UserService.get_cached_user_async(telegram_id)
     if not user:
         logger.error(f"Пользователь {telegram_id} не найден в БД")
         await query.edit_message_text(
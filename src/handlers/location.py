@@ -9,6 +9,7 @@ from src.handlers.scheduler_admin import format_msk_datetime
 from src.services.user_service import UserService
 from src.services.game_service import GameService
 from src.services.location_service import LocationService
+from src.services.admin_digest_service import DigestItem, admin_digest
 from src.models.game import GameStatus
 from src.keyboards.reply import get_contextual_main_keyboard
 
@@ -17,13 +18,13 @@ async def request_location_handler(update: Update, context: ContextTypes.DEFAULT
     user_id = update.effective_user.id
     
     # Получаем пользователя
-    user, _ = UserService.get_user_by_telegram_id(user_id)
+    user = await UserService.get_cached_user_async(user_id)
     if not user:
         await update.message.reply_text("❌ Пользователь не найден в системе.")
         return
     
     # Проверяем, есть ли у пользователя активные игры
-    active_games = GameService.get_user_active_games(user.id)
+    active_games = await GameService.get_user_active_games_async(user.id)
     
     if not active_games:
         await update.message.reply_text(
@@ -69,13 +70,13 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     logger.info(f"Получена геолокация от пользователя {user_id}: {latitude}, {longitude}")
 
     # Получаем пользователя
-    user, _ = UserService.get_user_by_telegram_id(user_id)
+    user = await UserService.get_cached_user_async(user_id)
     if not user:
         await update.message.reply_text("❌ Пользователь не найден в системе.")
         return
     
     # Получаем активные игры пользователя
-    active_games = GameService.get_user_active_games(user.id)
+    active_games = await GameService.get_user_active_games_async(user.id)
     
     if not active_games:
         await update.message.reply_text(
@@ -86,25 +87,20 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     
     # Сохраняем геолокацию для всех активных игр
     saved_count = 0
+    in_zone_games = []
+    out_zone_games = []
     for game in active_games:
-        if LocationService.save_user_location(user.id, game.id, latitude, longitude):
+        if await LocationService.save_user_location_async(user.id, game.id, latitude, longitude):
             saved_count += 1
             
+            # Зона проверяется один раз: результат нужен и игроку, и администраторам
+            in_zone = await LocationService.is_user_in_game_zone_async(user.id, game.id)
+            (in_zone_games if in_zone else out_zone_games).append(game)
+            
             # Уведомляем админов о получении геолокации
-            await notify_admins_about_location(context, user, game, latitude, longitude)
+            await notify_admins_about_location(context, user, game, latitude, longitude, in_zone)
     
     if saved_count > 0:
-        # Проверяем, находится ли пользователь в игровой зоне
-        in_zone_games = []
-        out_zone_games = []
-        
-        for game in active_games:
-            # Используем улучшенную проверку зоны
-            if LocationService.is_user_in_game_zone(user.id, game.id):
-                in_zone_games.append(game)
-            else:
-                out_zone_games.append(game)
-        
         success_text = f"✅ <b>Геолокация сохранена!</b>\n\n"
         success_text += f"📍 Координаты: {latitude:.6f}, {longitude:.6f}\n"
         success_text += f"🎮 Обновлено игр: {saved_count}\n\n"
@@ -175,7 +171,7 @@ async def show_game_map(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
     
     # Получаем игру
-    game = GameService.get_game_by_id(game_id)
+    game = await GameService.get_game_by_id_async(game_id)
     if not game:
         text = "❌ Игра не найдена."
         if query:
@@ -210,16 +206,13 @@ async def show_game_map(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     else:
         await update.message.reply_text(map_text, parse_mode="HTML")
 
-async def notify_admins_about_location(context: ContextTypes.DEFAULT_TYPE, user, game, latitude: float, longitude: float) -> None:
-    """Уведомление администраторов о новой геолокации"""
+async def notify_admins_about_location(context: ContextTypes.DEFAULT_TYPE, user, game, latitude: float, longitude: float,
+                                       in_zone: bool) -> None:
+    """
+    Уведомление администраторов о новой геолокации. Геолокации в игровой зоне
+    попадают в сводку по игре, выход из зоны сообщается сразу
+    """
     try:
-        # Получаем список админов
-        admins = UserService.get_admin_users()
-        
-        if not admins:
-            logger.warning("Нет администраторов для уведомления о геолокации")
-            return
-        
         # Определяем тип участника
         participant = next(
             (p for p in game.participants if p.user_id == user.id),
@@ -230,6 +223,22 @@ async def notify_admins_about_location(context: ContextTypes.DEFAULT_TYPE, user,
         if participant and participant.role:
             role_text = "🚗 Водитель" if participant.role.value == 'driver' else "🔍 Искатель"
         
+        if admin_digest.enabled and in_zone:
+            # Отдельное уведомление - это геолокация и сообщение каждому админу
+            line = (
+                f"📍 {user.name} ({role_text}) {datetime.now().strftime('%H:%M:%S')}: "
+                f"{latitude:.6f}, {longitude:.6f} ✅"
+            )
+            await admin_digest.add(context.bot, game.id, game.district, DigestItem(line, calls=2))
+            return
+        
+        # Получаем список админов
+        admins = UserService.get_admin_users()
+        
+        if not admins:
+            logger.warning("Нет администраторов для уведомления о геолокации")
+            return
+        
         # Формируем текст уведомления
         location_text = (
             f"📍 <b>Новая геолокация!</b>\n\n"
@@ -240,8 +249,6 @@ async def notify_admins_about_location(context: ContextTypes.DEFAULT_TYPE, user,
             f"🌐 <b>Координаты:</b> {latitude:.6f}, {longitude:.6f}\n"
         )
         
-        # Проверяем, находится ли пользователь в игровой зоне
-        in_zone = LocationService.is_user_in_game_zone(user.id, game.id)
         location_text += f"🎯 <b>В игровой зоне:</b> {'✅' if in_zone else '❌'}\n"
         
         # Отправляем уведомления всем админам
@@ -9,6 +9,7 @@ from src.services.enhanced_scheduler_service import DEFAULT_TIMEZONE
 from src.services.user_service import UserService
 from src.services.monitoring_service import MonitoringService
 from src.keyboards.reply import get_contextual_main_keyboard
+from src.utils.db_executor import run_db
 
 # Состояния для диалогов мониторинга
 MONITORING_MENU, VIEW_GAME_DETAILS, VIEW_PLAYER_STATS = range(3)
@@ -43,7 +44,7 @@ async def monitoring_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def show_monitoring_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Показать главное меню мониторинга"""
     # Получаем общую статистику
-    stats = MonitoringService.get_active_games_stats()
+    stats = await run_db(MonitoringService.get_active_games_stats)
     
     stats_text = (
         f"📊 <b>МОНИТОРИНГ СИСТЕМЫ</b>\n\n"
@@ -102,7 +103,7 @@ async def show_active_games(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    stats = MonitoringService.get_active_games_stats()
+    stats = await run_db(MonitoringService.get_active_games_stats)
     active_games = stats.get('active_games', [])
     
     if not active_games:
@@ -145,7 +146,7 @@ async def show_game_details(update: Update, context: ContextTypes.DEFAULT_TYPE)
     # Извлекаем ID игры из callback_data
     game_id = int(query.data.split('_')[-1])
     
-    game_info = MonitoringService.get_game_detailed_info(game_id)
+    game_info = await run_db(MonitoringService.get_game_detailed_info, game_id)
     if not game_info:
         text = "❌ Игра не найдена."
         keyboard = [[InlineKeyboardButton("↩️ Назад", callback_data="mon_active_games")]]
@@ -202,7 +203,7 @@ async def generate_game_report(update: Update, context: ContextTypes.DEFAULT_TYP
     
     game_id = int(query.data.split('_')[-1])
     
-    report = MonitoringService.generate_game_report(game_id)
+    report = await run_db(MonitoringService.generate_game_report, game_id)
     if not report:
         text = "❌ Ошибка генерации отчета."
     else:
@@ -228,7 +229,7 @@ async def show_player_stats(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     
-    stats = MonitoringService.get_player_statistics()
+    stats = await run_db(MonitoringService.get_player_statistics)
     top_players = stats.get('top_players', [])
     
     text = f"📊 <b>СТАТИСТИКА ИГРОКОВ</b>\n\n"
@@ -262,7 +263,7 @@ async def show_district_stats(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     
-    stats = MonitoringService.get_district_statistics()
+    stats = await run_db(MonitoringService.get_district_statistics)
     
     text = f"🗺 <b>СТАТИСТИКА ПО РАЙОНАМ</b>\n\n"
     
@@ -300,7 +301,7 @@ async def show_recent_activities(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
     
-    activities = MonitoringService.get_recent_activities(15)
+    activities = await run_db(MonitoringService.get_recent_activities, 15)
     
     text = f"📝 <b>ПОСЛЕДНИЕ АКТИВНОСТИ</b>\n\n"
     
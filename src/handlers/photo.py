@@ -9,6 +9,7 @@ import uuid
 from src.services.user_service import UserService
 from src.services.game_service import GameService
 from src.services.photo_service import PhotoService
+from src.services.admin_digest_service import DigestItem, admin_digest
 from src.models.game import GameStatus, GameRole, PhotoType
 from src.keyboards.reply import get_contextual_main_keyboard
 
@@ -33,7 +34,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         return
     
     # Получаем пользователя
-    user, _ = UserService.get_user_by_telegram_id(user_id)
+    user = UserService.get_cached_user(user_id)
     if not user:
         await update.message.reply_text("❌ Пользователь не найден в системе.")
         return
@@ -69,12 +70,12 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         # Водители могут отправлять фото в фазе пряток
         if (participant.role == GameRole.DRIVER and 
             game.status == GameStatus.HIDING_PHASE):
-            suitable_games.append((game, PhotoType.HIDING_SPOT))
+            suitable_games.append((game, PhotoType.HIDING_SPOT, participant))
             
         # Искатели могут отправлять фото в фазе поиска
         elif (participant.role == GameRole.SEEKER and 
               game.status == GameStatus.SEARCHING_PHASE):
-            suitable_games.append((game, PhotoType.FOUND_CAR))
+            suitable_games.append((game, PhotoType.FOUND_CAR, participant))
     
     if not suitable_games:
         status_text = {
@@ -96,10 +97,9 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     # Обрабатываем фото для каждой подходящей игры
     saved_count = 0
-    for game, photo_type in suitable_games:
+    for game, photo_type, participant in suitable_games:
         if photo_type == PhotoType.HIDING_SPOT:
             # Проверяем, не отправил ли водитель уже фото
-            participant = next(p for p in game.participants if p.user_id == user.id)
             if participant.has_hidden:
                 await update.message.reply_text(
                     f"⚠️ Вы уже отправили фото места пряток для игры в районе {game.district}.",
@@ -246,15 +246,11 @@ async def handle_driver_selection(update: Update, context: ContextTypes.DEFAULT_
         await query.edit_message_text("❌ Не удалось сохранить фото. Попробуйте еще раз.")
 
 async def notify_admins_about_photo(context: ContextTypes.DEFAULT_TYPE, photo) -> None:
-    """Уведомление администраторов о новой фотографии"""
+    """
+    Уведомление администраторов о новой фотографии. Фото мест пряток попадают
+    в сводку по игре, фото найденных машин отправляются сразу
+    """
     try:
-        # Получаем список админов
-        admins = UserService.get_admin_users()
-        
-        if not admins:
-            logger.warning("Нет администраторов для уведомления о фото")
-            return
-        
         # Получаем информацию об игре и пользователе
         game = GameService.get_game_by_id(photo.game_id)
         user, _ = UserService.get_user_by_id(photo.user_id)
@@ -263,6 +259,22 @@ async def notify_admins_about_photo(context: ContextTypes.DEFAULT_TYPE, photo) -
             logger.error(f"Не удалось получить данные для фото {photo.id}")
             return
         
+        if admin_digest.enabled and photo.photo_type == PhotoType.HIDING_SPOT:
+            line = f"📸 Место пряток: {user.name}, {format_msk_datetime(photo.uploaded_at)}"
+            buttons = [
+                InlineKeyboardButton(f"✅ {user.name}", callback_data=f"admin_approve_photo_{photo.id}"),
+                InlineKeyboardButton(f"❌ {user.name}", callback_data=f"admin_reject_photo_{photo.id}")
+            ]
+            await admin_digest.add(context.bot, game.id, game.district, DigestItem(line, photo_id=photo.file_id, buttons=buttons))
+            return
+        
+        # Получаем список админов
+        admins = UserService.get_admin_users()
+        
+        if not admins:
+            logger.warning("Нет администраторов для уведомления о фото")
+            return
+        
         # Формируем текст уведомления
         photo_type_text = {
             PhotoType.HIDING_SPOT: "📍 Фото места пряток",
@@ -343,7 +355,7 @@ async def handle_admin_photo_approval(update: Update, context: ContextTypes.DEFA
         return
     
     # Получаем админа
-    admin, _ = UserService.get_user_by_telegram_id(user_id)
+    admin = UserService.get_cached_user(user_id)
     if not admin:
         await query.edit_message_text("❌ Администратор не найден в системе.")
         return
@@ -352,13 +364,13 @@ async def handle_admin_photo_approval(update: Update, context: ContextTypes.DEFA
     if action == "approve":
         success = PhotoService.approve_photo(photo_id, admin.id)
         if success:
-            await query.edit_message_caption(
-                caption=(
+            await show_photo_decision(
+                query,
+                (
                     f"✅ <b>Фотография подтверждена!</b>\n\n"
                     f"📸 ID: {photo_id}\n"
                     f"👤 Администратор: {admin.name}"
-                ),
-                parse_mode="HTML"
+                )
             )
             try:
                 # Обрабатываем в зависимости от типа фото
@@ -388,31 +400,32 @@ async def handle_admin_photo_approval(update: Update, context: ContextTypes.DEFA
             await notify_user_about_photo_result(context, photo, True, admin.name)
             
         else:
-            await query.edit_message_caption(
-                caption="❌ Не удалось подтвердить фотографию.",
-                parse_mode="HTML"
-            )
+            await show_photo_decision(query, "❌ Не удалось подтвердить фотографию.")
     
     elif action == "reject":
         success = PhotoService.reject_photo(photo_id, admin.id, "Отклонено администратором")
         if success:
-            await query.edit_message_caption(
-                caption=(
+            await show_photo_decision(
+                query,
+                (
                     f"❌ <b>Фотография отклонена!</b>\n\n"
                     f"📸 ID: {photo_id}\n"
                     f"👤 Администратор: {admin.name}"
-                ),
-                parse_mode="HTML"
+                )
             )
             
             # Уведомляем пользователя об отклонении
             await notify_user_about_photo_result(context, photo, False, admin.name)
             
         else:
-            await query.edit_message_caption(
-                caption="❌ Не удалось отклонить фотографию.",
-                parse_mode="HTML"
-            )
+            await show_photo_decision(query, "❌ Не удалось отклонить фотографию.")
+
+async def show_photo_decision(query, text: str) -> None:
+    """Итог проверки фото: в уведомлении с фото меняется подпись, в сводке по игре - отдельный ответ"""
+    if query.message and query.message.photo:
+        await query.edit_message_caption(caption=text, parse_mode="HTML")
+    else:
+        await query.message.reply_text(text, parse_mode="HTML")
 
 async def notify_user_about_photo_result(context: ContextTypes.DEFAULT_TYPE, 
                                        photo, approved: bool, admin_name: str) -> None:
@@ -16,6 +16,7 @@ from src.handlers.contextual_actions import (
     handle_game_results_button
 )
 from src.keyboards.reply import get_contextual_main_keyboard
+from src.utils.db_executor import run_db
 
 async def show_monitoring_basic(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Базовое меню мониторинга без ConversationHandler"""
@@ -24,7 +25,7 @@ async def show_monitoring_basic(update: Update, context: ContextTypes.DEFAULT_TY
         from telegram import InlineKeyboardButton, InlineKeyboardMarkup
         
         # Получаем общую статистику
-        stats = MonitoringService.get_active_games_stats()
+        stats = await run_db(MonitoringService.get_active_games_stats)
         
         stats_text = (
             f"📊 <b>МОНИТОРИНГ СИСТЕМЫ</b>\n\n"
@@ -181,7 +182,7 @@ async def show_profile(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     user_id = update.effective_user.id
     
     # Получаем информацию о пользователе
-    user, participations = UserService.get_user_by_telegram_id(user_id)
+    user, participations = await run_db(UserService.get_user_by_telegram_id, user_id)
     
     if not user:
         await update.message.reply_text(
@@ -280,7 +281,7 @@ async def show_game_help(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     user_id = update.effective_user.id
     
     from src.services.user_context_service import UserContextService
-    game_context = UserContextService.get_user_game_context(user_id)
+    game_context = await run_db(UserContextService.get_user_game_context, user_id)
     
     if game_context.status != UserContextService.STATUS_IN_GAME:
         await update.message.reply_text(
@@ -354,7 +355,7 @@ async def handle_photo_button_action(update: Update, context: ContextTypes.DEFAU
     
     try:
         from src.services.user_context_service import UserContextService
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await update.message.reply_text(
@@ -420,7 +421,7 @@ async def handle_game_completion_button_action(update: Update, context: ContextT
     user_id = update.effective_user.id
     try:
         from src.services.user_context_service import UserContextService
-        game_context = UserContextService.get_user_game_context(user_id)
+        game_context = await run_db(UserContextService.get_user_game_context, user_id)
         if game_context.status != UserContextService.STATUS_IN_GAME:
             await update.message.reply_text(
                 "🏁 Завершение игры доступно только во время активной игры",
@@ -495,14 +496,14 @@ async def notify_drivers_about_found(context: ContextTypes.DEFAULT_TYPE, game_id
         from src.services.user_service import UserService
         from src.models.game import GameStatus
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game or game.status not in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
             return
         
         # Находим всех водителей в игре
         for participant in game.participants:
             if participant.role and participant.role.value == 'driver' and not participant.is_found:
-                user, _ = UserService.get_user_by_id(participant.user_id)
+                user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
                 if user:
                     try:
                         await context.bot.send_message(
@@ -527,13 +528,13 @@ async def notify_participants_about_found_driver(context: ContextTypes.DEFAULT_T
         from src.services.user_service import UserService
         from src.models.game import GameStatus
         
-        game = GameService.get_game_by_id(game_id)
+        game = await run_db(GameService.get_game_by_id, game_id)
         if not game or game.status not in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
             return
         
         # Уведомляем всех участников кроме найденного водителя
         for participant in game.participants:
-            user, _ = UserService.get_user_by_id(participant.user_id)
+            user, _ = await run_db(UserService.get_user_by_id, participant.user_id)
             if user and user.name != driver_name:
                 try:
                     await context.bot.send_message(
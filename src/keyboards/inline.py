@@ -6,7 +6,7 @@ def get_game_list_keyboard(games):
     buttons = []
     for game in games:
         # Формат: "Район, дата (участники/максимум)"
-        game_info = f"{game.district}, {game.scheduled_at.strftime('%d.%m %H:%M')} ({len(game.participants)}/{game.max_participants})"
+        game_info = f"{game.district}, {game.scheduled_at.strftime('%d.%m %H:%M')} ({game.participants_count}/{game.max_participants})"
         buttons.append([InlineKeyboardButton(text=game_info, callback_data=f"game_{game.id}")])
     
     # Добавляем кнопку "Обновить"
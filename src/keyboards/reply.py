@@ -1,6 +1,12 @@
+from functools import lru_cache
+from typing import Tuple
 from telegram import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from src.services.settings_service import SettingsService
 
+# Объекты клавиатур telegram неизменяемы, поэтому каждая клавиатура строится
+# один раз на набор аргументов и затем переиспользуется
+
+@lru_cache(maxsize=None)
 def get_phone_keyboard():
     """Клавиатура для запроса номера телефона"""
     contact_button = KeyboardButton(text="📱 Поделиться контактом", request_contact=True)
@@ -15,8 +21,10 @@ def get_phone_keyboard():
 
 def get_district_keyboard():
     """Клавиатура для выбора района"""
-    districts = SettingsService.get_districts()
-    
+    return _build_district_keyboard(SettingsService.get_reference_data().districts)
+
+@lru_cache(maxsize=8)
+def _build_district_keyboard(districts: Tuple[str, ...]):
     # Формирование кнопок по 2 в ряд
     buttons = []
     row = []
@@ -39,7 +47,10 @@ def get_district_keyboard():
 
 def get_role_keyboard():
     """Клавиатура для выбора роли по умолчанию"""
-    roles = SettingsService.get_available_roles()
+    return _build_role_keyboard(SettingsService.get_reference_data().available_roles)
+
+@lru_cache(maxsize=8)
+def _build_role_keyboard(roles: Tuple[str, ...]):
     buttons = [[KeyboardButton(text=role)] for role in roles]
     
     # Добавляем кнопку назад и отмены
@@ -49,6 +60,7 @@ def get_role_keyboard():
     keyboard = ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     return keyboard
 
+@lru_cache(maxsize=None)
 def get_confirmation_keyboard():
     """Клавиатура для подтверждения правил"""
     yes_button = KeyboardButton(text="✅ Да, согласен с правилами")
@@ -61,6 +73,7 @@ def get_confirmation_keyboard():
     ], resize_keyboard=True)
     return keyboard
 
+@lru_cache(maxsize=None)
 def get_main_keyboard(is_admin=False):
     """Основная клавиатура после регистрации (legacy - для обратной совместимости)"""
     buttons = [
@@ -89,6 +102,7 @@ def get_contextual_main_keyboard(user_id: int) -> ReplyKeyboardMarkup:
         from src.services.user_service import UserService
         return get_main_keyboard(UserService.is_admin(user_id))
 
+@lru_cache(maxsize=None)
 def get_game_location_keyboard():
     """Клавиатура для отправки геолокации в игре"""
     button = KeyboardButton(text="📍 Отправить мое местоположение", request_location=True)
@@ -101,6 +115,7 @@ def get_game_location_keyboard():
     ], resize_keyboard=True)
     return keyboard
 
+@lru_cache(maxsize=None)
 def get_photo_action_keyboard():
     """Клавиатура для действий с фотографией в игре"""
     buttons = [
@@ -110,6 +125,7 @@ def get_photo_action_keyboard():
     keyboard = ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     return keyboard
 
+@lru_cache(maxsize=None)
 def get_back_keyboard():
     """Клавиатура с кнопкой назад"""
     buttons = [
@@ -118,6 +134,7 @@ def get_back_keyboard():
     keyboard = ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     return keyboard
 
+@lru_cache(maxsize=None)
 def remove_keyboard():
     """Удаление клавиатуры"""
     return ReplyKeyboardRemove() 
\ No newline at end of file
@@ -1,3 +1,3 @@
-# Импорты middlewares будут добавлены по мере разработки
+from src.middlewares.db_session import UnitOfWork, unit_of_work, get_current_unit_of_work
 
-__all__ = [] 
\ No newline at end of file
+__all__ = ["UnitOfWork", "unit_of_work", "get_current_unit_of_work"]
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.models.base import SessionLocal, current_unit_of_work
+
+
+def _current_task() -> Optional[asyncio.Task]:
+    """Текущая задача asyncio или None, если цикл событий не запущен"""
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None
+
+
+class UnitOfWork:
+    """Единица работы: одна сессия БД на всё время обработки обновления"""
+
+    def __init__(self, name: str = "update"):
+        self.name = name
+        self.active = True
+        self._session: Optional[Session] = None
+        # Сессия принадлежит задаче, обрабатывающей обновление: фоновые задачи,
+        # запущенные из обработчика, наследуют контекст, но работают в своих сессиях
+        self._owner_task = _current_task()
+        self._owner_thread = threading.get_ident()
+        self._delegated_threads = set()
+        self._delegation_lock = threading.Lock()
+
+    @property
+    def session(self) -> Session:
+        """Сессия запроса (открывается при первом обращении)"""
+        if self._session is None:
+            self._session = SessionLocal()
+            self._session.info["request_scoped"] = True
+        elif not self._session.is_active:
+            # Сервис поймал ошибку flush/commit: откатываем, чтобы следующие вызовы работали
+            self._session.rollback()
+        return self._session
+
+    @property
+    def has_session(self) -> bool:
+        return self._session is not None
+
+    def owns_current_context(self) -> bool:
+        """Может ли текущий код использовать сессию этой единицы работы"""
+        if not self.active:
+            return False
+        thread_id = threading.get_ident()
+        if thread_id in self._delegated_threads:
+            return True
+        return thread_id == self._owner_thread and _current_task() is self._owner_task
+
+    @contextmanager
+    def delegate_to_current_thread(self):
+        """Разрешает потоку-исполнителю работать в сессии запроса, пока обработчик его ждёт"""
+        thread_id = threading.get_ident()
+        # Сессия не потокобезопасна: параллельные вызовы одного обработчика выполняются по очереди
+        with self._delegation_lock:
+            self._delegated_threads.add(thread_id)
+            try:
+                yield self
+            finally:
+                self._delegated_threads.discard(thread_id)
+
+    def commit(self) -> None:
+        if self._session is None:
+            return
+        if self._session.is_active:
+            self._session.commit()
+        else:
+            self._session.rollback()
+
+    def rollback(self) -> None:
+        if self._session is not None:
+            self._session.rollback()
+
+    def close(self) -> None:
+        self.active = False
+        if self._session is not None:
+            self._session.info["request_scoped"] = False
+            self._session.close()
+            self._session = None
+
+
+def get_current_unit_of_work() -> Optional[UnitOfWork]:
+    """Активная единица работы текущего контекста"""
+    unit_of_work = current_unit_of_work.get()
+    if unit_of_work is not None and unit_of_work.active:
+        return unit_of_work
+    return None
+
+
+@contextmanager
+def unit_of_work(name: str = "update"):
+    """
+    Открывает единицу работы: все вызовы get_db() внутри блока получают одну сессию.
+    При успешном завершении изменения фиксируются, при исключении откатываются,
+    сессия закрывается в любом случае. Вложенные блоки используют внешнюю единицу работы.
+    """
+    existing = get_current_unit_of_work()
+    if existing is not None and existing.owns_current_context():
+        yield existing
+        return
+
+    uow = UnitOfWork(name)
+    token = current_unit_of_work.set(uow)
+    outcome = "commit"
+    try:
+        yield uow
+        try:
+            uow.commit()
+        except Exception as e:
+            outcome = "rollback"
+            logger.error(f"Ошибка фиксации изменений для {name}: {e}")
+            uow.rollback()
+    except BaseException:
+        outcome = "rollback"
+        uow.rollback()
+        raise
+    finally:
+        used_session = uow.has_session
+        uow.close()
+        current_unit_of_work.reset(token)
+        if used_session:
+            _record_outcome(outcome)
+
+
+def _record_outcome(outcome: str) -> None:
+    """Учёт результата единицы работы в метриках"""
+    try:
+        from src.services.metrics_service import metrics_service
+        metrics_service.record_db_session(outcome)
+    except Exception as e:
+        logger.debug(f"Не удалось записать метрику сессии БД: {e}")
@@ -3,6 +3,7 @@ from src.models.user import User, UserRole
 from src.models.game import Game, GameParticipant, GameStatus, GameRole, Location, Photo
 from src.models.settings import District, DistrictZone, RoleDisplay, GameRule, GameSettings
 from src.models.scheduled_event import ScheduledEvent, EventType
+from src.models.notification import NotificationOutbox
 
 def create_tables():
     """Создание всех таблиц в базе данных"""
@@ -13,5 +14,6 @@ __all__ = [
     "User", "UserRole",
     "Game", "GameParticipant", "GameStatus", "GameRole", "Location", "Photo",
     "District", "DistrictZone", "RoleDisplay", "GameRule", "GameSettings",
-    "ScheduledEvent", "EventType"
+    "ScheduledEvent", "EventType",
+    "NotificationOutbox"
 ] 
\ No newline at end of file
@@ -1,28 +1,169 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
+import time
 from dotenv import load_dotenv
 
+from src.utils.query_stats import install_query_listeners
+
 # Загрузка переменных окружения
 load_dotenv()
 
 # Получение строки подключения к БД из переменных окружения
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./bot.db")
 
+# Асинхронные драйверы для синхронных схем подключения
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+# Параметры пула соединений
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Пул соединений, замеряющий время ожидания свободного соединения"""
+
+    # Функции, получающие время ожидания в секундах (например, метрики)
+    wait_observers = []
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            for observer in self.wait_observers:
+                observer(waited)
+
+
+class AppSession(Session):
+    """Сессия, которую нельзя закрыть изнутри сервиса, пока она принадлежит запросу"""
+
+    def close(self) -> None:
+        if self.info.get("request_scoped"):
+            # Сессию запроса закрывает единица работы по завершении обновления
+            return
+        super().close()
+
+
+def _engine_options(url: str) -> dict:
+    """Параметры движка: инструментированный пул для всех БД, кроме SQLite в памяти"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
 # Создание движка SQLAlchemy
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+install_query_listeners(engine)
 
 # Создание фабрики сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AppSession)
+
+# Единица работы текущего обновления (см. src/middlewares/db_session.py)
+current_unit_of_work: ContextVar = ContextVar("current_unit_of_work", default=None)
 
 # Создание базового класса для моделей
 Base = declarative_base()
 
+# Асинхронный движок и фабрика сессий создаются при первом обращении,
+# чтобы синхронный код не зависел от наличия асинхронного драйвера
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_database_url(url: str = DATABASE_URL) -> str:
+    """Преобразование строки подключения к БД в строку для асинхронного драйвера"""
+    explicit_url = os.getenv("ASYNC_DATABASE_URL")
+    if explicit_url:
+        return explicit_url
+
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver:
+        parsed = parsed.set(drivername=driver)
+    return parsed.render_as_string(hide_password=False)
+
+
+def get_async_engine():
+    """Получение асинхронного движка SQLAlchemy"""
+    global async_engine, AsyncSessionLocal
+
+    if async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        async_engine = create_async_engine(get_async_database_url())
+        install_query_listeners(async_engine.sync_engine)
+        # expire_on_commit=False: после commit объекты остаются доступными
+        # без ленивой подгрузки, которая в асинхронном режиме невозможна
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+    return async_engine
+
+
+def get_pool_status() -> dict:
+    """Текущее состояние пула соединений синхронного движка"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"size": 0, "checked_out": 0, "overflow": 0, "checked_in": 0}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checked_in": pool.checkedin(),
+    }
+
+
 def get_db():
     """Получение сессии базы данных"""
+    unit_of_work = current_unit_of_work.get()
+    if unit_of_work is not None and unit_of_work.owns_current_context():
+        # Внутри обработки обновления все сервисы работают в одной сессии
+        yield unit_of_work.session
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+@asynccontextmanager
+async def get_async_db():
+    """Получение асинхронной сессии базы данных"""
+    get_async_engine()
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def dispose_async_engine() -> None:
+    """Закрытие пула соединений асинхронного движка"""
+    global async_engine, AsyncSessionLocal
+
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
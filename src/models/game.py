@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Text, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Text, Float, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -55,8 +55,21 @@ class Game(Base):
     description = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
     
-    # Связи
-    participants = relationship("GameParticipant", back_populates="game", lazy="joined")
+    # Счетчики участников (денормализованы, обновляются GameService в транзакции изменения участия)
+    participants_count = Column(Integer, nullable=False, default=0, server_default="0")
+    drivers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    found_drivers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    hidden_drivers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    # Связи. Участники по умолчанию не загружаются: обращение к незагруженному списку
+    # вызывает ошибку, а запросы, которым нужен состав игры, явно подгружают его
+    # через game_service.WITH_PARTICIPANTS (selectinload: отдельные запросы IN без размножения строк)
+    participants = relationship("GameParticipant", back_populates="game", lazy="raise")
+    
+    # Индекс для выборок игр по статусу с сортировкой по времени
+    __table_args__ = (
+        Index("ix_games_status_scheduled_at", "status", "scheduled_at"),
+    )
     
     # Поля для аудита
     created_at = Column(DateTime, default=datetime.now)
@@ -114,8 +127,9 @@ class GameParticipant(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Обратные ссылки
-    game = relationship("Game", back_populates="participants",lazy="joined")
-    user = relationship("User",lazy="joined")
+    # Пользователь загружается только явно: selectinload(GameParticipant.user)
+    game = relationship("Game", back_populates="participants", lazy="select")
+    user = relationship("User", lazy="raise")
     
     # Роль в игре
     role = Column(Enum(GameRole), nullable=True)
@@ -133,6 +147,12 @@ class GameParticipant(Base):
     joined_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     
+    # Пользователь записан на игру не более одного раза; поиск игр пользователя по user_id
+    __table_args__ = (
+        Index("uq_game_participants_game_user", "game_id", "user_id", unique=True),
+        Index("ix_game_participants_user_game", "user_id", "game_id"),
+    )
+    
     def __repr__(self):
         return f"<GameParticipant(game_id={self.game_id}, user_id={self.user_id}, role={self.role})>"
 
@@ -159,6 +179,9 @@ class Location(Base):
     def __repr__(self):
         return f"<Location(game_id={self.game_id}, user_id={self.user_id}, lat={self.latitude}, lon={self.longitude})>"
 
+# Последняя геолокация участника в игре
+Index("ix_locations_game_user_timestamp", Location.game_id, Location.user_id, Location.timestamp.desc())
+
 class Photo(Base):
     """Модель фотографии"""
     __tablename__ = "photos"
@@ -185,5 +208,10 @@ class Photo(Base):
     # Для фото найденных машин - указание на найденного водителя
     found_driver_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
+    # Фотографии участника игры определенного типа
+    __table_args__ = (
+        Index("ix_photos_game_user_type", "game_id", "user_id", "photo_type"),
+    )
+    
     def __repr__(self):
         return f"<Photo(game_id={self.game_id}, user_id={self.user_id}, type={self.photo_type}, approved={self.is_approved})>" 
\ No newline at end of file
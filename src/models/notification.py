@@ -0,0 +1,43 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, JSON, Index
+from datetime import datetime
+
+from src.models.base import Base
+
+
+class NotificationOutbox(Base):
+    """
+    Сообщение в очереди отправки. Записывается в той же транзакции, что и изменение
+    состояния игры, и отправляется фоновым диспетчером с повторами.
+    Запись без chat_id - рассылка по игре: диспетчер формирует тексты и заменяет её
+    отдельными сообщениями получателям
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Вид уведомления (game_started, game_ended, ...) и игра, к которой оно относится
+    kind = Column(String(50), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=True)
+
+    # Получатель и текст (пусты у рассылки по игре)
+    chat_id = Column(BigInteger, nullable=True)
+    text = Column(Text, nullable=True)
+
+    # Параметры рассылки по игре или send_message (parse_mode и т.п.)
+    payload = Column(JSON, nullable=True)
+
+    # pending - ждет отправки, sent - отправлено, failed - попытки исчерпаны
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.now)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.now)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_notification_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<NotificationOutbox(id={self.id}, kind={self.kind}, chat_id={self.chat_id}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -23,7 +23,7 @@ class ScheduledEvent(Base):
     
     # Связь с игрой
     game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
-    game = relationship("Game", lazy="joined")
+    game = relationship("Game", lazy="select")
     
     # Тип события
     event_type = Column(String(50), nullable=False)
@@ -43,9 +43,14 @@ class ScheduledEvent(Base):
     # Время создания записи
     created_at = Column(DateTime, default=datetime.now)
     
+    # Экземпляр бота, выполняющий событие, и срок его аренды
+    claimed_by = Column(String(100), nullable=True)
+    claimed_until = Column(DateTime, nullable=True)
+    
     # Уникальность по игре, типу события и времени
     __table_args__ = (
         UniqueConstraint('game_id', 'event_type', 'scheduled_at', name='_game_event_time_uc'),
+        Index('ix_scheduled_events_executed_scheduled_at', 'is_executed', 'scheduled_at'),
     )
     
     def __repr__(self):
@@ -122,6 +122,9 @@ class GameSettings(Base):
     allow_early_start = Column(Boolean, default=True)  # Разрешить досрочный старт
     min_participants_to_start = Column(Integer, default=3)  # Минимум участников для старта
     
+    # Версия настроек, увеличивается при каждом изменении (по ней процессы бота обновляют кэш)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Поля для аудита
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -9,6 +9,7 @@ from src.services.dynamic_keyboard_service import DynamicKeyboardService
 from src.services.zone_management_service import ZoneManagementService
 from src.services.game_settings_service import GameSettingsService
 from src.services.manual_game_control_service import ManualGameControlService
+from src.services.game_list_service import GameListService
 
 __all__ = [
     "GameService",
@@ -19,5 +20,6 @@ __all__ = [
     "DynamicKeyboardService",
     "ZoneManagementService",
     "GameSettingsService",
-    "ManualGameControlService"
+    "ManualGameControlService",
+    "GameListService"
 ] 
\ No newline at end of file
@@ -0,0 +1,127 @@
+import asyncio
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+from loguru import logger
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InputMediaPhoto
+
+from src.services.user_service import UserService
+from src.utils.broadcast import rate_limiter, send_message
+
+# Как часто отправлять администраторам сводку событий игры (сек); 0 - каждое событие сразу
+ADMIN_DIGEST_INTERVAL = float(os.getenv("ADMIN_DIGEST_INTERVAL", "60"))
+# Сводка отправляется досрочно, когда накопилось столько событий (ограничение длины сообщения)
+ADMIN_DIGEST_MAX_ITEMS = int(os.getenv("ADMIN_DIGEST_MAX_ITEMS", "20"))
+
+# В одном альбоме Telegram не больше 10 фото
+_MEDIA_GROUP_LIMIT = 10
+
+# Функции, получающие число запросов к Telegram API, которые сводка сэкономила (например, метрики)
+digest_observers = []
+
+
+class DigestItem(NamedTuple):
+    """Событие в сводке администраторам"""
+    line: str  # строка сводки
+    calls: int = 1  # сколько запросов на администратора стоило бы отдельное уведомление
+    photo_id: Optional[str] = None  # file_id фото: уходит альбомом перед текстом сводки
+    buttons: Optional[List[InlineKeyboardButton]] = None  # ряд кнопок под сводкой
+
+
+class AdminDigest:
+    """
+    Сводка событий игры для администраторов: вместо уведомления на каждое событие -
+    одно сообщение (и альбом фото) на игру раз в interval секунд
+    """
+
+    def __init__(self, interval: float = ADMIN_DIGEST_INTERVAL, max_items: int = ADMIN_DIGEST_MAX_ITEMS):
+        self.interval = interval
+        self.max_items = max_items
+        self._items: Dict[int, List[DigestItem]] = {}
+        self._titles: Dict[int, str] = {}
+        self._timers: Dict[int, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    async def add(self, bot, game_id: int, title: str, item: DigestItem) -> None:
+        """Добавить событие в сводку игры"""
+        items = self._items.setdefault(game_id, [])
+        items.append(item)
+        self._titles[game_id] = title
+
+        if len(items) >= self.max_items:
+            await self.flush(bot, game_id)
+        elif game_id not in self._timers:
+            self._timers[game_id] = asyncio.create_task(self._flush_later(bot, game_id))
+
+    async def _flush_later(self, bot, game_id: int) -> None:
+        await asyncio.sleep(self.interval)
+        self._timers.pop(game_id, None)
+        await self.flush(bot, game_id)
+
+    async def flush(self, bot, game_id: int) -> None:
+        """Отправить накопленную сводку игры"""
+        timer = self._timers.pop(game_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        items = self._items.pop(game_id, None)
+        title = self._titles.pop(game_id, "")
+        if not items:
+            return
+
+        try:
+            admins = UserService.get_admin_users()
+            if not admins:
+                logger.warning(f"Нет администраторов для сводки по игре {game_id}")
+                return
+
+            photos = [item for item in items if item.photo_id]
+            text = f"🗂 <b>Сводка по игре {title}</b> (событий: {len(items)})\n\n" + "\n".join(item.line for item in items)
+            rows = [item.buttons for item in items if item.buttons]
+            reply_markup = InlineKeyboardMarkup(rows) if rows else None
+
+            sent_calls = 0
+            for admin in admins:
+                if len(items) == 1 and photos:
+                    # Одно фото дешевле отправить с подписью и кнопками, чем альбомом и сводкой
+                    await rate_limiter.acquire(admin.telegram_id)
+                    try:
+                        await bot.send_photo(chat_id=admin.telegram_id, photo=photos[0].photo_id, caption=text,
+                                             parse_mode="HTML", reply_markup=reply_markup)
+                    except Exception as e:
+                        logger.error(f"Ошибка отправки сводки админу {admin.telegram_id}: {e}")
+                    sent_calls += 1
+                    continue
+                for start in range(0, len(photos), _MEDIA_GROUP_LIMIT):
+                    chunk = photos[start:start + _MEDIA_GROUP_LIMIT]
+                    await rate_limiter.acquire(admin.telegram_id)
+                    try:
+                        await bot.send_media_group(
+                            chat_id=admin.telegram_id,
+                            media=[InputMediaPhoto(item.photo_id, caption=item.line, parse_mode="HTML") for item in chunk]
+                        )
+                    except Exception as e:
+                        logger.error(f"Ошибка отправки фото сводки админу {admin.telegram_id}: {e}")
+                    sent_calls += 1
+                await send_message(bot, admin.telegram_id, text, parse_mode="HTML", reply_markup=reply_markup)
+                sent_calls += 1
+
+            saved = sum(item.calls for item in items) * len(admins) - sent_calls
+            logger.info(f"Сводка по игре {game_id}: {len(items)} событий, сэкономлено запросов: {saved}")
+            for observer in digest_observers:
+                try:
+                    observer(saved)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки итогов сводки: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка отправки сводки по игре {game_id}: {e}")
+
+    async def flush_all(self, bot) -> None:
+        """Отправить все накопленные сводки"""
+        for game_id in list(self._items):
+            await self.flush(bot, game_id)
+
+
+admin_digest = AdminDigest()
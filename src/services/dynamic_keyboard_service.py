@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import List, Optional, NamedTuple
 import pytz
 from telegram import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 from loguru import logger
@@ -9,6 +9,9 @@ from src.models.base import get_db
 from src.services.user_context_service import UserContextService
 from src.services.user_service import UserService
 from src.models.game import GameRole, GameStatus
+from src.utils.cache import TTLCache
+from src.utils.cache_backend import create_cache
+from src.utils.telegram_request import sent_markup_observers
 
 
 
@@ -24,6 +27,30 @@ def format_msk_datetime(dt: datetime) -> str:
     msk_time = dt.astimezone(DEFAULT_TIMEZONE)
     return msk_time.strftime('%d.%m.%Y %H:%M')
 
+class KeyboardKey(NamedTuple):
+    """Все, от чего зависит вид главной клавиатуры"""
+    status: str
+    role: Optional[GameRole]
+    phase: Optional[GameStatus]
+    is_admin: bool
+    is_found: bool
+    has_hidden: bool
+    game_info: Optional[str]  # строка о предстоящей игре у записанного пользователя
+
+# Готовые главные клавиатуры по ключу: объекты telegram неизменяемы,
+# поэтому одна разметка отдается всем пользователям с тем же ключом
+KEYBOARD_CACHE_SIZE = int(os.getenv("KEYBOARD_CACHE_SIZE", "1024"))
+keyboard_cache = TTLCache("reply_keyboards", maxsize=KEYBOARD_CACHE_SIZE, ttl=3600)
+
+# Ключ главной клавиатуры, последней отправленной в чат: рассылка обновлений
+# клавиатур пропускает чаты, у которых клавиатура не изменилась
+SENT_KEYBOARDS_CACHE_SIZE = int(os.getenv("SENT_KEYBOARDS_CACHE_SIZE", "10000"))
+SENT_KEYBOARDS_TTL = float(os.getenv("SENT_KEYBOARDS_TTL", "21600"))
+sent_keyboards = create_cache("sent_keyboards", maxsize=SENT_KEYBOARDS_CACHE_SIZE, ttl=SENT_KEYBOARDS_TTL)
+# Ключ главной клавиатуры, последней построенной для чата в этом процессе: в sent_keyboards
+# он попадает только после успешной отправки (track_sent_reply_markup)
+built_keyboards = TTLCache("built_keyboards", maxsize=SENT_KEYBOARDS_CACHE_SIZE, ttl=600)
+
 class DynamicKeyboardService:
     """Сервис для создания динамических контекстно-зависимых клавиатур"""
     
@@ -35,25 +62,89 @@ class DynamicKeyboardService:
     def get_contextual_main_keyboard(user_id: int) -> ReplyKeyboardMarkup:
         """Получить главную клавиатуру в зависимости от контекста пользователя"""
         try:
-            context = UserContextService.get_user_game_context(user_id)
-            is_admin = UserService.is_admin(user_id)
-            
-            if context.status == UserContextService.STATUS_NORMAL:
-                return DynamicKeyboardService._get_normal_keyboard(is_admin)
-            elif context.status == UserContextService.STATUS_REGISTERED:
-                return DynamicKeyboardService._get_registered_keyboard(is_admin, context.game)
-            elif context.status == UserContextService.STATUS_IN_GAME:
-                return DynamicKeyboardService._get_in_game_keyboard(is_admin, context.game, context.participant)
-            elif context.status == UserContextService.STATUS_GAME_FINISHED:
-                return DynamicKeyboardService._get_finished_game_keyboard(is_admin, context.game)
-            else:
-                return DynamicKeyboardService._get_normal_keyboard(is_admin)
+            snapshot = UserContextService.get_context_snapshot(user_id)
+            key = DynamicKeyboardService.get_keyboard_key(snapshot, UserService.is_admin(user_id))
+            return DynamicKeyboardService.get_keyboard_for_chat(user_id, key)
                 
         except Exception as e:
             logger.error(f"Ошибка при создании контекстной клавиатуры для пользователя {user_id}: {e}")
             # Возвращаем базовую клавиатуру при ошибке
             return DynamicKeyboardService._get_normal_keyboard(UserService.is_admin(user_id))
     
+    @staticmethod
+    def get_keyboard_key(snapshot: dict, is_admin: bool) -> KeyboardKey:
+        """Ключ главной клавиатуры по снимку контекста (UserContextService.get_context_snapshot)"""
+        status = snapshot["status"]
+        game = snapshot["game"]
+        if status == UserContextService.STATUS_REGISTERED:
+            game_info = f"⏰ {game['district']} в {format_msk_time(game['scheduled_at'])}"
+            return KeyboardKey(status, None, None, is_admin, False, False, game_info)
+        if status == UserContextService.STATUS_IN_GAME:
+            participant = snapshot["participant"] or {}
+            return KeyboardKey(
+                status,
+                participant.get("role"),
+                game["status"],
+                is_admin,
+                bool(participant.get("is_found")),
+                bool(participant.get("has_hidden")),
+                None
+            )
+        if status != UserContextService.STATUS_GAME_FINISHED:
+            status = UserContextService.STATUS_NORMAL
+        return KeyboardKey(status, None, None, is_admin, False, False, None)
+    
+    @staticmethod
+    def is_keyboard_sent(chat_id: int, key: KeyboardKey) -> bool:
+        """Клавиатура с этим ключом уже последней отправлена в чат"""
+        return sent_keyboards.get(chat_id) == key
+    
+    @staticmethod
+    async def is_keyboard_sent_async(chat_id: int, key: KeyboardKey) -> bool:
+        """is_keyboard_sent для корутин"""
+        return await sent_keyboards.get_async(chat_id) == key
+    
+    @staticmethod
+    async def track_sent_reply_markup(chat_id: int, reply_markup: dict) -> None:
+        """
+        Учет разметки, успешно отправленной в чат (наблюдатель sent_markup_observers).
+        Главная клавиатура, построенная для чата, запоминается; любая другая reply-клавиатура
+        или ее удаление заменяют ее у пользователя, и запись о чате сбрасывается
+        """
+        if "keyboard" not in reply_markup and "remove_keyboard" not in reply_markup:
+            return  # inline-кнопки не меняют reply-клавиатуру
+        key = built_keyboards.get(chat_id)
+        if key is not None and reply_markup == DynamicKeyboardService.get_keyboard_for_key(key).to_dict():
+            await sent_keyboards.set_async(chat_id, key)
+        else:
+            await sent_keyboards.invalidate_async(chat_id)
+    
+    @staticmethod
+    def get_keyboard_for_chat(chat_id: int, key: KeyboardKey) -> ReplyKeyboardMarkup:
+        """Главная клавиатура для отправки в чат: ключ запоминается до подтверждения отправки"""
+        built_keyboards.set(chat_id, key)
+        return DynamicKeyboardService.get_keyboard_for_key(key)
+    
+    @staticmethod
+    def get_keyboard_for_key(key: KeyboardKey) -> ReplyKeyboardMarkup:
+        """Готовая клавиатура для ключа (строится при первом обращении)"""
+        keyboard = keyboard_cache.get(key)
+        if keyboard is None:
+            keyboard = DynamicKeyboardService._build_keyboard(key)
+            keyboard_cache.set(key, keyboard)
+        return keyboard
+    
+    @staticmethod
+    def _build_keyboard(key: KeyboardKey) -> ReplyKeyboardMarkup:
+        if key.status == UserContextService.STATUS_REGISTERED:
+            return DynamicKeyboardService._get_registered_keyboard(key.is_admin, key.game_info)
+        elif key.status == UserContextService.STATUS_IN_GAME:
+            return DynamicKeyboardService._get_in_game_keyboard(key.is_admin, key.phase, key.role)
+        elif key.status == UserContextService.STATUS_GAME_FINISHED:
+            return DynamicKeyboardService._get_finished_game_keyboard(key.is_admin)
+        else:
+            return DynamicKeyboardService._get_normal_keyboard(key.is_admin)
+    
     @staticmethod
     def _get_normal_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
         """Стандартная клавиатура для пользователя без активных игр"""
@@ -71,7 +162,7 @@ class DynamicKeyboardService:
         return ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     
     @staticmethod
-    def _get_registered_keyboard(is_admin: bool, game) -> ReplyKeyboardMarkup:
+    def _get_registered_keyboard(is_admin: bool, game_info: str) -> ReplyKeyboardMarkup:
         """Клавиатура для пользователя, записанного на игру"""
         buttons = [
             [KeyboardButton(text="🎮 Моя игра"), KeyboardButton(text="🎯 Все мои игры")],
@@ -79,7 +170,6 @@ class DynamicKeyboardService:
         ]
         
         # Добавляем информацию о предстоящей игре
-        game_info = f"⏰ {game.district} в {format_msk_time(game.scheduled_at)}"
         buttons.insert(0, [KeyboardButton(text=game_info)])
         
         if is_admin:
@@ -90,14 +180,12 @@ class DynamicKeyboardService:
         return ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     
     @staticmethod
-    def _get_in_game_keyboard(is_admin: bool, game, participant) -> ReplyKeyboardMarkup:
+    def _get_in_game_keyboard(is_admin: bool, phase: Optional[GameStatus], role: Optional[GameRole]) -> ReplyKeyboardMarkup:
         """Клавиатура для пользователя в активной игре"""
-        role = participant.role if participant else None
-        
         if role == GameRole.DRIVER:
-            buttons = DynamicKeyboardService._get_driver_game_buttons(game)
+            buttons = DynamicKeyboardService._get_driver_game_buttons(phase)
         elif role == GameRole.SEEKER:
-            buttons = DynamicKeyboardService._get_seeker_game_buttons(game)
+            buttons = DynamicKeyboardService._get_seeker_game_buttons(phase)
         else:
             # Роль еще не назначена или неизвестна
             buttons = [
@@ -115,9 +203,9 @@ class DynamicKeyboardService:
         return ReplyKeyboardMarkup(buttons, resize_keyboard=True)
     
     @staticmethod
-    def _get_driver_game_buttons(game) -> List[List[KeyboardButton]]:
+    def _get_driver_game_buttons(phase: Optional[GameStatus]) -> List[List[KeyboardButton]]:
         """Кнопки для водителя в зависимости от фазы игры"""
-        if game.status in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
+        if phase in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
             # В процессе игры - водитель может отправлять локацию и фото
             return [
                 [KeyboardButton(text="📍 Отправить локацию"), KeyboardButton(text="📸 Фото места")],
@@ -129,9 +217,9 @@ class DynamicKeyboardService:
             ]
     
     @staticmethod
-    def _get_seeker_game_buttons(game) -> List[List[KeyboardButton]]:
+    def _get_seeker_game_buttons(phase: Optional[GameStatus]) -> List[List[KeyboardButton]]:
         """Кнопки для искателя в зависимости от фазы игры"""
-        if game.status in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
+        if phase in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
             # В процессе игры - искатель может отправлять локацию и фото находки
             return [
                 [KeyboardButton(text="📍 Моя позиция"), KeyboardButton(text="📸 Фото находки")],
@@ -143,7 +231,7 @@ class DynamicKeyboardService:
             ]
     
     @staticmethod
-    def _get_finished_game_keyboard(is_admin: bool, game) -> ReplyKeyboardMarkup:
+    def _get_finished_game_keyboard(is_admin: bool) -> ReplyKeyboardMarkup:
         """Клавиатура для пользователя после завершения игры"""
         buttons = [
             [KeyboardButton(text="📊 Результаты игры"), KeyboardButton(text="🏆 Мои достижения")],
@@ -349,4 +437,7 @@ class DynamicKeyboardService:
                 WHERE game_id = ? AND user_id = ?
             """, (game_id, user_id))
             
-            return bool(cursor.fetchone()) 
\ No newline at end of file
+            return bool(cursor.fetchone()) 
+
+
+sent_markup_observers.append(DynamicKeyboardService.track_sent_reply_markup)
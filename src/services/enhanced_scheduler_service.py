@@ -1,9 +1,16 @@
 import asyncio
+import inspect
 import os
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from functools import wraps
+from typing import Optional, List, Dict, Any, Set, Tuple
+from apscheduler.events import EVENT_JOB_MISSED, EVENT_JOB_REMOVED
+from apscheduler.job import Job
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from loguru import logger
 from telegram.ext import Application
 import pytz
@@ -13,13 +20,59 @@ from src.models.game import Game, GameStatus, GameParticipant, GameRole
 from src.models.scheduled_event import ScheduledEvent, EventType
 from src.services.user_service import UserService
 from src.services.game_service import GameService
-from src.services.event_persistence_service import EventPersistenceService
+from src.services.event_persistence_service import EventPersistenceService, PlannedEvent, SCHEDULER_EVENT_LEASE
 from src.services.settings_service import SettingsService
+from src.services.notification_outbox_service import NotificationDispatcher
+from src.utils.broadcast import BroadcastMessage, BroadcastResult, broadcast
+from src.utils.db_executor import run_db
 
 
 # Определяем временную зону (по умолчанию московское время)
 DEFAULT_TIMEZONE = pytz.timezone(os.getenv("TIMEZONE", "Europe/Moscow"))
 
+
+def _parse_misfire_grace(value: str) -> Dict[str, int]:
+    """Разбор SCHEDULER_MISFIRE_GRACE вида game_start:600,reminder:300"""
+    grace = {}
+    for item in value.split(","):
+        if item.strip():
+            event_type, seconds = item.split(":")
+            grace[event_type.strip()] = int(seconds)
+    return grace
+
+
+# Сколько секунд после назначенного времени событие еще выполняется (после перезапуска бота
+# или задержки цикла событий); позже оно считается пропущенным. Ключ "reminder" - все напоминания
+MISFIRE_GRACE = {
+    "reminder": 600,
+    "game_start": 1800,
+    "hiding_warning": 120,
+    "hiding_phase_end": 1800,
+    "search_phase_end": 3600,
+    "game_cleanup": 86400,
+    **_parse_misfire_grace(os.getenv("SCHEDULER_MISFIRE_GRACE", "")),
+}
+# Пауза между догоняющими запусками разных игр после перезапуска (сек)
+SCHEDULER_CATCHUP_SPACING = float(os.getenv("SCHEDULER_CATCHUP_SPACING", "1"))
+
+# Функции, получающие (тип события, решение, опоздание в секундах) для просроченных событий (например, метрики);
+# решение: run - выполняется с опозданием, coalesced - поглощено более поздним событием, expired - пропущено
+misfire_observers = []
+
+
+def misfire_grace(event_type: str) -> int:
+    """Допустимое опоздание события (сек)"""
+    return MISFIRE_GRACE.get("reminder" if event_type.startswith("reminder_") else event_type, 0)
+
+
+def report_misfire(event_type: str, action: str, lateness: float) -> None:
+    """Передать наблюдателям решение по просроченному событию"""
+    for observer in misfire_observers:
+        try:
+            observer(event_type, action, lateness)
+        except Exception as e:
+            logger.error(f"Ошибка обработки просроченного события {event_type}: {e}")
+
 def format_msk_time(dt: datetime) -> str:
     """Форматирует время в МСК"""
     if dt.tzinfo is None:
@@ -35,6 +88,38 @@ def format_msk_datetime(dt: datetime) -> str:
     return msk_time.strftime('%d.%m.%Y в %H:%M')
 
 
+def claimed_event(handler):
+    """
+    Выполнение события только тем экземпляром бота, который захватил его строку
+    в scheduled_events; пока обработчик работает, аренда события продлевается
+    """
+    signature = inspect.signature(handler)
+
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        event_id = signature.bind(*args, **kwargs).arguments.get("event_id")
+        if event_id is None:
+            return await handler(*args, **kwargs)
+        if not await run_db(EventPersistenceService.claim_event, event_id):
+            logger.info(f"Событие {event_id} уже выполнено или выполняется другим экземпляром бота, пропускаем")
+            return None
+        heartbeat = asyncio.create_task(_extend_claim_periodically(event_id))
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            heartbeat.cancel()
+            await run_db(EventPersistenceService.mark_event_executed, event_id)
+
+    return wrapper
+
+
+async def _extend_claim_periodically(event_id: int):
+    """Продление аренды события, пока его выполнение не закончится"""
+    while True:
+        await asyncio.sleep(SCHEDULER_EVENT_LEASE / 3)
+        await run_db(EventPersistenceService.extend_claim, event_id)
+
+
 class EnhancedSchedulerService:
     """Улучшенный сервис планировщика с персистентными событиями"""
     
@@ -42,6 +127,12 @@ class EnhancedSchedulerService:
         # Инициализируем планировщик с правильной временной зоной
         self.scheduler = AsyncIOScheduler(timezone=DEFAULT_TIMEZONE)
         self.application = application
+        # Индекс задач по играм: отмена и список задач игры не перебирают все задачи планировщика
+        self._game_jobs: Dict[int, Set[str]] = {}
+        self._job_games: Dict[str, int] = {}
+        self._jobs_lock = threading.Lock()
+        self.scheduler.add_listener(self._on_job_removed, EVENT_JOB_REMOVED)
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
         self.bot = application.bot
         self.format_msk_time=format_msk_time
         self.format_msk_datetime=format_msk_datetime
@@ -49,12 +140,19 @@ class EnhancedSchedulerService:
         self.hiding_time = int(os.getenv("HIDING_TIME", 30))  # минуты
         self.reminder_times = [int(x) for x in os.getenv("REMINDER_BEFORE_GAME", "60,24,5").split(",")]  # минуты
         self.hiding_warning_time = int(os.getenv("HIDING_WARNING_TIME", 5))  # за сколько минут предупреждать о конце пряток
+        self.counters_reconcile_interval = int(os.getenv("GAME_COUNTERS_RECONCILE_INTERVAL", 10))  # минуты
+        # Окно событий в памяти (минуты): 0 - все будущие события сразу становятся задачами,
+        # иначе задачами становятся только ближайшие события, окно периодически пополняется из БД
+        self.event_window = int(os.getenv("SCHEDULER_EVENT_WINDOW", 0))
         
         logger.info(f"Планировщик инициализирован с временной зоной: {DEFAULT_TIMEZONE}")
         
         self.event_persistence = EventPersistenceService()
         db_generator = get_db()
         self.db = next(db_generator)
+        
+        # Отправка уведомлений из очереди (записываются вместе со сменой статуса игры)
+        self.notification_dispatcher = NotificationDispatcher(self.bot, self.render_notification)
     
     def start(self):
         """Запуск планировщика с восстановлением событий"""
@@ -64,34 +162,154 @@ class EnhancedSchedulerService:
             
             # Восстанавливаем события из БД
             self._restore_events_from_db()
+            
+            if self.event_window:
+                # Пополняем окно дважды за его длину: событие попадает в память заранее
+                self.scheduler.add_job(
+                    self._fill_event_window,
+                    trigger=IntervalTrigger(seconds=self.event_window * 30),
+                    id="fill_event_window",
+                    replace_existing=True
+                )
+            
+            # Периодическая сверка счетчиков участников игр
+            self.scheduler.add_job(
+                self.reconcile_game_counters,
+                trigger=IntervalTrigger(minutes=self.counters_reconcile_interval),
+                id="reconcile_game_counters",
+                replace_existing=True
+            )
+            
+            self.notification_dispatcher.start()
     
     def shutdown(self):
         """Остановка планировщика"""
         if self.scheduler.running:
             self.scheduler.shutdown()
             logger.info("Планировщик задач остановлен")
+        # Неотправленные уведомления остаются в очереди до следующего запуска
+        self.notification_dispatcher.stop()
     
     def _restore_events_from_db(self):
-        """Восстановление всех незавершенных событий из базы данных"""
+        """Восстановление незавершенных событий из базы данных (в режиме окна - только ближайших)"""
         try:
-            events = EventPersistenceService.get_pending_events()
+            until = datetime.now() + timedelta(minutes=self.event_window) if self.event_window else None
+            events = EventPersistenceService.get_pending_events(until=until)
             restored_count = 0
+            overdue = []
             
             for event in events:
-                # Проверяем, не просрочено ли событие
+                # Просроченные события разбираются отдельно по политике MISFIRE_GRACE
                 if event.is_overdue:
-                    logger.warning(f"Событие {event.id} просрочено, пропускаем: {event}")
+                    overdue.append(event)
                     continue
                 
                 # Планируем событие
                 if self._schedule_event_from_db(event):
                     restored_count += 1
             
-            logger.info(f"Восстановлено {restored_count} событий из {len(events)} найденных")
+            caught_up = self._catch_up_overdue(overdue)
+            logger.info(
+                f"Восстановлено {restored_count} событий из {len(events)} найденных, "
+                f"просроченных к выполнению: {caught_up} из {len(overdue)}"
+            )
             
         except Exception as e:
             logger.error(f"Ошибка восстановления событий: {e}")
     
+    def _plan_catch_up(self, events: List[ScheduledEvent], now: datetime) -> Dict[int, List[ScheduledEvent]]:
+        """
+        Политика просроченных событий: выполняются только события, опоздавшие не больше MISFIRE_GRACE;
+        из напоминаний игры остается последнее (и ни одного, если игра уже должна была начаться),
+        предупреждение о конце пряток не нужно, если прятки тоже закончились; остальное - по порядку
+        """
+        by_game: Dict[int, List[ScheduledEvent]] = {}
+        for event in sorted(events, key=lambda event: event.scheduled_at):
+            by_game.setdefault(event.game_id, []).append(event)
+        
+        runs: Dict[int, List[ScheduledEvent]] = {}
+        for game_id, game_events in by_game.items():
+            types = {event.event_type for event in game_events}
+            reminders = [event for event in game_events if event.event_type.startswith("reminder_")]
+            for event in game_events:
+                lateness = (now - event.scheduled_at).total_seconds()
+                if lateness > misfire_grace(event.event_type):
+                    action = "expired"
+                elif event.event_type.startswith("reminder_") and ("game_start" in types or event is not reminders[-1]):
+                    action = "coalesced"
+                elif event.event_type == "hiding_warning" and "hiding_phase_end" in types:
+                    action = "coalesced"
+                else:
+                    action = "run"
+                    runs.setdefault(game_id, []).append(event)
+                report_misfire(event.event_type, action, lateness)
+                if action != "run":
+                    logger.warning(f"Просроченное событие {event.id} пропущено ({action}): {event}")
+        return runs
+
+    def _catch_up_overdue(self, events: List[ScheduledEvent]) -> int:
+        """Выполнение просроченных событий: игры по очереди через SCHEDULER_CATCHUP_SPACING, события игры - по порядку"""
+        runs = self._plan_catch_up(events, datetime.now())
+        to_run = {event.id for game_events in runs.values() for event in game_events}
+        for event in events:
+            if event.id not in to_run:
+                EventPersistenceService.mark_event_executed(event.id)
+        
+        start = datetime.now(DEFAULT_TIMEZONE)
+        for index, (game_id, game_events) in enumerate(runs.items()):
+            calls = [call for call in map(self._event_call, game_events) if call]
+            self._add_game_job(
+                game_id, f"catch_up_{game_id}", self._catch_up_game,
+                start + timedelta(seconds=index * SCHEDULER_CATCHUP_SPACING), [game_id, calls],
+                misfire_grace_time=MISFIRE_GRACE["game_cleanup"]
+            )
+        return len(to_run)
+
+    async def _catch_up_game(self, game_id: int, calls: List[Tuple[Any, list]]):
+        """Выполнение просроченных событий игры одно за другим: фазы сменяются по порядку"""
+        for func, args in calls:
+            await func(*args)
+        logger.info(f"Выполнено просроченных событий игры {game_id}: {len(calls)}")
+
+    def _fill_event_window(self):
+        """Превращение в задачи событий, наступающих в ближайшие event_window минут"""
+        try:
+            now = datetime.now()
+            events = EventPersistenceService.get_pending_events(since=now, until=now + timedelta(minutes=self.event_window))
+            loaded = 0
+            for event in events:
+                if self.scheduler.get_job(event.job_id) is None and self._schedule_event_from_db(event):
+                    loaded += 1
+            if loaded:
+                logger.info(f"В окно планировщика добавлено {loaded} событий")
+        except Exception as e:
+            logger.error(f"Ошибка пополнения окна событий: {e}")
+
+    def _in_event_window(self, run_time: datetime) -> bool:
+        """Событие наступает в пределах окна (без окна - любое)"""
+        if not self.event_window:
+            return True
+        return run_time < datetime.now(DEFAULT_TIMEZONE) + timedelta(minutes=self.event_window)
+    
+    def _event_call(self, event: ScheduledEvent) -> Optional[Tuple[Any, list]]:
+        """Обработчик события и его аргументы"""
+        if event.event_type.startswith("reminder_"):
+            minutes = int(event.event_type.split("_")[1].replace("min", "").replace("hour", ""))
+            if "hour" in event.event_type:
+                minutes *= 60
+            return self.send_game_reminder, [event.game_id, minutes, event.id]
+        handlers = {
+            "game_start": self.start_game,
+            "hiding_phase_end": self.end_hiding_phase,
+            "hiding_warning": self.send_hiding_warning,
+            "search_phase_end": self.end_search_phase,
+            "game_cleanup": self.cleanup_game,
+        }
+        if event.event_type not in handlers:
+            logger.warning(f"Неизвестный тип события: {event.event_type}")
+            return None
+        return handlers[event.event_type], [event.game_id, event.id]
+    
     def _schedule_event_from_db(self, event: ScheduledEvent) -> bool:
         """Планирование события из БД"""
         try:
@@ -105,39 +323,14 @@ class EnhancedSchedulerService:
                 scheduled_time = scheduled_time.astimezone(DEFAULT_TIMEZONE)
             
             # Определяем функцию для выполнения
-            if event.event_type.startswith("reminder_"):
-                minutes = int(event.event_type.split("_")[1].replace("min", "").replace("hour", ""))
-                if "hour" in event.event_type:
-                    minutes *= 60
-                func = self.send_game_reminder
-                args = [event.game_id, minutes, event.id]
-            elif event.event_type == "game_start":
-                func = self.start_game
-                args = [event.game_id, event.id]
-            elif event.event_type == "hiding_phase_end":
-                func = self.end_hiding_phase
-                args = [event.game_id, event.id]
-            elif event.event_type == "hiding_warning":
-                func = self.send_hiding_warning
-                args = [event.game_id, event.id]
-            elif event.event_type == "search_phase_end":
-                func = self.end_search_phase
-                args = [event.game_id, event.id]
-            elif event.event_type == "game_cleanup":
-                func = self.cleanup_game
-                args = [event.game_id, event.id]
-            else:
-                logger.warning(f"Неизвестный тип события: {event.event_type}")
+            call = self._event_call(event)
+            if call is None:
                 return False
+            func, args = call
             
             # Планируем событие с правильным временем
-            self.scheduler.add_job(
-                func,
-                trigger=DateTrigger(run_date=scheduled_time),
-                args=args,
-                id=event.job_id,
-                replace_existing=True
-            )
+            self._add_game_job(event.game_id, event.job_id, func, scheduled_time, args,
+                               misfire_grace_time=misfire_grace(event.event_type))
             
             logger.debug(f"Восстановлено событие: {event.job_id} на {scheduled_time}")
             return True
@@ -163,7 +356,10 @@ class EnhancedSchedulerService:
         # Получаем текущее время в правильной временной зоне
         current_time = datetime.now(DEFAULT_TIMEZONE)
         
-        # Планируем напоминания
+        # План событий игры: (событие для БД, время задачи, функция, аргументы без id события)
+        plan = []
+        
+        # Напоминания
         for reminder_minutes in self.reminder_times:
             reminder_time = game_time - timedelta(minutes=reminder_minutes)
             
@@ -174,105 +370,103 @@ class EnhancedSchedulerService:
                     event_type = f"reminder_{reminder_minutes // 60}hour"
                 else:
                     event_type = f"reminder_{reminder_minutes}min"
-                
-                # Сохраняем в БД
-                event = EventPersistenceService.save_event(
-                    game_id=game_id,
-                    event_type=event_type,
-                    scheduled_at=reminder_time.replace(tzinfo=None),  # Убираем timezone для БД
-                    event_data={"minutes_before": reminder_minutes}
-                )
-                
-                if event:
-                    # Планируем в планировщике
-                    self.scheduler.add_job(
-                        self.send_game_reminder,
-                        trigger=DateTrigger(run_date=reminder_time),
-                        args=[game_id, reminder_minutes, event.id],
-                        id=event.job_id,
-                        replace_existing=True
-                    )
-                    
-                    logger.info(f"Запланировано напоминание для игры {game_id} за {reminder_minutes} минут: {reminder_time}")
+                plan.append((event_type, reminder_time, {"minutes_before": reminder_minutes},
+                             self.send_game_reminder, [game_id, reminder_minutes]))
             else:
                 logger.debug(f"Напоминание за {reminder_minutes} минут для игры {game_id} пропущено (время уже прошло)")
         
-        # Планируем начало игры (фазу пряток)
-        if game_time > current_time:
-            start_event = EventPersistenceService.save_event(
-                game_id=game_id,
-                event_type="game_start",
-                scheduled_at=game_time.replace(tzinfo=None),  # Убираем timezone для БД
-                event_data={}
-            )
-            
-            if start_event:
-                self.scheduler.add_job(
-                    self.start_game,
-                    trigger=DateTrigger(run_date=game_time),
-                    args=[game_id, start_event.id],
-                    id=start_event.job_id,
-                    replace_existing=True
-                )
-                
-                logger.info(f"Запланирован автоматический старт игры {game_id}: {game_time}")
+        # Начало игры (фаза пряток)
+        plan.append(("game_start", game_time, {}, self.start_game, [game_id]))
         
-        # Планируем предупреждение за 5 минут до конца пряток
+        # Предупреждение за 5 минут до конца пряток
         hiding_warning_time = game_time + timedelta(minutes=self.hiding_time - self.hiding_warning_time)
-        if hiding_warning_time > current_time:
-            warning_event = EventPersistenceService.save_event(
-                game_id=game_id,
-                event_type="hiding_warning",
-                scheduled_at=hiding_warning_time.replace(tzinfo=None),
-                event_data={"warning_minutes": self.hiding_warning_time}
-            )
-            
-            if warning_event:
-                self.scheduler.add_job(
-                    self.send_hiding_warning,
-                    trigger=DateTrigger(run_date=hiding_warning_time),
-                    args=[game_id, warning_event.id],
-                    id=warning_event.job_id,
-                    replace_existing=True
-                )
-                
-                logger.info(f"Запланировано предупреждение о конце пряток для игры {game_id}: {hiding_warning_time}")
+        plan.append(("hiding_warning", hiding_warning_time, {"warning_minutes": self.hiding_warning_time},
+                     self.send_hiding_warning, [game_id]))
         
-        # Планируем окончание фазы пряток (начало поиска)
+        # Окончание фазы пряток (начало поиска)
         hiding_end_time = game_time + timedelta(minutes=self.hiding_time)
-        if hiding_end_time > current_time:
-            hiding_event = EventPersistenceService.save_event(
-                game_id=game_id,
-                event_type="hiding_phase_end",
-                scheduled_at=hiding_end_time.replace(tzinfo=None),  # Убираем timezone для БД
-                event_data={"hiding_time": self.hiding_time}
-            )
-            
-            if hiding_event:
-                self.scheduler.add_job(
-                    self.end_hiding_phase,
-                    trigger=DateTrigger(run_date=hiding_end_time),
-                    args=[game_id, hiding_event.id],
-                    id=hiding_event.job_id,
-                    replace_existing=True
-                )
-                
-                logger.info(f"Запланировано окончание пряток для игры {game_id}: {hiding_end_time}")
+        plan.append(("hiding_phase_end", hiding_end_time, {"hiding_time": self.hiding_time},
+                     self.end_hiding_phase, [game_id]))
+        
+        plan = [entry for entry in plan if entry[1] > current_time]
+        
+        # Все события игры сохраняются одним запросом (время в БД без timezone)
+        events = EventPersistenceService.save_events(game_id, [
+            PlannedEvent(event_type, run_time.replace(tzinfo=None), event_data)
+            for event_type, run_time, event_data, _, _ in plan
+        ])
+        saved = {(event.event_type, event.scheduled_at): event for event in events}
+        
+        for event_type, run_time, _, func, args in plan:
+            event = saved.get((event_type, run_time.replace(tzinfo=None)))
+            # События за пределами окна станут задачами при его пополнении
+            if event and self._in_event_window(run_time):
+                self._add_game_job(game_id, event.job_id, func, run_time, args + [event.id],
+                                   misfire_grace_time=misfire_grace(event_type))
+                logger.info(f"Запланировано событие {event_type} для игры {game_id}: {run_time}")
+
+    def _add_game_job(self, game_id: int, job_id: str, func, run_date: datetime, args: list,
+                      misfire_grace_time: int = 1) -> Job:
+        """Запланировать разовую задачу игры и записать ее в индекс задач игры"""
+        job = self.scheduler.add_job(
+            func,
+            trigger=DateTrigger(run_date=run_date),
+            args=args,
+            id=job_id,
+            replace_existing=True,
+            misfire_grace_time=misfire_grace_time
+        )
+        with self._jobs_lock:
+            self._game_jobs.setdefault(game_id, set()).add(job_id)
+            self._job_games[job_id] = game_id
+        return job
+
+    def _on_job_missed(self, event) -> None:
+        """Задача игры опоздала больше допустимого (цикл событий был занят) и не выполнилась"""
+        # id задачи события: "{тип}_{игра}_{событие}"
+        event_type = event.job_id.rsplit("_", 2)[0]
+        if event_type not in MISFIRE_GRACE and not event_type.startswith("reminder_"):
+            return
+        lateness = (datetime.now(DEFAULT_TIMEZONE) - event.scheduled_run_time).total_seconds()
+        report_misfire(event_type, "expired", lateness)
+        logger.warning(f"Задача {event.job_id} пропущена: опоздание {lateness:.0f} сек")
+
+    def _on_job_removed(self, event) -> None:
+        """Планировщик удалил задачу: выполненную разовую или отмененную"""
+        self._forget_job(event.job_id)
+
+    def _forget_job(self, job_id: str) -> None:
+        """Убрать задачу из индекса задач игры"""
+        with self._jobs_lock:
+            game_id = self._job_games.pop(job_id, None)
+            if game_id is None:
+                return
+            job_ids = self._game_jobs.get(game_id)
+            if job_ids is not None:
+                job_ids.discard(job_id)
+                if not job_ids:
+                    del self._game_jobs[game_id]
+
+    def get_game_jobs(self, game_id: int) -> List[Job]:
+        """Запланированные задачи игры"""
+        with self._jobs_lock:
+            job_ids = sorted(self._game_jobs.get(game_id, ()))
+        jobs = (self.scheduler.get_job(job_id) for job_id in job_ids)
+        return [job for job in jobs if job is not None]
 
     def cancel_game_jobs(self, game_id: int):
         """Отмена всех задач для игры"""
-        jobs_to_remove = []
-        
-        # Находим все задачи для данной игры
-        for job in self.scheduler.get_jobs():
-            if str(game_id) in job.id:
-                jobs_to_remove.append(job.id)
+        with self._jobs_lock:
+            jobs_to_remove = list(self._game_jobs.get(game_id, ()))
         
         # Удаляем задачи из планировщика
         for job_id in jobs_to_remove:
             try:
                 self.scheduler.remove_job(job_id)
                 logger.info(f"Отменена задача {job_id} для игры {game_id}")
+            except JobLookupError:
+                # Задача уже выполнилась и удалена планировщиком
+                self._forget_job(job_id)
             except Exception as e:
                 logger.error(f"Ошибка отмены задачи {job_id}: {e}")
         
@@ -282,6 +476,13 @@ class EnhancedSchedulerService:
         except Exception as e:
             logger.error(f"Ошибка отмены событий в БД для игры {game_id}: {e}")
     
+    async def reconcile_game_counters(self):
+        """Исправление расхождений денормализованных счетчиков участников игр"""
+        try:
+            await run_db(GameService.reconcile_counters)
+        except Exception as e:
+            logger.error(f"Ошибка сверки счетчиков участников игр: {e}")
+    
     def get_scheduled_events_info(self) -> dict:
         """Получение информации о запланированных событиях"""
         try:
@@ -321,6 +522,7 @@ class EnhancedSchedulerService:
                 'scheduler_jobs': 0
             }
     
+    @claimed_event
     async def send_game_reminder(self, game_id: int, minutes_before: int, event_id: Optional[int] = None):
         """Отправка напоминания о игре"""
         try:
@@ -344,51 +546,27 @@ class EnhancedSchedulerService:
                 reminder_text += f"До начала осталось: <b>{minutes_before} минут</b>"
             
             # Отправляем напоминание всем участникам
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=reminder_text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка отправки напоминания пользователю {user.telegram_id}: {e}")
+            result = await self._broadcast_to_participants(game, "game_reminder", lambda participant: reminder_text)
             
             # Уведомляем админов
-            admins = UserService.get_admin_users()
-            for admin in admins:
-                try:
-                    admin_text = (
-                        f"👨‍💼 <b>Админ-уведомление: Напоминание отправлено</b>\n\n"
-                        f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
-                        f"⏰ <b>Время:</b> {self.format_msk_datetime(game.scheduled_at)}\n"
-                        f"👥 <b>Участников:</b> {len(game.participants)}\n\n"
-                        f"📊 Отправлено напоминаний: {sent_count}"
-                    )
-                    
-                    await self.bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=admin_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.error(f"Ошибка уведомления админа {admin.telegram_id}: {e}")
+            admin_text = (
+                f"👨‍💼 <b>Админ-уведомление: Напоминание отправлено</b>\n\n"
+                f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
+                f"⏰ <b>Время:</b> {self.format_msk_datetime(game.scheduled_at)}\n"
+                f"👥 <b>Участников:</b> {len(game.participants)}\n\n"
+                f"📊 Отправлено напоминаний: {result.sent}"
+            )
+            await self._broadcast_to_admins("game_reminder_admins", admin_text)
             
-            logger.info(f"Отправлены напоминания для игры {game_id} ({sent_count} участников)")
+            logger.info(f"Отправлены напоминания для игры {game_id} ({result.sent} участников)")
             
         except Exception as e:
             logger.error(f"Ошибка отправки напоминания для игры {game_id}: {e}")
     
+    @claimed_event
     async def start_game(self, game_id: int, event_id: int, start_type: str = "auto"):
         """Запуск игры с уведомлениями - начинает фазу пряток"""
         try:
-            # Отмечаем событие как выполненное
-            EventPersistenceService.mark_event_executed(event_id)
-            
             game = GameService.get_game_by_id(game_id)
             if not game:
                 logger.error(f"Игра {game_id} не найдена при запуске")
@@ -401,16 +579,15 @@ class EnhancedSchedulerService:
             # Проверяем количество участников
             if len(game.participants) < 2:
                 # Недостаточно участников - отменяем игру
+                # Уведомление об отмене ставится в очередь вместе со сменой статуса
                 GameService.cancel_game(game_id, "Недостаточно участников")
-                await self.notify_game_cancelled(game_id, "Недостаточно участников")
                 return
             
             # Распределяем роли
             GameService.assign_roles(game_id)
             
             # Запускаем игру (переводим в фазу пряток)
-            if GameService._start_game_internal(game_id):
-                await self.notify_game_started(game_id, start_type)
+            if GameService._start_game_internal(game_id, start_type):
                 logger.info(f"Игра {game_id} запущена - фаза пряток началась ({start_type})")
             else:
                 logger.error(f"Ошибка запуска игры {game_id}")
@@ -418,12 +595,10 @@ class EnhancedSchedulerService:
         except Exception as e:
             logger.error(f"Ошибка запуска игры {game_id}: {e}")
     
+    @claimed_event
     async def send_hiding_warning(self, game_id: int, event_id: int):
         """Отправка предупреждения за 5 минут до конца пряток"""
         try:
-            # Отмечаем событие как выполненное
-            EventPersistenceService.mark_event_executed(event_id)
-            
             game = GameService.get_game_by_id(game_id)
             if not game or game.status != GameStatus.HIDING_PHASE:
                 logger.info(f"Игра {game_id} не в фазе пряток, пропускаем предупреждение")
@@ -442,17 +617,12 @@ class EnhancedSchedulerService:
                     f"📸 Срочно отправьте фотографию, иначе вы будете дисквалифицированы."
                 )
                 
+                messages = []
                 for driver in not_hidden_drivers:
                     user, _ = UserService.get_user_by_id(driver.user_id)
                     if user:
-                        try:
-                            await self.bot.send_message(
-                                chat_id=user.telegram_id,
-                                text=warning_text,
-                                parse_mode="HTML"
-                            )
-                        except Exception as e:
-                            logger.error(f"Ошибка отправки предупреждения водителю {user.telegram_id}: {e}")
+                        messages.append(BroadcastMessage(user.telegram_id, warning_text, {"parse_mode": "HTML"}))
+                await broadcast(self.bot, messages, "hiding_warning")
                 
                 # Уведомляем админов о статистике
                 await self.notify_admins_hiding_stats(game_id, not_hidden_drivers)
@@ -502,25 +672,19 @@ class EnhancedSchedulerService:
                     f"⏰ <b>Осталось времени:</b> {self.hiding_warning_time} минут"
                 )
             
-            for admin in admins:
-                try:
-                    await self.bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=stats_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.error(f"Ошибка отправки статистики админу {admin.telegram_id}: {e}")
+            await broadcast(
+                self.bot,
+                [BroadcastMessage(admin.telegram_id, stats_text, {"parse_mode": "HTML"}) for admin in admins],
+                "hiding_stats_admins"
+            )
                     
         except Exception as e:
             logger.error(f"Ошибка уведомления админов о статистике: {e}")
     
+    @claimed_event
     async def end_hiding_phase(self, game_id: int, event_id: int):
         """Завершение фазы прятки - переход к фазе поиска"""
         try:
-            # Отмечаем событие как выполненное
-            EventPersistenceService.mark_event_executed(event_id)
-            
             game = GameService.get_game_by_id(game_id)
             if not game or game.status != GameStatus.HIDING_PHASE:
                 logger.info(f"Игра {game_id} не в фазе пряток, пропускаем завершение прятки")
@@ -547,61 +711,60 @@ class EnhancedSchedulerService:
                 f"📸 Отправляйте фотографии найденных машин с указанием водителя."
             )
             
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        if participant.role == GameRole.DRIVER:
-                            text = drivers_text
-                        else:
-                            text = seekers_text
-                        
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления об окончании пряток пользователю {user.telegram_id}: {e}")
-            
-            logger.info(f"Завершена фаза пряток для игры {game_id}, начата фаза поиска ({sent_count} уведомлений)")
+            result = await self._broadcast_to_participants(
+                game, "hiding_phase_ended",
+                lambda participant: drivers_text if participant.role == GameRole.DRIVER else seekers_text
+            )
+            
+            logger.info(f"Завершена фаза пряток для игры {game_id}, начата фаза поиска ({result.sent} уведомлений)")
             
         except Exception as e:
             logger.error(f"Ошибка завершения фазы пряток для игры {game_id}: {e}")
     
+    @claimed_event
     async def end_search_phase(self, game_id: int, event_id: int):
         """Завершение фазы поиска (автоматическое завершение игры)"""
         try:
-            # Отмечаем событие как выполненное
-            EventPersistenceService.mark_event_executed(event_id)
-            
             game = GameService.get_game_by_id(game_id)
             if not game or game.status != GameStatus.SEARCHING_PHASE:
                 logger.info(f"Игра {game_id} не в фазе поиска, пропускаем завершение поиска")
                 return
             
             # Завершаем игру принудительно
-            if GameService.end_game(game_id):
-                await self.notify_game_ended(game_id, "Время истекло")
+            if GameService.end_game(game_id, "Время истекло"):
                 logger.info(f"Игра {game_id} автоматически завершена по времени")
             
         except Exception as e:
             logger.error(f"Ошибка завершения поиска для игры {game_id}: {e}")
     
+    @claimed_event
     async def cleanup_game(self, game_id: int, event_id: int):
         """Очистка данных игры"""
         try:
-            # Отмечаем событие как выполненное
-            EventPersistenceService.mark_event_executed(event_id)
-            
             # Здесь можно добавить логику очистки старых данных игры
             logger.info(f"Очистка данных для игры {game_id}")
             
         except Exception as e:
             logger.error(f"Ошибка очистки данных игры {game_id}: {e}")
     
+    def render_notification(self, kind: str, game_id: int, payload: dict) -> List[BroadcastMessage]:
+        """Сообщения рассылки по игре из очереди уведомлений"""
+        renderers = {
+            "game_started": self._render_game_started,
+            "game_cancelled": self._render_game_cancelled,
+            "searching_phase_started": self._render_searching_phase_started,
+            "game_ended": self._render_game_ended,
+        }
+        renderer = renderers.get(kind)
+        if renderer is None:
+            logger.error(f"Неизвестный вид уведомления {kind} для игры {game_id}")
+            return []
+        
+        game = GameService.get_game_by_id(game_id)
+        if not game:
+            return []
+        return renderer(game, **payload)
+    
     async def notify_game_started(self, game_id: int, start_type: str = "auto"):
         """Уведомление о начале фазы пряток"""
         try:
@@ -609,88 +772,67 @@ class EnhancedSchedulerService:
             if not game:
                 return
             
-            # Формируем текст в зависимости от типа запуска
-            if start_type == "auto":
-                start_text = f"🚀 <b>Игра началась автоматически!</b>\n\n"
-            elif start_type == "manual":
-                start_text = f"🚀 <b>Игра запущена администратором!</b>\n\n"
-            elif start_type == "early":
-                start_text = f"⚡ <b>Игра начинается досрочно!</b>\n\n"
-            else:
-                start_text = f"🚀 <b>Игра началась!</b>\n\n"
+            result = await broadcast(self.bot, self._render_game_started(game, start_type), "game_started")
             
-            current_time = datetime.now(DEFAULT_TIMEZONE)
-            
-            start_text += (
-                f"🎮 <b>Игра:</b> {game.district}\n"
-                f"⏰ <b>Время начала:</b> {self.format_msk_time(current_time)}\n\n"
-                f"🏁 <b>Фаза пряток началась!</b>\n\n"
-            )
-            
-            # Уведомляем водителей
-            drivers_text = start_text + (
-                f"🚗 <b>Ваша роль: Водитель</b>\n\n"
-                f"У вас есть {self.hiding_time} минут на то, чтобы спрятаться!\n"
-                f"📸 <b>ОБЯЗАТЕЛЬНО отправьте фото места пряток в бот!</b>\n"
-                f"📍 Можете также отправить геолокацию.\n\n"
-                f"⚠️ За {self.hiding_warning_time} минут до конца получите предупреждение."
-            )
-            
-            # Уведомляем искателей
-            seekers_text = start_text + (
-                f"🔍 <b>Ваша роль: Искатель</b>\n\n"
-                f"Водители прячутся {self.hiding_time} минут.\n"
-                f"⏰ Фаза поиска начнется в {self.format_msk_time(current_time + timedelta(minutes=self.hiding_time))}\n\n"
-                f"🚧 <b>Пожалуйста, не подглядывайте за водителями!</b>\n"
-                f"Для честной игры не следите за водителями во время пряток."
-            )
-            
-            # Отправляем уведомления участникам
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        if participant.role == GameRole.DRIVER:
-                            text = drivers_text
-                        else:
-                            text = seekers_text
-                        
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления о старте пользователю {user.telegram_id}: {e}")
-            
-            # Уведомляем админов
-            admins = UserService.get_admin_users()
-            for admin in admins:
-                try:
-                    admin_text = (
-                        f"👨‍💼 <b>Админ-уведомление: Игра началась!</b>\n\n"
-                        f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
-                        f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n"
-                        f"👥 <b>Участников:</b> {len(game.participants)}\n"
-                        f"🚗 <b>Водителей:</b> {sum(1 for p in game.participants if p.role == GameRole.DRIVER)}\n\n"
-                        f"📊 Отправлено уведомлений: {sent_count}"
-                    )
-                    
-                    await self.bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=admin_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.error(f"Ошибка уведомления админа {admin.telegram_id}: {e}")
-            
-            logger.info(f"Отправлены уведомления о начале игры для игры {game_id} ({sent_count} участников)")
+            logger.info(f"Отправлены уведомления о начале игры для игры {game_id} ({result.sent} сообщений)")
             
         except Exception as e:
             logger.error(f"Ошибка уведомления о начале игры {game_id}: {e}")
     
+    def _render_game_started(self, game: Game, start_type: str = "auto") -> List[BroadcastMessage]:
+        """Сообщения участникам и админам о начале фазы пряток"""
+        # Формируем текст в зависимости от типа запуска
+        if start_type == "auto":
+            start_text = f"🚀 <b>Игра началась автоматически!</b>\n\n"
+        elif start_type == "manual":
+            start_text = f"🚀 <b>Игра запущена администратором!</b>\n\n"
+        elif start_type == "early":
+            start_text = f"⚡ <b>Игра начинается досрочно!</b>\n\n"
+        else:
+            start_text = f"🚀 <b>Игра началась!</b>\n\n"
+        
+        # Время берется из игры: рассылка может уйти позже старта (очередь, повторы)
+        started_at = game.started_at or datetime.now()
+        
+        start_text += (
+            f"🎮 <b>Игра:</b> {game.district}\n"
+            f"⏰ <b>Время начала:</b> {self.format_msk_time(started_at)}\n\n"
+            f"🏁 <b>Фаза пряток началась!</b>\n\n"
+        )
+        
+        # Уведомляем водителей
+        drivers_text = start_text + (
+            f"🚗 <b>Ваша роль: Водитель</b>\n\n"
+            f"У вас есть {self.hiding_time} минут на то, чтобы спрятаться!\n"
+            f"📸 <b>ОБЯЗАТЕЛЬНО отправьте фото места пряток в бот!</b>\n"
+            f"📍 Можете также отправить геолокацию.\n\n"
+            f"⚠️ За {self.hiding_warning_time} минут до конца получите предупреждение."
+        )
+        
+        # Уведомляем искателей
+        seekers_text = start_text + (
+            f"🔍 <b>Ваша роль: Искатель</b>\n\n"
+            f"Водители прячутся {self.hiding_time} минут.\n"
+            f"⏰ Фаза поиска начнется в {self.format_msk_time(started_at + timedelta(minutes=self.hiding_time))}\n\n"
+            f"🚧 <b>Пожалуйста, не подглядывайте за водителями!</b>\n"
+            f"Для честной игры не следите за водителями во время пряток."
+        )
+        
+        messages = self._participant_messages(
+            game, lambda participant: drivers_text if participant.role == GameRole.DRIVER else seekers_text
+        )
+        
+        # Уведомляем админов
+        admin_text = (
+            f"👨‍💼 <b>Админ-уведомление: Игра началась!</b>\n\n"
+            f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
+            f"⏰ <b>Время:</b> {self.format_msk_time(started_at)}\n"
+            f"👥 <b>Участников:</b> {len(game.participants)}\n"
+            f"🚗 <b>Водителей:</b> {sum(1 for p in game.participants if p.role == GameRole.DRIVER)}\n\n"
+            f"📊 Уведомлений участникам: {len(messages)}"
+        )
+        return messages + self._admin_messages(admin_text)
+    
     async def notify_game_cancelled(self, game_id: int, reason: str):
         """Уведомление об отмене игры"""
         try:
@@ -698,33 +840,24 @@ class EnhancedSchedulerService:
             if not game:
                 return
             
-            cancel_text = (
-                f"❌ <b>Игра отменена</b>\n\n"
-                f"🎮 <b>Игра:</b> {game.district}\n"
-                f"⏰ <b>Время:</b> {game.scheduled_at.strftime('%d.%m.%Y в %H:%M')}\n\n"
-                f"<b>Причина:</b> {reason}\n\n"
-                f"Извините за неудобства. Следите за новыми играми!"
-            )
+            result = await broadcast(self.bot, self._render_game_cancelled(game, reason), "game_cancelled")
             
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=cancel_text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления об отмене игры пользователю {user.telegram_id}: {e}")
-            
-            logger.info(f"Отправлены уведомления об отмене игры {game_id} ({sent_count} участников)")
+            logger.info(f"Отправлены уведомления об отмене игры {game_id} ({result.sent} участников)")
             
         except Exception as e:
             logger.error(f"Ошибка уведомления об отмене игры {game_id}: {e}")
     
+    def _render_game_cancelled(self, game: Game, reason: str) -> List[BroadcastMessage]:
+        """Сообщения участникам об отмене игры"""
+        cancel_text = (
+            f"❌ <b>Игра отменена</b>\n\n"
+            f"🎮 <b>Игра:</b> {game.district}\n"
+            f"⏰ <b>Время:</b> {game.scheduled_at.strftime('%d.%m.%Y в %H:%M')}\n\n"
+            f"<b>Причина:</b> {reason}\n\n"
+            f"Извините за неудобства. Следите за новыми играми!"
+        )
+        return self._participant_messages(game, lambda participant: cancel_text)
+    
     async def notify_searching_phase_started(self, game_id: int):
         """Уведомление о начале фазы поиска"""
         try:
@@ -732,95 +865,79 @@ class EnhancedSchedulerService:
             if not game:
                 return
             
-            # Проверяем, все ли водители спрятались
-            hiding_stats = GameService.get_hiding_stats(game_id)
-            all_hidden = hiding_stats.get('all_hidden', False)
+            result = await broadcast(self.bot, self._render_searching_phase_started(game), "searching_phase_started")
             
-            current_time = datetime.now(DEFAULT_TIMEZONE)
-            
-            # Формируем текст уведомления
-            if all_hidden:
-                phase_text = (
-                    f"🔍 <b>Фаза поиска началась!</b>\n\n"
-                    f"🎮 <b>Игра:</b> {game.district}\n"
-                    f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n\n"
-                    f"✅ <b>Все водители спрятались!</b>\n"
-                    f"🚗 Водителей: {hiding_stats['total_drivers']}\n\n"
-                )
-            else:
-                not_hidden_count = hiding_stats.get('not_hidden_count', 0)
-                phase_text = (
-                    f"🔍 <b>Фаза поиска началась!</b>\n\n"
-                    f"🎮 <b>Игра:</b> {game.district}\n"
-                    f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n\n"
-                    f"⚠️ <b>Внимание!</b> {not_hidden_count} водителей не успели спрятаться.\n\n"
-                )
-            
-            # Разные тексты для водителей и искателей
-            drivers_text = phase_text + (
-                f"🚗 <b>Инструкции для водителей:</b>\n"
-                f"• Оставайтесь в своем месте пряток\n"
-                f"• Подтверждайте находку кнопкой 'Меня нашли'\n"
-                f"• Можете отправлять дополнительные фото\n\n"
-                f"Удачной игры! Пусть вас не найдут 😉"
-            )
-            
-            seekers_text = phase_text + (
-                f"🔍 <b>Инструкции для искателей:</b>\n"
-                f"• Ищите спрятанные машины\n"
-                f"• Отправляйте фото найденных машин\n"
-                f"• Используйте кнопку 'Я нашел водителя'\n"
-                f"• Координируйтесь с другими искателями\n\n"
-                f"Удачной охоты! 🕵️‍♂️"
-            )
-            
-            # Отправляем уведомления участникам
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        if participant.role == GameRole.DRIVER:
-                            text = drivers_text
-                        else:
-                            text = seekers_text
-                        
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления о начале поиска пользователю {user.telegram_id}: {e}")
-            
-            # Уведомляем админов
-            admins = UserService.get_admin_users()
-            for admin in admins:
-                try:
-                    admin_text = (
-                        f"👨‍💼 <b>Админ-уведомление: Началась фаза поиска</b>\n\n"
-                        f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
-                        f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n"
-                        f"🚗 <b>Водителей:</b> {hiding_stats['total_drivers']}\n"
-                        f"✅ <b>Спрятались:</b> {hiding_stats['hidden_count']}\n"
-                        f"❌ <b>Не спрятались:</b> {hiding_stats['not_hidden_count']}\n\n"
-                        f"📊 Отправлено уведомлений: {sent_count}"
-                    )
-                    
-                    await self.bot.send_message(
-                        chat_id=admin.telegram_id,
-                        text=admin_text,
-                        parse_mode="HTML"
-                    )
-                except Exception as e:
-                    logger.error(f"Ошибка уведомления админа {admin.telegram_id} о начале поиска: {e}")
-            
-            logger.info(f"Отправлены уведомления о начале фазы поиска для игры {game_id} ({sent_count} участников)")
+            logger.info(f"Отправлены уведомления о начале фазы поиска для игры {game_id} ({result.sent} сообщений)")
             
         except Exception as e:
             logger.error(f"Ошибка уведомления о начале фазы поиска для игры {game_id}: {e}")
     
+    def _render_searching_phase_started(self, game: Game, searching_started_at: Optional[str] = None) -> List[BroadcastMessage]:
+        """
+        Сообщения участникам и админам о начале фазы поиска.
+        searching_started_at - время смены фазы (ISO), сохраненное вместе с уведомлением
+        """
+        # Проверяем, все ли водители спрятались
+        hiding_stats = GameService.get_hiding_stats(game.id)
+        all_hidden = hiding_stats.get('all_hidden', False)
+        
+        if searching_started_at:
+            current_time = datetime.fromisoformat(searching_started_at)
+        else:
+            current_time = datetime.now(DEFAULT_TIMEZONE)
+        
+        # Формируем текст уведомления
+        if all_hidden:
+            phase_text = (
+                f"🔍 <b>Фаза поиска началась!</b>\n\n"
+                f"🎮 <b>Игра:</b> {game.district}\n"
+                f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n\n"
+                f"✅ <b>Все водители спрятались!</b>\n"
+                f"🚗 Водителей: {hiding_stats['total_drivers']}\n\n"
+            )
+        else:
+            not_hidden_count = hiding_stats.get('not_hidden_count', 0)
+            phase_text = (
+                f"🔍 <b>Фаза поиска началась!</b>\n\n"
+                f"🎮 <b>Игра:</b> {game.district}\n"
+                f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n\n"
+                f"⚠️ <b>Внимание!</b> {not_hidden_count} водителей не успели спрятаться.\n\n"
+            )
+        
+        # Разные тексты для водителей и искателей
+        drivers_text = phase_text + (
+            f"🚗 <b>Инструкции для водителей:</b>\n"
+            f"• Оставайтесь в своем месте пряток\n"
+            f"• Подтверждайте находку кнопкой 'Меня нашли'\n"
+            f"• Можете отправлять дополнительные фото\n\n"
+            f"Удачной игры! Пусть вас не найдут 😉"
+        )
+        
+        seekers_text = phase_text + (
+            f"🔍 <b>Инструкции для искателей:</b>\n"
+            f"• Ищите спрятанные машины\n"
+            f"• Отправляйте фото найденных машин\n"
+            f"• Используйте кнопку 'Я нашел водителя'\n"
+            f"• Координируйтесь с другими искателями\n\n"
+            f"Удачной охоты! 🕵️‍♂️"
+        )
+        
+        messages = self._participant_messages(
+            game, lambda participant: drivers_text if participant.role == GameRole.DRIVER else seekers_text
+        )
+        
+        # Уведомляем админов
+        admin_text = (
+            f"👨‍💼 <b>Админ-уведомление: Началась фаза поиска</b>\n\n"
+            f"🎮 <b>Игра:</b> {game.district} (ID: {game.id})\n"
+            f"⏰ <b>Время:</b> {self.format_msk_time(current_time)}\n"
+            f"🚗 <b>Водителей:</b> {hiding_stats['total_drivers']}\n"
+            f"✅ <b>Спрятались:</b> {hiding_stats['hidden_count']}\n"
+            f"❌ <b>Не спрятались:</b> {hiding_stats['not_hidden_count']}\n\n"
+            f"📊 Уведомлений участникам: {len(messages)}"
+        )
+        return messages + self._admin_messages(admin_text)
+    
     async def notify_game_ended(self, game_id: int, reason: str):
         """Уведомление о завершении игры"""
         try:
@@ -828,67 +945,80 @@ class EnhancedSchedulerService:
             if not game:
                 return
             
-            end_text = (
-                f"🏁 <b>Игра завершена!</b>\n\n"
-                f"🎮 <b>Игра:</b> {game.district}\n"
-                f"⏰ <b>Время завершения:</b> {self.format_msk_time(datetime.now(DEFAULT_TIMEZONE))}\n\n"
-                f"<b>Причина:</b> {reason}\n\n"
-                f"Спасибо за участие! До встречи в новых играх! 🎉"
-            )
+            result = await broadcast(self.bot, self._render_game_ended(game, reason), "game_ended")
             
-            sent_count = 0
-            for participant in game.participants:
-                user, _ = UserService.get_user_by_id(participant.user_id)
-                if user:
-                    try:
-                        await self.bot.send_message(
-                            chat_id=user.telegram_id,
-                            text=end_text,
-                            parse_mode="HTML"
-                        )
-                        sent_count += 1
-                    except Exception as e:
-                        logger.error(f"Ошибка уведомления о завершении игры пользователю {user.telegram_id}: {e}")
-            
-            logger.info(f"Отправлены уведомления о завершении игры {game_id} ({sent_count} участников)")
+            logger.info(f"Отправлены уведомления о завершении игры {game_id} ({result.sent} участников)")
             
         except Exception as e:
             logger.error(f"Ошибка уведомления о завершении игры {game_id}: {e}")
+    
+    def _render_game_ended(self, game: Game, reason: str) -> List[BroadcastMessage]:
+        """Сообщения участникам о завершении игры"""
+        end_text = (
+            f"🏁 <b>Игра завершена!</b>\n\n"
+            f"🎮 <b>Игра:</b> {game.district}\n"
+            f"⏰ <b>Время завершения:</b> {self.format_msk_time(game.ended_at or datetime.now())}\n\n"
+            f"<b>Причина:</b> {reason}\n\n"
+            f"Спасибо за участие! До встречи в новых играх! 🎉"
+        )
+        return self._participant_messages(game, lambda participant: end_text)
 
+    def _participant_messages(self, game: Game, text_for) -> List[BroadcastMessage]:
+        """Сообщения участникам игры; text_for(participant) возвращает текст для участника"""
+        return [
+            BroadcastMessage(participant.user.telegram_id, text_for(participant), {"parse_mode": "HTML"})
+            for participant in game.participants
+            if participant.user
+        ]
+    
+    def _admin_messages(self, text: str) -> List[BroadcastMessage]:
+        """Сообщения всем администраторам"""
+        return [BroadcastMessage(admin.telegram_id, text, {"parse_mode": "HTML"}) for admin in UserService.get_admin_users()]
+    
+    async def _broadcast_to_participants(self, game: Game, name: str, text_for) -> BroadcastResult:
+        """Рассылка участникам игры; text_for(participant) возвращает текст для участника"""
+        return await broadcast(self.bot, self._participant_messages(game, text_for), name)
+    
+    async def _broadcast_to_admins(self, name: str, text: str) -> BroadcastResult:
+        """Рассылка всем администраторам"""
+        return await broadcast(self.bot, self._admin_messages(text), name)
+    
     async def send_keyboard_updates(self, user_ids: list, game_id: int):
-        """Отправка обновлений клавиатур пользователям - выполняется планировщиком"""
+        """
+        Отправка обновлений клавиатур пользователям - выполняется планировщиком.
+        Чаты, в которые уже отправлена такая же клавиатура, пропускаются
+        """
         try:
             logger.info(f"🚀 Начинаем отправку обновлений клавиатур для {len(user_ids)} пользователей игры {game_id}")
             
-            sent_count = 0
+            from src.services.dynamic_keyboard_service import DynamicKeyboardService
+            from src.services.user_context_service import UserContextService
+            
+            # Контексты всех участников загружаются вместе, а не запросом на каждого
+            snapshots = UserContextService.get_context_snapshots(user_ids)
+            
+            messages = []
             for user_id in user_ids:
                 try:
-                    logger.info(f"Обрабатываем пользователя {user_id}")
-                    
-                    # Получаем актуальную клавиатуру для пользователя
-                    from src.keyboards.reply import get_contextual_main_keyboard
-                    keyboard = get_contextual_main_keyboard(user_id)
-                    logger.info(f"Получена клавиатура для пользователя {user_id}: {len(keyboard.keyboard)} рядов")
-                    
-                    # Отправляем сообщение с новой клавиатурой
-                    logger.info(f"Отправляем сообщение пользователю {user_id}")
-                    message = await self.bot.send_message(
-                        chat_id=user_id,
-                        text="🔄 <b>Игра началась или изменила статус!</b>\n\nОбновляем вашу клавиатуру для доступа к игровым функциям.",
-                        reply_markup=keyboard,
-                        parse_mode="HTML"
-                    )
-                    logger.info(f"Сообщение отправлено пользователю {user_id}, message_id: {message.message_id}")
-                    sent_count += 1
-                    
-                    # Небольшая задержка между сообщениями
-                    await asyncio.sleep(0.1)
+                    key = DynamicKeyboardService.get_keyboard_key(snapshots[user_id], UserService.is_admin(user_id))
+                    if await DynamicKeyboardService.is_keyboard_sent_async(user_id, key):
+                        continue
+                    messages.append(BroadcastMessage(
+                        user_id,
+                        "🔄 <b>Игра началась или изменила статус!</b>\n\nОбновляем вашу клавиатуру для доступа к игровым функциям.",
+                        {"reply_markup": DynamicKeyboardService.get_keyboard_for_chat(user_id, key), "parse_mode": "HTML"}
+                    ))
                 except Exception as e:
-                    logger.error(f"Ошибка при отправке обновления клавиатуры пользователю {user_id}: {e}")
-                    import traceback
-                    logger.error(f"Трейс ошибки для пользователя {user_id}: {traceback.format_exc()}")
+                    logger.error(f"Ошибка при получении клавиатуры пользователя {user_id}: {e}")
             
-            logger.info(f"✅ Отправлены обновления клавиатур {sent_count}/{len(user_ids)} пользователям игры {game_id}")
+            # Отправки идут одновременно в пределах лимитов Telegram, без пауз между сообщениями;
+            # доставленные клавиатуры запоминает DynamicKeyboardService.track_sent_reply_markup
+            result = await broadcast(self.bot, messages, "keyboard_updates")
+            
+            logger.info(
+                f"✅ Отправлены обновления клавиатур {result.sent}/{len(user_ids)} пользователям игры {game_id} "
+                f"(без изменений: {len(user_ids) - len(messages)})"
+            )
             
         except Exception as e:
             logger.error(f"❌ Ошибка при отправке обновлений клавиатур игры {game_id}: {e}")
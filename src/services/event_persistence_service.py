@@ -1,12 +1,29 @@
+import os
+import socket
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, NamedTuple, Optional, Dict, Any
 from loguru import logger
+from sqlalchemy import or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from src.models.base import get_db
 from src.models.scheduled_event import ScheduledEvent, EventType
 from src.models.game import Game, GameStatus
 
+# Имя экземпляра бота в захваченных событиях (по умолчанию хост и PID)
+SCHEDULER_INSTANCE_ID = os.getenv("SCHEDULER_INSTANCE_ID") or f"{socket.gethostname()}:{os.getpid()}"
+# Срок аренды захваченного события (сек): продлевается, пока событие выполняется
+SCHEDULER_EVENT_LEASE = int(os.getenv("SCHEDULER_EVENT_LEASE", "120"))
+
+
+class PlannedEvent(NamedTuple):
+    """Событие игры, которое нужно сохранить"""
+    event_type: str
+    scheduled_at: datetime  # без временной зоны, как хранится в БД
+    event_data: Dict[str, Any]
+
 
 class EventPersistenceService:
     """Сервис для управления персистентными событиями планировщика"""
@@ -57,16 +74,78 @@ class EventPersistenceService:
             return None
     
     @staticmethod
-    def get_pending_events() -> List[ScheduledEvent]:
-        """Получение всех невыполненных событий"""
+    def save_events(game_id: int, events: List[PlannedEvent]) -> List[ScheduledEvent]:
+        """
+        Сохранение плана событий игры одним запросом: уже существующие события
+        (та же игра, тип и время) не дублируются, а снова становятся ожидающими -
+        при возврате игры на прежнее время отмененные события оживают
+        """
+        if not events:
+            return []
         try:
             db_generator = get_db()
             db = next(db_generator)
             
             try:
-                events = db.query(ScheduledEvent).filter_by(
-                    is_executed=False
-                ).order_by(ScheduledEvent.scheduled_at).all()
+                # INSERT ... ON CONFLICT DO UPDATE по _game_event_time_uc; в плане только будущие
+                # события, поэтому выполненная строка с тем же временем - отмененная, а не отработавшая
+                insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else postgresql_insert
+                statement = insert(ScheduledEvent).values([
+                    {
+                        "game_id": game_id,
+                        "event_type": event.event_type,
+                        "scheduled_at": event.scheduled_at,
+                        "event_data": event.event_data or {},
+                        "is_executed": False,
+                        "created_at": datetime.now()
+                    }
+                    for event in events
+                ])
+                statement = statement.on_conflict_do_update(
+                    index_elements=["game_id", "event_type", "scheduled_at"],
+                    set_={
+                        "event_data": statement.excluded.event_data,
+                        "is_executed": False,
+                        "executed_at": None,
+                        "claimed_by": None,
+                        "claimed_until": None
+                    }
+                )
+                db.execute(statement)
+                db.commit()
+                
+                saved = db.query(ScheduledEvent).filter(
+                    ScheduledEvent.game_id == game_id,
+                    tuple_(ScheduledEvent.event_type, ScheduledEvent.scheduled_at).in_(
+                        [(event.event_type, event.scheduled_at) for event in events]
+                    )
+                ).all()
+                by_key = {(event.event_type, event.scheduled_at): event for event in saved}
+                
+                logger.info(f"Сохранено событий для игры {game_id}: {len(saved)}")
+                return [by_key[key] for key in ((event.event_type, event.scheduled_at) for event in events) if key in by_key]
+            finally:
+                db.close()
+                
+        except Exception as e:
+            logger.error(f"Ошибка сохранения событий игры {game_id}: {e}")
+            return []
+    
+    @staticmethod
+    def get_pending_events(since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[ScheduledEvent]:
+        """Получение невыполненных событий (в интервале [since, until), если он задан)"""
+        try:
+            db_generator = get_db()
+            db = next(db_generator)
+            
+            try:
+                # Диапазон по индексу ix_scheduled_events_executed_scheduled_at
+                query = db.query(ScheduledEvent).filter_by(is_executed=False)
+                if since is not None:
+                    query = query.filter(ScheduledEvent.scheduled_at >= since)
+                if until is not None:
+                    query = query.filter(ScheduledEvent.scheduled_at < until)
+                events = query.order_by(ScheduledEvent.scheduled_at).all()
                 
                 return events
             finally:
@@ -98,6 +177,71 @@ class EventPersistenceService:
             logger.error(f"Ошибка получения событий для игры {game_id}: {e}")
             return []
     
+    @staticmethod
+    def claim_event(event_id: int, owner: str = SCHEDULER_INSTANCE_ID, lease: int = SCHEDULER_EVENT_LEASE) -> bool:
+        """
+        Захват события для выполнения: True, если событие не выполнено
+        и его не держит другой экземпляр бота
+        """
+        try:
+            db_generator = get_db()
+            db = next(db_generator)
+            
+            try:
+                now = datetime.now()
+                claimable = (
+                    ScheduledEvent.id == event_id,
+                    ScheduledEvent.is_executed == False,
+                    or_(ScheduledEvent.claimed_until.is_(None), ScheduledEvent.claimed_until < now)
+                )
+                if db.get_bind().dialect.name == "postgresql":
+                    # Строку, которую прямо сейчас захватывает другой экземпляр, пропускаем без ожидания
+                    event = db.query(ScheduledEvent).filter(*claimable).with_for_update(skip_locked=True).first()
+                    if event is None:
+                        db.rollback()
+                        return False
+                    event.claimed_by = owner
+                    event.claimed_until = now + timedelta(seconds=lease)
+                    claimed = True
+                else:
+                    # SQLite выполняет записи по очереди: условный UPDATE атомарен
+                    claimed = db.query(ScheduledEvent).filter(*claimable).update(
+                        {"claimed_by": owner, "claimed_until": now + timedelta(seconds=lease)},
+                        synchronize_session=False
+                    ) == 1
+                db.commit()
+                return claimed
+            finally:
+                db.close()
+                
+        except Exception as e:
+            logger.error(f"Ошибка захвата события {event_id}: {e}")
+            return False
+    
+    @staticmethod
+    def extend_claim(event_id: int, owner: str = SCHEDULER_INSTANCE_ID, lease: int = SCHEDULER_EVENT_LEASE) -> bool:
+        """Продление аренды события, пока оно выполняется"""
+        try:
+            db_generator = get_db()
+            db = next(db_generator)
+            
+            try:
+                extended = db.query(ScheduledEvent).filter(
+                    ScheduledEvent.id == event_id,
+                    ScheduledEvent.claimed_by == owner
+                ).update(
+                    {"claimed_until": datetime.now() + timedelta(seconds=lease)},
+                    synchronize_session=False
+                ) == 1
+                db.commit()
+                return extended
+            finally:
+                db.close()
+                
+        except Exception as e:
+            logger.error(f"Ошибка продления аренды события {event_id}: {e}")
+            return False
+    
     @staticmethod
     def mark_event_executed(event_id: int) -> bool:
         """Отметка события как выполненного"""
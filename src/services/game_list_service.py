@@ -0,0 +1,113 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from loguru import logger
+from telegram import InlineKeyboardMarkup
+
+from src.keyboards.inline import get_game_list_keyboard
+from src.models.game import Game, GameParticipant
+from src.services.game_service import GameService
+from src.utils.change_tracking import change_observers
+
+# Сколько игр показывать в публичном списке
+GAME_LIST_LIMIT = 5
+# Предельный возраст готового списка (сек): изменения из других процессов бота
+# и исправления счетчиков подхватываются не позже этого срока
+GAME_LIST_TTL = float(os.getenv("GAME_LIST_TTL", "60"))
+
+GAME_LIST_TEXT = (
+    "📋 <b>Список доступных игр</b>\n\n"
+    "Выберите игру из списка для получения подробной информации и возможности записаться:"
+)
+NO_GAMES_TEXT = "Сейчас нет запланированных игр. Загляните позже или создайте свою игру!"
+
+
+class GameListSnapshot(NamedTuple):
+    """Готовый список игр: текст сообщения и клавиатура (None, если игр нет)"""
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    games_count: int
+
+
+# Текущий снимок, момент его устаревания (time.monotonic) и поколение:
+# поколение увеличивается при каждом сбросе, чтобы не сохранить снимок,
+# собранный до изменения, которое его сбросило
+_state_lock = threading.Lock()
+_snapshot: Optional[GameListSnapshot] = None
+_expires_at = 0.0
+_generation = 0
+# Сборка, которую ждут все одновременные запросы списка, и поколение, для которого она начата
+_pending_build: Optional[asyncio.Future] = None
+_pending_generation = -1
+
+
+class GameListService:
+    """Общий для всех пользователей список предстоящих игр, перестраиваемый после изменений"""
+
+    @staticmethod
+    async def get_public_game_list() -> GameListSnapshot:
+        """Текущий список игр; одновременные запросы получают результат одной сборки"""
+        global _pending_build, _pending_generation
+        snapshot = GameListService._current_snapshot()
+        if snapshot is not None:
+            return snapshot
+
+        loop = asyncio.get_running_loop()
+        if _pending_build is None or _pending_build.done() or _pending_build.get_loop() is not loop \
+                or _pending_generation != _generation:
+            _pending_generation = _generation
+            _pending_build = asyncio.ensure_future(GameListService._build_snapshot())
+        # shield: отмена одного ожидающего запроса не отменяет сборку для остальных
+        return await asyncio.shield(_pending_build)
+
+    @staticmethod
+    def invalidate() -> None:
+        """Сбросить готовый список (игра создана, изменена, сменила статус или состав)"""
+        global _snapshot, _generation
+        with _state_lock:
+            _generation += 1
+            _snapshot = None
+
+    @staticmethod
+    def _current_snapshot() -> Optional[GameListSnapshot]:
+        with _state_lock:
+            if _snapshot is not None and time.monotonic() < _expires_at:
+                return _snapshot
+        return None
+
+    @staticmethod
+    async def _build_snapshot() -> GameListSnapshot:
+        global _snapshot, _expires_at
+        generation = _generation
+        games = await GameService.get_upcoming_games_async(limit=GAME_LIST_LIMIT)
+        if games:
+            snapshot = GameListSnapshot(GAME_LIST_TEXT, get_game_list_keyboard(games), len(games))
+        else:
+            snapshot = GameListSnapshot(NO_GAMES_TEXT, None, 0)
+
+        ttl = GAME_LIST_TTL
+        if games:
+            # Игра пропадает из списка в момент начала - к этому времени список устаревает
+            ttl = min(ttl, (min(game.scheduled_at for game in games) - datetime.now()).total_seconds())
+
+        with _state_lock:
+            if generation == _generation:
+                _snapshot = snapshot
+                _expires_at = time.monotonic() + ttl
+        logger.debug(f"Список игр перестроен: {len(games)} игр")
+        return snapshot
+
+
+def _invalidate_on_game_changes(changes: list) -> None:
+    """Список зависит от игр и числа их участников, но не от ролей и отметок участников"""
+    for change in changes:
+        if change.model is Game or (change.model is GameParticipant and change.operation != "dirty"):
+            GameListService.invalidate()
+            return
+
+
+change_observers.append(_invalidate_on_game_changes)
@@ -1,16 +1,115 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, or_, inspect
+from sqlalchemy.orm import Session, selectinload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import Optional, List, Tuple
 from datetime import datetime
 import random
 from loguru import logger
 
-from src.models.base import get_db
+from src.models.base import get_db, get_async_db
 from src.models.game import Game, GameStatus, GameParticipant, GameRole
 from src.models.user import User
+from src.services.user_service import USER_COLUMNS
+from src.services.notification_outbox_service import NotificationOutboxService
+from src.utils.change_tracking import change_observers
+from src.utils.single_flight import SingleFlight
+
+GAME_COLUMNS = [attribute.key for attribute in inspect(Game).column_attrs]
+PARTICIPANT_COLUMNS = [attribute.key for attribute in inspect(GameParticipant).column_attrs]
+
+# Состав игры: участники и их пользователи. Связи по умолчанию не загружаются (lazy="raise"),
+# поэтому запросы, после которых читается game.participants, передают эту опцию явно
+WITH_PARTICIPANTS = selectinload(Game.participants).selectinload(GameParticipant.user)
+
+
+def _detached(model, values: dict):
+    """Отсоединенная копия объекта из сохраненных значений колонок"""
+    instance = model(**values)
+    make_transient_to_detached(instance)
+    return instance
+
 
 class GameService:
     """Сервис для работы с играми"""
     
+    @staticmethod
+    def _participant_counters(participant: Optional[GameParticipant]) -> dict:
+        """Вклад участника в счетчики игры"""
+        if participant is None:
+            return {"participants": 0, "drivers": 0, "found_drivers": 0, "hidden_drivers": 0}
+        is_driver = participant.role == GameRole.DRIVER
+        return {
+            "participants": 1,
+            "drivers": int(is_driver),
+            "found_drivers": int(is_driver and bool(participant.is_found)),
+            "hidden_drivers": int(is_driver and bool(participant.has_hidden)),
+        }
+    
+    @staticmethod
+    def _apply_counter_change(db: Session, game_id: int, before: dict, after: dict) -> None:
+        """Атомарное изменение счетчиков игры (SET x = x + delta) в текущей транзакции"""
+        columns = {
+            "participants": Game.participants_count,
+            "drivers": Game.drivers_count,
+            "found_drivers": Game.found_drivers_count,
+            "hidden_drivers": Game.hidden_drivers_count,
+        }
+        values = {}
+        for name, column in columns.items():
+            delta = after[name] - before[name]
+            if delta:
+                values[column] = column + delta
+        if values:
+            db.query(Game).filter(Game.id == game_id).update(values, synchronize_session="evaluate")
+    
+    @staticmethod
+    def _counter_expressions() -> dict:
+        """Пересчет счетчиков игры коррелированными подзапросами"""
+        def count(*criteria):
+            return select(func.count(GameParticipant.id)).where(
+                GameParticipant.game_id == Game.id, *criteria
+            ).correlate(Game).scalar_subquery()
+        
+        is_driver = GameParticipant.role == GameRole.DRIVER
+        return {
+            Game.participants_count: count(),
+            Game.drivers_count: count(is_driver),
+            Game.found_drivers_count: count(is_driver, GameParticipant.is_found == True),
+            Game.hidden_drivers_count: count(is_driver, GameParticipant.has_hidden == True),
+        }
+    
+    @staticmethod
+    def recalculate_counters(db: Session, game_id: int) -> None:
+        """Пересчет счетчиков игры в текущей транзакции (после массового изменения участников)"""
+        db.flush()
+        db.query(Game).filter(Game.id == game_id).update(
+            GameService._counter_expressions(), synchronize_session="fetch"
+        )
+    
+    @staticmethod
+    def reconcile_counters() -> int:
+        """Исправление расхождений счетчиков с таблицей участников; возвращает число исправленных игр"""
+        db_generator = get_db()
+        db = next(db_generator)
+        
+        expressions = GameService._counter_expressions()
+        drifted = db.query(Game, *expressions.values()).filter(
+            or_(*(column != expression for column, expression in expressions.items()))
+        ).all()
+        if not drifted:
+            return 0
+        
+        # Значения меняются через ORM, а не массовым UPDATE: так исправления попадают
+        # в flush и наблюдатели change_tracking сбрасывают закэшированные игры
+        drifted_ids = []
+        for game, *counts in drifted:
+            for column, value in zip(expressions, counts):
+                setattr(game, column.key, value)
+            drifted_ids.append(game.id)
+        db.commit()
+        logger.warning(f"Исправлены счетчики участников для {len(drifted_ids)} игр: {drifted_ids}")
+        return len(drifted_ids)
+    
     @staticmethod
     def create_game(
         district: str,
@@ -73,15 +172,8 @@ class GameService:
             logger.error(f"Игра с ID {game_id} уже началась или завершена, редактирование невозможно")
             return False
         
-        # Обновляем поля
-        if district is not None:
-            game.district = district
-        if scheduled_at is not None:
-            game.scheduled_at = scheduled_at
-        if description is not None:
-            game.description = description
-        
-        # Особая обработка для max_participants и max_drivers
+        # Особая обработка для max_participants и max_drivers.
+        # Проверки выполняются до изменения полей, чтобы при ошибке игра осталась нетронутой
         current_participants = db.query(GameParticipant).filter(GameParticipant.game_id == game_id).count()
         
         if max_participants is not None:
@@ -91,13 +183,23 @@ class GameService:
             if max_drivers is not None and max_drivers >= max_participants:
                 logger.error("Количество водителей не может быть больше или равно общему количеству участников")
                 return False
-            game.max_participants = max_participants
         
         if max_drivers is not None:
             max_parts = max_participants if max_participants is not None else game.max_participants
             if max_drivers >= max_parts:
                 logger.error("Количество водителей не может быть больше или равно общему количеству участников")
                 return False
+        
+        # Обновляем поля
+        if district is not None:
+            game.district = district
+        if scheduled_at is not None:
+            game.scheduled_at = scheduled_at
+        if description is not None:
+            game.description = description
+        if max_participants is not None:
+            game.max_participants = max_participants
+        if max_drivers is not None:
             game.max_drivers = max_drivers
         
         db.commit()
@@ -133,34 +235,85 @@ class GameService:
     
     @staticmethod
     def get_game_by_id(game_id: int) -> Optional[Game]:
-        """Получение игры по ID"""
+        """Получение игры по ID (одновременные запросы одной игры выполняют один запрос)"""
+        return _game_by_id_flight.do(game_id, GameService._load_game_by_id, game_id)
+    
+    @staticmethod
+    def _load_game_by_id(game_id: int) -> Optional[Game]:
         db_generator = get_db()
         db = next(db_generator)
-        return db.query(Game).filter(Game.id == game_id).first()
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(Game.id == game_id).first()
+    
+    @staticmethod
+    def snapshot_game(game: Game) -> dict:
+        """Значения колонок игры, её участников и их пользователей, не зависящие от сессии"""
+        return {
+            "game": {key: getattr(game, key) for key in GAME_COLUMNS},
+            "participants": [
+                (
+                    {key: getattr(participant, key) for key in PARTICIPANT_COLUMNS},
+                    {key: getattr(participant.user, key) for key in USER_COLUMNS} if participant.user else None
+                )
+                for participant in game.participants
+            ],
+        }
+    
+    @staticmethod
+    def restore_game(snapshot: dict) -> Game:
+        """Отсоединенная копия игры с участниками и их пользователями из снимка"""
+        game = _detached(Game, snapshot["game"])
+        participants = []
+        for participant_values, user_values in snapshot["participants"]:
+            participant = _detached(GameParticipant, participant_values)
+            set_committed_value(participant, "user", _detached(User, user_values) if user_values else None)
+            set_committed_value(participant, "game", game)
+            participants.append(participant)
+        set_committed_value(game, "participants", participants)
+        return game
+    
+    @staticmethod
+    async def get_game_by_id_async(game_id: int) -> Optional[Game]:
+        """Получение игры по ID (асинхронно)"""
+        async with get_async_db() as db:
+            result = await db.execute(select(Game).options(WITH_PARTICIPANTS).where(Game.id == game_id))
+            return result.unique().scalars().first()
     
     @staticmethod
     def get_upcoming_games(limit: int = 10) -> List[Game]:
         """Получение списка предстоящих игр"""
         db_generator = get_db()
         db = next(db_generator)
-        return db.query(Game).filter(
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(
             Game.status.in_([GameStatus.RECRUITING, GameStatus.UPCOMING]),
             Game.scheduled_at > datetime.now()
         ).order_by(Game.scheduled_at).limit(limit).all()
     
+    @staticmethod
+    async def get_upcoming_games_async(limit: int = 10) -> List[Game]:
+        """Получение списка предстоящих игр (асинхронно)"""
+        async with get_async_db() as db:
+            # Для списка игр достаточно счетчика участников, сами участники не загружаются
+            result = await db.execute(
+                select(Game).where(
+                    Game.status.in_([GameStatus.RECRUITING, GameStatus.UPCOMING]),
+                    Game.scheduled_at > datetime.now()
+                ).order_by(Game.scheduled_at).limit(limit)
+            )
+            return list(result.unique().scalars().all())
+    
     @staticmethod
     def get_all_games(limit: int = 10) -> List[Game]:
         """Получение списка всех игр для админ-панели"""
         db_generator = get_db()
         db = next(db_generator)
-        return db.query(Game).order_by(Game.scheduled_at.desc()).limit(limit).all()
+        return db.query(Game).options(WITH_PARTICIPANTS).order_by(Game.scheduled_at.desc()).limit(limit).all()
     
     @staticmethod
     def get_active_games(limit: int = 10) -> List[Game]:
         """Получение списка активных игр"""
         db_generator = get_db()
         db = next(db_generator)
-        return db.query(Game).filter(
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(
             Game.status.in_([
                 GameStatus.RECRUITING, 
                 GameStatus.UPCOMING, 
@@ -179,7 +332,7 @@ class GameService:
         game_ids = db.query(GameParticipant.game_id).filter(GameParticipant.user_id == user_id).all()
         game_ids = [g[0] for g in game_ids]
         
-        return db.query(Game).filter(Game.id.in_(game_ids)).order_by(Game.scheduled_at).all()
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(Game.id.in_(game_ids)).order_by(Game.scheduled_at).all()
     
     @staticmethod
     def get_user_active_games(user_id: int) -> List[Game]:
@@ -191,11 +344,18 @@ class GameService:
         game_ids = db.query(GameParticipant.game_id).filter(GameParticipant.user_id == user_id).all()
         game_ids = [g[0] for g in game_ids]
         
-        return db.query(Game).filter(
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(
             Game.id.in_(game_ids),
             Game.status.in_([GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE])
         ).order_by(Game.scheduled_at).all()
     
+    @staticmethod
+    async def get_user_active_games_async(user_id: int) -> List[Game]:
+        """Получение списка активных игр пользователя (асинхронно)"""
+        return await GameService._get_user_games_by_status_async(
+            user_id, [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]
+        )
+    
     @staticmethod
     def get_user_games_not_completed(user_id: int) -> List[Game]:
         """Получение списка игр пользователя, которые не завершены"""
@@ -206,10 +366,31 @@ class GameService:
         game_ids = db.query(GameParticipant.game_id).filter(GameParticipant.user_id == user_id).all()
         game_ids = [g[0] for g in game_ids]
         
-        return db.query(Game).filter(
+        return db.query(Game).options(WITH_PARTICIPANTS).filter(
             Game.id.in_(game_ids),
             Game.status.in_([GameStatus.RECRUITING, GameStatus.UPCOMING,GameStatus.HIDING_PHASE,GameStatus.SEARCHING_PHASE])
         ).order_by(Game.scheduled_at).all()
+    
+    @staticmethod
+    async def get_user_games_not_completed_async(user_id: int) -> List[Game]:
+        """Получение списка незавершенных игр пользователя (асинхронно)"""
+        return await GameService._get_user_games_by_status_async(
+            user_id,
+            [GameStatus.RECRUITING, GameStatus.UPCOMING, GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]
+        )
+    
+    @staticmethod
+    async def _get_user_games_by_status_async(user_id: int, statuses: List[GameStatus]) -> List[Game]:
+        """Получение игр пользователя с заданными статусами одним запросом"""
+        async with get_async_db() as db:
+            game_ids = select(GameParticipant.game_id).where(GameParticipant.user_id == user_id)
+            result = await db.execute(
+                select(Game).options(WITH_PARTICIPANTS).where(
+                    Game.id.in_(game_ids),
+                    Game.status.in_(statuses)
+                ).order_by(Game.scheduled_at)
+            )
+            return list(result.unique().scalars().all())
 
     @staticmethod
     def join_game(game_id: int, user_id: int) -> Optional[GameParticipant]:
@@ -251,6 +432,9 @@ class GameService:
         )
         
         db.add(participant)
+        GameService._apply_counter_change(
+            db, game_id, GameService._participant_counters(None), GameService._participant_counters(participant)
+        )
         db.commit()
         db.refresh(participant)
         
@@ -280,6 +464,9 @@ class GameService:
             return False
         
         # Удаление записи
+        GameService._apply_counter_change(
+            db, game_id, GameService._participant_counters(participant), GameService._participant_counters(None)
+        )
         db.delete(participant)
         db.commit()
         
@@ -331,14 +518,19 @@ class GameService:
             
             result.append((participant.user_id, participant.role))
         
+        GameService.recalculate_counters(db, game_id)
         db.commit()
         
         logger.info(f"Роли распределены для игры {game_id}: {max_drivers} водителей, {len(participants) - max_drivers} искателей")
         return result
     
     @staticmethod
-    def _start_game_internal(game_id: int) -> bool:
-        """Внутренний метод для старта игры - меняет статус игры и помечает время старта"""
+    def _start_game_internal(game_id: int, start_type: str = "auto", cancel_jobs: bool = False) -> bool:
+        """
+        Внутренний метод для старта игры - меняет статус игры, помечает время старта
+        и ставит в очередь уведомление участникам. cancel_jobs - снять оставшиеся задачи
+        планировщика для игры, когда старт зафиксирован
+        """
         try:
             db_generator = get_db()
             db = next(db_generator)
@@ -355,9 +547,18 @@ class GameService:
             logger.info(f"Меняем статус игры {game_id} с {game.status} на HIDING_PHASE")
             game.status = GameStatus.HIDING_PHASE
             game.started_at = datetime.now()
+            NotificationOutboxService.enqueue_game_notification(db, game_id, "game_started", start_type=start_type)
             db.commit()
             
             logger.info(f"Игра {game_id} запущена, переведена в фазу пряток")
+            
+            if cancel_jobs:
+                # Задачи снимаются только после фиксации: при ошибке commit игра остается
+                # в прежнем статусе со всеми запланированными событиями
+                from src.services.enhanced_scheduler_service import get_enhanced_scheduler
+                scheduler = get_enhanced_scheduler()
+                if scheduler:
+                    scheduler.cancel_game_jobs(game_id)
 
             # Добавляем задачу отправки обновленных клавиатур всем игрокам
             logger.info(f"Вызываем KeyboardUpdateService.schedule_keyboard_updates_for_game({game_id})")
@@ -375,21 +576,10 @@ class GameService:
     @staticmethod
     def start_game(game_id: int, start_type: str = "manual") -> bool:
         """Начало игры с поддержкой уведомлений"""
-        # Запускаем игру
-        if not GameService._start_game_internal(game_id):
+        # Запускаем игру (уведомления уходят через очередь) и отменяем оставшиеся задачи игры
+        if not GameService._start_game_internal(game_id, start_type, cancel_jobs=True):
             return False
         
-        # Отправляем уведомления через планировщик
-        from src.services.enhanced_scheduler_service import get_enhanced_scheduler
-        scheduler = get_enhanced_scheduler()
-        if scheduler:
-            import asyncio
-            # Запускаем асинхронное уведомление
-            asyncio.create_task(scheduler.notify_game_started(game_id, start_type))
-            
-            # Отменяем все оставшиеся задачи для этой игры
-            scheduler.cancel_game_jobs(game_id)
-        
         logger.info(f"Игра {game_id} запущена ({start_type})")
         return True
     
@@ -411,20 +601,18 @@ class GameService:
         # Переводим игру в фазу поиска
         game.status = GameStatus.SEARCHING_PHASE
         game.searching_started_at = datetime.now()
-        db.commit()
         
-        logger.info(f"Игра {game_id} перешла в фазу поиска")
-        
-        # Запускаем асинхронное уведомление о начале фазы поиска
+        # Уведомление о начале фазы поиска фиксируется вместе со сменой статуса
         from src.services.game_settings_service import GameSettingsService
         settings = GameSettingsService.get_settings()
         
         if settings.notify_on_phase_change:
-            import asyncio
-            from src.services.enhanced_scheduler_service import get_enhanced_scheduler
-            scheduler = get_enhanced_scheduler()
-            if scheduler:
-                asyncio.create_task(scheduler.notify_searching_phase_started(game_id))
+            NotificationOutboxService.enqueue_game_notification(
+                db, game_id, "searching_phase_started", searching_started_at=game.searching_started_at.isoformat()
+            )
+        db.commit()
+        
+        logger.info(f"Игра {game_id} перешла в фазу поиска")
         
         return True
     
@@ -434,23 +622,21 @@ class GameService:
         db_generator = get_db()
         db = next(db_generator)
         
-        # Получаем всех водителей в игре
-        drivers = db.query(GameParticipant).filter(
-            GameParticipant.game_id == game_id,
-            GameParticipant.role == GameRole.DRIVER
-        ).all()
+        game = db.query(Game).filter(Game.id == game_id).first()
+        total_drivers = game.drivers_count if game else 0
+        hidden_count = game.hidden_drivers_count if game else 0
         
-        total_drivers = len(drivers)
-        hidden_drivers = [d for d in drivers if d.has_hidden]
-        not_hidden_drivers = [d for d in drivers if not d.has_hidden]
+        # Загружаем только тех водителей, кого нужно перечислить в уведомлениях
+        not_hidden_drivers = []
+        if hidden_count < total_drivers:
+            not_hidden_drivers = GameService.get_not_hidden_drivers(game_id)
         
         return {
             'total_drivers': total_drivers,
-            'hidden_count': len(hidden_drivers),
-            'not_hidden_count': len(not_hidden_drivers),
-            'hidden_drivers': hidden_drivers,
+            'hidden_count': hidden_count,
+            'not_hidden_count': total_drivers - hidden_count,
             'not_hidden_drivers': not_hidden_drivers,
-            'all_hidden': len(not_hidden_drivers) == 0
+            'all_hidden': hidden_count >= total_drivers
         }
     
     @staticmethod
@@ -468,7 +654,7 @@ class GameService:
         return not_hidden
     
     @staticmethod
-    def end_game(game_id: int) -> bool:
+    def end_game(game_id: int, reason: str = "Все водители найдены!") -> bool:
         """Завершение игры"""
         db_generator = get_db()
         db = next(db_generator)
@@ -481,22 +667,16 @@ class GameService:
         # Обновление статуса игры
         game.status = GameStatus.COMPLETED
         game.ended_at = datetime.now()
-        db.commit()
-        
-        logger.info(f"Игра {game_id} завершена")
         
-        # Отправляем уведомления о завершении игры
+        # Уведомление о завершении игры фиксируется вместе со сменой статуса
         from src.services.game_settings_service import GameSettingsService
         settings = GameSettingsService.get_settings()
         
         if settings.notify_on_phase_change or settings.auto_end_game:
-            import asyncio
-            from src.services.enhanced_scheduler_service import get_enhanced_scheduler
-            scheduler = get_enhanced_scheduler()
-            if scheduler:
-                # Запускаем асинхронное уведомление о завершении игры
-                asyncio.create_task(scheduler.notify_game_ended(game_id, "Все водители найдены!"))
-                logger.info(f"Запланировано уведомление о завершении игры {game_id}")
+            NotificationOutboxService.enqueue_game_notification(db, game_id, "game_ended", reason=reason)
+        db.commit()
+        
+        logger.info(f"Игра {game_id} завершена")
         
         return True
     
@@ -511,20 +691,17 @@ class GameService:
             logger.error(f"Игра с ID {game_id} не найдена")
             return False
         
-        # Обновление статуса игры
+        # Обновление статуса игры и уведомление участников одной транзакцией
         game.status = GameStatus.CANCELED
         game.ended_at = datetime.now()
+        NotificationOutboxService.enqueue_game_notification(db, game_id, "game_cancelled", reason=reason)
         db.commit()
         
-        # Отменяем все запланированные задачи для игры и отправляем уведомления
+        # Отменяем все запланированные задачи для игры
         from src.services.enhanced_scheduler_service import get_enhanced_scheduler
         scheduler = get_enhanced_scheduler()
         if scheduler:
             scheduler.cancel_game_jobs(game_id)
-            
-            import asyncio
-            # Запускаем асинхронное уведомление об отмене
-            asyncio.create_task(scheduler.notify_game_cancelled(game_id, reason))
         
         logger.info(f"Игра {game_id} отменена: {reason}")
         return True
@@ -561,8 +738,12 @@ class GameService:
                 return False
             
             # Отмечаем как найденного
+            counters_before = GameService._participant_counters(participant)
             participant.is_found = True
             participant.found_at = datetime.now()
+            GameService._apply_counter_change(
+                db, game_id, counters_before, GameService._participant_counters(participant)
+            )
             
             db.commit()
             logger.info(f"Участник {user_id} отмечен как найденный в игре {game_id}")
@@ -592,18 +773,8 @@ class GameService:
             if not game or game.status not in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
                 return False
             
-            # Подсчитываем водителей
-            total_drivers = 0
-            found_drivers = 0
-            
-            for participant in game.participants:
-                if participant.role == GameRole.DRIVER:
-                    total_drivers += 1
-                    if participant.is_found:
-                        found_drivers += 1
-            
             # Если все водители найдены, завершаем игру
-            if found_drivers >= total_drivers and total_drivers > 0:
+            if game.found_drivers_count >= game.drivers_count and game.drivers_count > 0:
                 return GameService.end_game(game_id)               
             return False
 
@@ -628,8 +799,12 @@ class GameService:
                 logger.warning(f"Участник {user_id} не найден в игре {game_id}")
                 return False
             
+            counters_before = GameService._participant_counters(participant)
             participant.has_hidden = hidden
             participant.hidden_at = datetime.now()
+            GameService._apply_counter_change(
+                db, game_id, counters_before, GameService._participant_counters(participant)
+            )
             db.commit()
             
             logger.info(f"Обновлен статус спрятанности для участника {user_id} в игре {game_id}: {hidden}")
@@ -645,14 +820,7 @@ class GameService:
                     game = db.query(Game).filter(Game.id == game_id).first()
                     if game and game.status == GameStatus.HIDING_PHASE:
                         # Проверяем, все ли водители спрятались
-                        all_drivers = db.query(GameParticipant).filter(
-                            GameParticipant.game_id == game_id,
-                            GameParticipant.role == GameRole.DRIVER
-                        ).all()
-                        
-                        all_hidden = all(driver.has_hidden for driver in all_drivers)
-                        
-                        if all_hidden and len(all_drivers) > 0:
+                        if game.drivers_count > 0 and game.hidden_drivers_count >= game.drivers_count:
                             logger.info(f"Все водители спрятались в игре {game_id}. Автоматический переход к фазе поиска.")
                             GameService.start_searching_phase(game_id)
             
@@ -686,8 +854,12 @@ class GameService:
                 logger.warning(f"Участник {user_id} не найден в игре {game_id}")
                 return False
             
+            counters_before = GameService._participant_counters(participant)
             participant.is_found = True
             participant.found_at = datetime.now()
+            GameService._apply_counter_change(
+                db, game_id, counters_before, GameService._participant_counters(participant)
+            )
             
             db.commit()
             logger.info(f"Администратор {admin_id} отметил участника {user_id} как найденного в игре {game_id}")
@@ -722,19 +894,13 @@ class GameService:
             
             game.status = GameStatus.COMPLETED
             game.ended_at = datetime.now()
+            NotificationOutboxService.enqueue_game_notification(
+                db, game_id, "game_ended", reason="Завершено администратором"
+            )
             
             db.commit()
             logger.info(f"Администратор {admin_id} завершил игру {game_id}")
             
-            # Отправляем уведомления о завершении игры
-            import asyncio
-            from src.services.enhanced_scheduler_service import get_enhanced_scheduler
-            scheduler = get_enhanced_scheduler()
-            if scheduler:
-                # Запускаем асинхронное уведомление о завершении игры
-                asyncio.create_task(scheduler.notify_game_ended(game_id, "Завершено администратором"))
-                logger.info(f"Запланировано уведомление о завершении игры {game_id} (админ)")
-            
             return True
             
         except Exception as e:
@@ -773,4 +939,21 @@ class GameService:
             logger.error(f"Ошибка при админском переходе к поиску в игре {game_id}: {e}")
             return False 
         
-            
\ No newline at end of file
+            
+
+
+# Ожидающие вызовы получают отсоединенные копии игры, прочитанной первым вызовом
+_game_by_id_flight = SingleFlight(
+    "get_game_by_id",
+    share=lambda game: GameService.snapshot_game(game) if game is not None else None,
+    restore=lambda snapshot: GameService.restore_game(snapshot) if snapshot is not None else None,
+)
+
+
+def _forget_game_reads(changes: list) -> None:
+    """Чтения, начатые до фиксации изменений игр, не отдаются новым вызовам"""
+    if any(change.model in (Game, GameParticipant, User) for change in changes):
+        _game_by_id_flight.forget()
+
+
+change_observers.append(_forget_game_reads)
@@ -1,9 +1,55 @@
+import os
+import threading
+import time
 from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from loguru import logger
 
 from src.models.base import get_db
 from src.models.settings import GameSettings
+from src.utils.change_tracking import change_observers
+
+# Как часто (сек) сверять версию настроек в БД, чтобы подхватить изменения
+# из других процессов бота; 0 - не сверять (один процесс)
+GAME_SETTINGS_POLL_INTERVAL = float(os.getenv("GAME_SETTINGS_POLL_INTERVAL", "0"))
+
+SETTINGS_COLUMNS = [attribute.key for attribute in inspect(GameSettings).column_attrs]
+
+
+class SettingsSnapshot:
+    """Снимок настроек игры в памяти процесса"""
+    
+    def __init__(self):
+        self.values: Optional[Dict[str, Any]] = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+    
+    def store(self, settings: GameSettings) -> None:
+        with self.lock:
+            self.values = {key: getattr(settings, key) for key in SETTINGS_COLUMNS}
+            self.checked_at = time.monotonic()
+    
+    def invalidate(self) -> None:
+        with self.lock:
+            self.values = None
+    
+    @property
+    def version(self) -> Optional[int]:
+        return self.values["version"] if self.values else None
+    
+    def build(self) -> Optional[GameSettings]:
+        """Отсоединенная копия настроек из снимка"""
+        values = self.values
+        if values is None:
+            return None
+        settings = GameSettings(**values)
+        make_transient_to_detached(settings)
+        return settings
+
+
+settings_snapshot = SettingsSnapshot()
+
 
 class GameSettingsService:
     """Сервис для работы с настройками игры"""
@@ -11,6 +57,9 @@ class GameSettingsService:
     @staticmethod
     def get_settings() -> GameSettings:
         """Получить текущие настройки игры"""
+        if settings_snapshot.values is not None and not GameSettingsService._snapshot_outdated():
+            return settings_snapshot.build()
+        
         db_generator = get_db()
         db = next(db_generator)
         
@@ -25,6 +74,7 @@ class GameSettingsService:
                 db.refresh(settings)
                 logger.info("Созданы дефолтные настройки игры")
             
+            settings_snapshot.store(settings)
             return settings
             
         except Exception as e:
@@ -34,6 +84,35 @@ class GameSettingsService:
         finally:
             db.close()
     
+    @staticmethod
+    def _snapshot_outdated() -> bool:
+        """Сверка версии снимка с БД не чаще раза в GAME_SETTINGS_POLL_INTERVAL секунд"""
+        if GAME_SETTINGS_POLL_INTERVAL <= 0:
+            return False
+        if time.monotonic() - settings_snapshot.checked_at < GAME_SETTINGS_POLL_INTERVAL:
+            return False
+        
+        db_generator = get_db()
+        db = next(db_generator)
+        try:
+            version = db.query(GameSettings.version).order_by(GameSettings.id).limit(1).scalar()
+        except Exception as e:
+            logger.error(f"Ошибка проверки версии настроек игры: {e}")
+            return False
+        finally:
+            db.close()
+        
+        if version == settings_snapshot.version:
+            settings_snapshot.checked_at = time.monotonic()
+            return False
+        logger.info(f"Настройки игры изменены другим процессом (версия {version}), перечитываем")
+        return True
+    
+    @staticmethod
+    def invalidate_cache() -> None:
+        """Сбросить снимок настроек, следующий вызов get_settings прочитает их из БД"""
+        settings_snapshot.invalidate()
+    
     @staticmethod
     def update_settings(**kwargs) -> bool:
         """Обновить настройки игры"""
@@ -50,9 +129,12 @@ class GameSettingsService:
             
             # Обновляем только переданные параметры
             for key, value in kwargs.items():
-                if hasattr(settings, key):
+                if hasattr(settings, key) and key != "version":
                     setattr(settings, key, value)
                     logger.debug(f"Обновлена настройка {key}: {value}")
+            if settings.id is not None:
+                # Увеличиваем версию в самом UPDATE, чтобы параллельные изменения не потерялись
+                settings.version = GameSettings.version + 1
             
             db.commit()
             logger.info(f"Настройки игры обновлены: {kwargs}")
@@ -63,6 +145,7 @@ class GameSettingsService:
             db.rollback()
             return False
         finally:
+            settings_snapshot.invalidate()
             db.close()
     
     @staticmethod
@@ -174,4 +257,13 @@ class GameSettingsService:
             "min_participants_to_start": 3
         }
         
-        return GameSettingsService.update_settings(**default_settings)
\ No newline at end of file
+        return GameSettingsService.update_settings(**default_settings)
+
+
+def _invalidate_settings_snapshot(changes: list) -> None:
+    """Сброс снимка после изменения настроек, в том числе в другом процессе бота"""
+    if any(change.model is GameSettings for change in changes):
+        settings_snapshot.invalidate()
+
+
+change_observers.append(_invalidate_settings_snapshot)
@@ -21,7 +21,9 @@ class KeyboardUpdateService:
             db_generator = get_db()
             db = next(db_generator)
             
-            participants = db.query(GameParticipant)\
+            # Участники вместе с пользователями одним запросом
+            participants = db.query(GameParticipant.user_id, User.telegram_id, User.name)\
+                .outerjoin(User, User.id == GameParticipant.user_id)\
                 .filter(GameParticipant.game_id == game_id)\
                 .all()
             
@@ -32,13 +34,12 @@ class KeyboardUpdateService:
                 return
             
             user_ids = []
-            for participant in participants:
-                user = db.query(User).filter(User.id == participant.user_id).first()
-                if user and user.telegram_id:
-                    user_ids.append(user.telegram_id)
-                    logger.debug(f"Добавлен пользователь {user.name} (telegram_id: {user.telegram_id}) для обновления клавиатуры")
+            for participant_user_id, telegram_id, name in participants:
+                if telegram_id:
+                    user_ids.append(telegram_id)
+                    logger.debug(f"Добавлен пользователь {name} (telegram_id: {telegram_id}) для обновления клавиатуры")
                 else:
-                    logger.warning(f"Пользователь {participant.user_id} не найден или не имеет telegram_id")
+                    logger.warning(f"Пользователь {participant_user_id} не найден или не имеет telegram_id")
             
             logger.info(f"Подготовлено {len(user_ids)} telegram_id для обновления клавиатур: {user_ids}")
             
@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import List, Tuple, Optional
 from loguru import logger
 import math
+from sqlalchemy import select
 
-from src.models.base import get_db
+from src.models.base import get_db, get_async_db
 from src.models.game import Location, Game
 from src.models.user import User
 from src.models.settings import DistrictZone
@@ -37,6 +38,26 @@ class LocationService:
             logger.error(f"Ошибка сохранения геолокации: {e}")
             return False
     
+    @staticmethod
+    async def save_user_location_async(user_id: int, game_id: int, latitude: float, longitude: float) -> bool:
+        """Сохранить геолокацию пользователя для игры (асинхронно)"""
+        try:
+            async with get_async_db() as db:
+                db.add(Location(
+                    user_id=user_id,
+                    game_id=game_id,
+                    latitude=latitude,
+                    longitude=longitude
+                ))
+                await db.commit()
+            
+            logger.info(f"Сохранена геолокация пользователя {user_id} для игры {game_id}: {latitude}, {longitude}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Ошибка сохранения геолокации: {e}")
+            return False
+    
     @staticmethod
     def get_user_latest_location(user_id: int, game_id: int) -> Optional[Location]:
         """Получить последнюю геолокацию пользователя для игры"""
@@ -55,6 +76,23 @@ class LocationService:
             logger.error(f"Ошибка получения геолокации: {e}")
             return None
     
+    @staticmethod
+    async def get_user_latest_location_async(user_id: int, game_id: int) -> Optional[Location]:
+        """Получить последнюю геолокацию пользователя для игры (асинхронно)"""
+        try:
+            async with get_async_db() as db:
+                result = await db.execute(
+                    select(Location).where(
+                        Location.user_id == user_id,
+                        Location.game_id == game_id
+                    ).order_by(Location.timestamp.desc()).limit(1)
+                )
+                return result.scalars().first()
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения геолокации: {e}")
+            return None
+    
     @staticmethod
     def get_game_participants_locations(game_id: int) -> List[Tuple[User, Location]]:
         """Получить последние геолокации всех участников игры"""
@@ -174,6 +212,61 @@ class LocationService:
             logger.error(f"Ошибка проверки нахождения в игровой зоне: {e}")
             return False
     
+    @staticmethod
+    async def is_user_in_game_zone_async(user_id: int, game_id: int, zone_radius: int = None) -> bool:
+        """Проверить, находится ли пользователь в игровой зоне (асинхронно)"""
+        try:
+            user_location = await LocationService.get_user_latest_location_async(user_id, game_id)
+            if not user_location:
+                return False
+            
+            async with get_async_db() as db:
+                result = await db.execute(select(Game).where(Game.id == game_id))
+                game = result.unique().scalars().first()
+                if not game:
+                    return False
+                
+                # Если у игры есть собственная зона - используем её
+                if game.has_game_zone:
+                    distance = LocationService.calculate_distance(
+                        user_location.latitude,
+                        user_location.longitude,
+                        game.zone_center_lat,
+                        game.zone_center_lon
+                    )
+                    return distance <= game.zone_radius
+                
+                if zone_radius is None:
+                    # Если ни зоны игры, ни параметра нет - считаем что в зоне
+                    return True
+                
+                # Центр зоны: зона района по умолчанию, иначе первая геолокация в игре
+                center = await LocationService._get_default_district_zone_async(db, game.district)
+                if center:
+                    center_lat, center_lon = center.center_lat, center.center_lon
+                else:
+                    result = await db.execute(
+                        select(Location).where(
+                            Location.game_id == game_id
+                        ).order_by(Location.timestamp.asc()).limit(1)
+                    )
+                    first_location = result.scalars().first()
+                    if not first_location:
+                        return True  # Если нет других участников, считаем что в зоне
+                    center_lat, center_lon = first_location.latitude, first_location.longitude
+                
+                distance = LocationService.calculate_distance(
+                    user_location.latitude,
+                    user_location.longitude,
+                    center_lat,
+                    center_lon
+                )
+                return distance <= zone_radius
+            
+        except Exception as e:
+            logger.error(f"Ошибка проверки нахождения в игровой зоне: {e}")
+            return False
+    
     @staticmethod
     def get_nearby_users(user_id: int, game_id: int, radius: int = 100) -> List[Tuple[User, Location, float]]:
         """Получить список ближайших пользователей в радиусе"""
@@ -252,6 +345,17 @@ class LocationService:
             logger.error(f"Ошибка получения зоны по умолчанию для района {district_name}: {e}")
             return None
     
+    @staticmethod
+    async def _get_default_district_zone_async(db, district_name: str) -> Optional[DistrictZone]:
+        """Получить зону района по умолчанию в рамках переданной асинхронной сессии"""
+        result = await db.execute(
+            select(DistrictZone).where(
+                DistrictZone.district_name == district_name,
+                DistrictZone.is_active == True
+            ).order_by(DistrictZone.is_default.desc()).limit(1)
+        )
+        return result.scalars().first()
+    
     @staticmethod
     def is_point_in_zone(lat: float, lon: float, zone: DistrictZone) -> bool:
         """Проверить, находится ли точка в зоне"""
@@ -1,5 +1,5 @@
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from loguru import logger
 from datetime import datetime
 
@@ -7,8 +7,9 @@ from src.models.base import get_db
 from src.models.game import Game, GameParticipant, GameStatus, GameRole
 from src.models.user import User
 from src.services.game_settings_service import GameSettingsService
-from src.services.game_service import GameService
+from src.services.game_service import GameService, WITH_PARTICIPANTS
 from src.services.user_service import UserService
+from src.services.notification_outbox_service import NotificationOutboxService
 
 class ManualGameControlService:
     """Сервис для ручного управления игрой администратором"""
@@ -33,7 +34,7 @@ class ManualGameControlService:
                 GameParticipant.role.isnot(None)
             ).count()
             
-            total_participants = len(game.participants)
+            total_participants = db.query(GameParticipant).filter(GameParticipant.game_id == game_id).count()
             
             if participants_with_roles != total_participants:
                 return {"success": False, "error": "Не все участники имеют назначенные роли"}
@@ -41,6 +42,7 @@ class ManualGameControlService:
             # Запускаем фазу пряток
             game.status = GameStatus.HIDING_PHASE
             game.started_at = datetime.now()
+            NotificationOutboxService.enqueue_game_notification(db, game_id, "game_started", start_type="manual")
             
             db.commit()
             
@@ -76,6 +78,9 @@ class ManualGameControlService:
             
             # Запускаем фазу поиска
             game.status = GameStatus.SEARCHING_PHASE
+            NotificationOutboxService.enqueue_game_notification(
+                db, game_id, "searching_phase_started", searching_started_at=datetime.now().isoformat()
+            )
             
             db.commit()
             
@@ -113,6 +118,9 @@ class ManualGameControlService:
             game.ended_at = datetime.now()
             if reason:
                 game.notes = f"{game.notes or ''}\nЗавершено админом: {reason}".strip()
+            NotificationOutboxService.enqueue_game_notification(
+                db, game_id, "game_ended", reason=reason or "Завершено администратором"
+            )
             
             db.commit()
             
@@ -139,7 +147,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            participant = db.query(GameParticipant).filter(
+            participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                 GameParticipant.game_id == game_id,
                 GameParticipant.id == participant_id
             ).first()
@@ -153,18 +161,18 @@ class ManualGameControlService:
             if participant.is_found:
                 return {"success": False, "error": "Участник уже отмечен как найденный"}
             
-            # Отмечаем как найденного
+            # Отмечаем как найденного (имя читается до commit: после него связи участника не загружены)
+            participant_name = participant.user.name
             participant.is_found = True
             participant.found_at = datetime.now()
             
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} вручную отметил участника {participant_id} как найденного в игре {game_id}")
             
             # КРИТИЧЕСКИ ВАЖНО: Проверяем завершение игры после изменения статуса
-            # Импортируем GameService здесь, чтобы избежать циклических импортов
             try:
-                from src.services.game_service import GameService
                 # Проверяем, нужно ли завершить игру после изменения статуса
                 if GameService._check_auto_game_completion(game_id):
                     logger.info(f"Игра {game_id} автоматически завершена после ручной отметки участника {participant_id}")
@@ -173,7 +181,7 @@ class ManualGameControlService:
             
             return {
                 "success": True,
-                "message": f"Участник {participant.user.name} отмечен как найденный",
+                "message": f"Участник {participant_name} отмечен как найденный",
                 "found_at": participant.found_at.isoformat()
             }
             
@@ -191,7 +199,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            participant = db.query(GameParticipant).filter(
+            participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                 GameParticipant.game_id == game_id,
                 GameParticipant.id == participant_id
             ).first()
@@ -200,16 +208,17 @@ class ManualGameControlService:
                 return {"success": False, "error": "Участник не найден"}
             
             # Отмечаем как выбывшего (убираем флаг найденного, если был)
+            participant_name = participant.user.name
             participant.is_found = True  # Выбывший считается найденным
             participant.found_at = datetime.now()
             
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} вручную отметил участника {participant_id} как выбывшего в игре {game_id}")
             
             # КРИТИЧЕСКИ ВАЖНО: Проверяем завершение игры после изменения статуса
             try:
-                from src.services.game_service import GameService
                 # Проверяем, нужно ли завершить игру после изменения статуса
                 if GameService._check_auto_game_completion(game_id):
                     logger.info(f"Игра {game_id} автоматически завершена после отметки участника {participant_id} как выбывшего")
@@ -218,7 +227,7 @@ class ManualGameControlService:
             
             return {
                 "success": True,
-                "message": f"Участник {participant.user.name} отмечен как выбывший",
+                "message": f"Участник {participant_name} отмечен как выбывший",
                 "eliminated_at": participant.found_at.isoformat()
             }
             
@@ -236,7 +245,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            participant = db.query(GameParticipant).filter(
+            participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                 GameParticipant.game_id == game_id,
                 GameParticipant.id == participant_id
             ).first()
@@ -248,16 +257,17 @@ class ManualGameControlService:
                 return {"success": False, "error": "Участник не отмечен как найденный"}
             
             # Убираем отметку найденного
+            participant_name = participant.user.name
             participant.is_found = False
             participant.found_at = None
             
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} отменил отметку найденного для участника {participant_id} в игре {game_id}")
             
             # ВАЖНО: После отмены отметки игра может продолжиться, но проверим состояние
             try:
-                from src.services.game_service import GameService
                 game = db.query(Game).filter(Game.id == game_id).first()
                 if game and game.status == GameStatus.COMPLETED:
                     # Если игра была завершена, возвращаем её в активное состояние
@@ -270,7 +280,7 @@ class ManualGameControlService:
             
             return {
                 "success": True,
-                "message": f"Отметка найденного для участника {participant.user.name} отменена"
+                "message": f"Отметка найденного для участника {participant_name} отменена"
             }
             
         except Exception as e:
@@ -287,7 +297,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            game = db.query(Game).filter(Game.id == game_id).first()
+            game = db.query(Game).options(WITH_PARTICIPANTS).filter(Game.id == game_id).first()
             if not game:
                 return {"success": False, "error": "Игра не найдена"}
             
@@ -366,7 +376,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            participant = db.query(GameParticipant).filter(
+            participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                 GameParticipant.game_id == game_id,
                 GameParticipant.id == participant_id
             ).first()
@@ -379,15 +389,17 @@ class ManualGameControlService:
                 return {"success": False, "error": "Нельзя изменять роли после начала игры"}
             
             old_role = participant.role
+            participant_name = participant.user.name
             participant.role = new_role
             
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} изменил роль участника {participant_id} с {old_role} на {new_role} в игре {game_id}")
             
             return {
                 "success": True,
-                "message": f"Роль участника {participant.user.name} изменена на {new_role.value}",
+                "message": f"Роль участника {participant_name} изменена на {new_role.value}",
                 "old_role": old_role.value if old_role else None,
                 "new_role": new_role.value
             }
@@ -430,7 +442,7 @@ class ManualGameControlService:
                 return {"success": False, "error": f"Пользователь {user.name} уже участвует в игре"}
             
             # Проверяем лимит участников
-            current_participants = len(game.participants)
+            current_participants = db.query(GameParticipant).filter(GameParticipant.game_id == game_id).count()
             if current_participants >= game.max_participants:
                 return {"success": False, "error": f"Достигнут лимит участников ({game.max_participants})"}
             
@@ -453,7 +465,10 @@ class ManualGameControlService:
             if participants_with_roles > 0:
                 # Роли уже распределены, назначаем роль новому участнику
                 try:
-                    current_drivers = sum(1 for p in game.participants if p.role == GameRole.DRIVER)
+                    current_drivers = db.query(GameParticipant).filter(
+                        GameParticipant.game_id == game_id,
+                        GameParticipant.role == GameRole.DRIVER
+                    ).count()
                     
                     if current_drivers < game.max_drivers:
                         participant.role = GameRole.DRIVER
@@ -462,6 +477,7 @@ class ManualGameControlService:
                         participant.role = GameRole.SEEKER
                         logger.info(f"Новому участнику {user_id} назначена роль SEEKER (роли уже распределены)")
                     
+                    GameService.recalculate_counters(db, game_id)
                     db.commit()
                     
                 except Exception as role_error:
@@ -505,7 +521,7 @@ class ManualGameControlService:
         
         try:
             # Находим участника
-            participant = db.query(GameParticipant).filter(
+            participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                 GameParticipant.game_id == game_id,
                 GameParticipant.id == participant_id
             ).first()
@@ -523,6 +539,7 @@ class ManualGameControlService:
             
             # Удаляем участника
             db.delete(participant)
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} удалил участника {participant_id} ({participant_name}) из игры {game_id}")
@@ -543,7 +560,10 @@ class ManualGameControlService:
                 if participant.role == GameRole.DRIVER and participant.is_found:
                     if updated_game.status == GameStatus.COMPLETED:
                         # Если игра завершена, но водитель удален, возвращаем в активное состояние
-                        remaining_drivers = [p for p in updated_game.participants if p.role == GameRole.DRIVER]
+                        remaining_drivers = db.query(GameParticipant).filter(
+                            GameParticipant.game_id == game_id,
+                            GameParticipant.role == GameRole.DRIVER
+                        ).all()
                         unfound_drivers = [p for p in remaining_drivers if not p.is_found]
                         
                         if unfound_drivers:  # Есть ненайденные водители
@@ -615,7 +635,7 @@ class ManualGameControlService:
             driver_count = sum(1 for role in role_assignments.values() if role == GameRole.DRIVER)
             seeker_count = sum(1 for role in role_assignments.values() if role == GameRole.SEEKER)
             total_assigned = len(role_assignments)
-            total_participants = len(game.participants)
+            total_participants = db.query(GameParticipant).filter(GameParticipant.game_id == game_id).count()
             
             # Проверки
             if total_assigned != total_participants:
@@ -665,7 +685,7 @@ class ManualGameControlService:
             # Назначаем роли
             assigned_participants = []
             for participant_id, role in role_assignments.items():
-                participant = db.query(GameParticipant).filter(
+                participant = db.query(GameParticipant).options(selectinload(GameParticipant.user)).filter(
                     GameParticipant.game_id == game_id,
                     GameParticipant.id == participant_id
                 ).first()
@@ -678,6 +698,7 @@ class ManualGameControlService:
                         "role": role.value
                     })
             
+            GameService.recalculate_counters(db, game_id)
             db.commit()
             
             logger.info(f"Админ {admin_user_id} вручную назначил роли в игре {game_id}: {validation['driver_count']} водителей, {validation['seeker_count']} искателей")
@@ -704,7 +725,7 @@ class ManualGameControlService:
         db = next(db_generator)
         
         try:
-            game = db.query(Game).filter(Game.id == game_id).first()
+            game = db.query(Game).options(WITH_PARTICIPANTS).filter(Game.id == game_id).first()
             if not game:
                 return {"success": False, "error": "Игра не найдена"}
             
@@ -1,4 +1,4 @@
-from prometheus_client import start_http_server, Gauge, Counter, Summary
+from prometheus_client import start_http_server, Gauge, Counter, Summary, Histogram
 from loguru import logger
 import os
 import psutil
@@ -6,7 +6,18 @@ import threading
 import time
 from typing import Dict
 
+from src.models.base import InstrumentedQueuePool, get_pool_status
 from src.services.monitoring_service import MonitoringService
+from src.utils.db_executor import db_executor
+from src.utils.query_stats import query_stats_observers
+from src.utils.cache import cache_observers
+from src.utils.cache_backend import change_publish_observers
+from src.utils.single_flight import single_flight_observers
+from src.utils.broadcast import broadcast_observers
+from src.services.notification_outbox_service import outbox_observers
+from src.services.admin_digest_service import digest_observers
+from src.utils.telegram_request import retry_after_observers, telegram_api_observers
+from src.services.enhanced_scheduler_service import misfire_observers
 
 
 class MetricsService:
@@ -40,6 +51,138 @@ class MetricsService:
             "pryton_memory_usage_bytes",
             "Memory usage in bytes",
         )
+        self.db_pool_checked_out = Gauge(
+            "pryton_db_pool_checked_out",
+            "Database connections currently checked out of the pool",
+        )
+        self.db_pool_checked_out.set_function(lambda: get_pool_status()["checked_out"])
+        self.db_pool_overflow = Gauge(
+            "pryton_db_pool_overflow",
+            "Database connections opened above the pool size",
+        )
+        self.db_pool_overflow.set_function(lambda: get_pool_status()["overflow"])
+        self.db_pool_wait = Histogram(
+            "pryton_db_pool_wait_seconds",
+            "Time spent waiting for a database connection",
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+        )
+        InstrumentedQueuePool.wait_observers.append(self.observe_pool_wait)
+        self.db_sessions = Counter(
+            "pryton_db_sessions_total",
+            "Request-scoped database sessions by outcome",
+            ["outcome"],
+        )
+        self.db_executor_queue = Gauge(
+            "pryton_db_executor_queue_depth",
+            "Blocking DB calls waiting for a free executor thread",
+        )
+        self.db_executor_queue.set_function(lambda: db_executor.queue_depth)
+        self.db_executor_running = Gauge(
+            "pryton_db_executor_running",
+            "Blocking DB calls currently running in the executor",
+        )
+        self.db_executor_running.set_function(lambda: db_executor.running)
+        self.db_executor_wait = Histogram(
+            "pryton_db_executor_wait_seconds",
+            "Time blocking DB calls spend queued before a thread picks them up",
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+        )
+        db_executor.wait_observers.append(self.observe_executor_wait)
+        self.db_queries_per_update = Histogram(
+            "pryton_db_queries_per_update",
+            "SQL queries executed while handling one update",
+            ["handler"],
+            buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+        )
+        self.db_time_per_update = Histogram(
+            "pryton_db_time_per_update_seconds",
+            "Total SQL time spent while handling one update",
+            ["handler"],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+        )
+        self.db_slowest_query = Histogram(
+            "pryton_db_slowest_query_seconds",
+            "Slowest SQL statement executed while handling one update",
+            ["handler"],
+            buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+        )
+        query_stats_observers.append(self.observe_query_stats)
+        self.cache_requests = Counter(
+            "pryton_cache_requests_total",
+            "In-process cache lookups by result",
+            ["cache", "result"],
+        )
+        cache_observers.append(self.record_cache_request)
+        self.cache_change_publishes = Counter(
+            "pryton_cache_change_publish_total",
+            "Committed model changes published to other bot processes via Redis, by result",
+            ["result"],
+        )
+        change_publish_observers.append(self.record_change_publish)
+        self.coalesced_requests = Counter(
+            "pryton_coalesced_requests_total",
+            "Reads that waited for an identical in-flight read instead of querying",
+            ["operation"],
+        )
+        single_flight_observers.append(self.record_coalesced_request)
+        self.broadcast_duration = Histogram(
+            "pryton_broadcast_duration_seconds",
+            "Time until every message of a broadcast was sent or given up",
+            ["broadcast"],
+            buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0),
+        )
+        self.broadcast_messages = Counter(
+            "pryton_broadcast_messages_total",
+            "Broadcast messages by delivery result",
+            ["broadcast", "result"],
+        )
+        self.broadcast_retries = Counter(
+            "pryton_broadcast_retries_total",
+            "Broadcast send retries after RetryAfter or network errors",
+            ["broadcast"],
+        )
+        broadcast_observers.append(self.observe_broadcast)
+        self.outbox_messages = Counter(
+            "pryton_notification_outbox_total",
+            "Notification outbox records processed by the dispatcher, by result",
+            ["kind", "result"],
+        )
+        outbox_observers.append(self.record_outbox_message)
+        self.admin_digest_saved_calls = Counter(
+            "pryton_admin_digest_saved_calls_total",
+            "Telegram API calls avoided by sending admins per-game digests",
+        )
+        digest_observers.append(self.record_digest_saved_calls)
+        self.telegram_api_duration = Histogram(
+            "pryton_telegram_api_duration_seconds",
+            "Telegram Bot API request latency",
+            ["method"],
+            buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+        )
+        self.telegram_api_requests = Counter(
+            "pryton_telegram_api_requests_total",
+            "Telegram Bot API requests by result",
+            ["method", "result"],
+        )
+        telegram_api_observers.append(self.observe_telegram_api_request)
+        self.telegram_api_retry_after = Counter(
+            "pryton_telegram_api_retry_after_seconds_total",
+            "Seconds of flood control pause requested by Telegram via RetryAfter",
+            ["method"],
+        )
+        retry_after_observers.append(self.record_retry_after)
+        self.scheduler_misfires = Counter(
+            "pryton_scheduler_misfires_total",
+            "Scheduled events that fired late, by decision",
+            ["event_type", "action"],
+        )
+        self.scheduler_misfire_lateness = Histogram(
+            "pryton_scheduler_misfire_lateness_seconds",
+            "How late overdue scheduled events were when handled",
+            ["event_type"],
+            buckets=(1, 5, 30, 60, 300, 900, 1800, 3600, 21600, 86400),
+        )
+        misfire_observers.append(self.observe_misfire)
         self._stop_event = threading.Event()
         self._system_thread = None
         self.port = int(os.getenv("METRICS_PORT", "8000"))
@@ -90,4 +233,93 @@ class MetricsService:
         except Exception as e:
             logger.error(f"Не удалось записать latency: {e}")
 
+    def observe_pool_wait(self, duration: float) -> None:
+        try:
+            self.db_pool_wait.observe(duration)
+        except Exception as e:
+            logger.error(f"Не удалось записать ожидание пула БД: {e}")
+
+    def observe_executor_wait(self, duration: float) -> None:
+        try:
+            self.db_executor_wait.observe(duration)
+        except Exception as e:
+            logger.error(f"Не удалось записать ожидание пула потоков БД: {e}")
+
+    def observe_query_stats(self, stats) -> None:
+        if not stats.count:
+            return
+        try:
+            self.db_queries_per_update.labels(handler=stats.handler).observe(stats.count)
+            self.db_time_per_update.labels(handler=stats.handler).observe(stats.total_time)
+            self.db_slowest_query.labels(handler=stats.handler).observe(stats.slowest_time)
+        except Exception as e:
+            logger.error(f"Не удалось записать статистику SQL-запросов: {e}")
+
+    def record_db_session(self, outcome: str) -> None:
+        try:
+            self.db_sessions.labels(outcome=outcome).inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать db_sessions: {e}")
+
+    def record_cache_request(self, cache: str, hit: bool) -> None:
+        try:
+            self.cache_requests.labels(cache=cache, result="hit" if hit else "miss").inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать обращение к кэшу: {e}")
+
+    def record_change_publish(self, result: str) -> None:
+        try:
+            self.cache_change_publishes.labels(result=result).inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать рассылку изменений: {e}")
+
+    def record_coalesced_request(self, operation: str) -> None:
+        try:
+            self.coalesced_requests.labels(operation=operation).inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать совмещенный запрос: {e}")
+
+    def observe_broadcast(self, result) -> None:
+        try:
+            self.broadcast_duration.labels(broadcast=result.name).observe(result.duration)
+            self.broadcast_messages.labels(broadcast=result.name, result="sent").inc(result.sent)
+            self.broadcast_messages.labels(broadcast=result.name, result="failed").inc(result.failed)
+            self.broadcast_retries.labels(broadcast=result.name).inc(result.retries)
+        except Exception as e:
+            logger.error(f"Не удалось записать итоги рассылки: {e}")
+
+    def record_outbox_message(self, kind: str, result: str) -> None:
+        try:
+            self.outbox_messages.labels(kind=kind, result=result).inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать итог отправки уведомления: {e}")
+
+    def record_digest_saved_calls(self, saved: int) -> None:
+        try:
+            self.admin_digest_saved_calls.inc(max(saved, 0))
+        except Exception as e:
+            logger.error(f"Не удалось записать итоги сводки администраторам: {e}")
+
+    def observe_telegram_api_request(self, method: str, result: str, duration: float) -> None:
+        try:
+            self.telegram_api_duration.labels(method=method).observe(duration)
+            self.telegram_api_requests.labels(method=method, result=result).inc()
+        except Exception as e:
+            logger.error(f"Не удалось записать запрос к Telegram API: {e}")
+
+    def record_retry_after(self, method: str, retry_after: float) -> None:
+        try:
+            self.telegram_api_retry_after.labels(method=method).inc(retry_after)
+        except Exception as e:
+            logger.error(f"Не удалось записать RetryAfter: {e}")
+
+    def observe_misfire(self, event_type: str, action: str, lateness: float) -> None:
+        try:
+            # Напоминания за разное время - один тип, чтобы не плодить метки
+            event_type = "reminder" if event_type.startswith("reminder_") else event_type
+            self.scheduler_misfires.labels(event_type=event_type, action=action).inc()
+            self.scheduler_misfire_lateness.labels(event_type=event_type).observe(lateness)
+        except Exception as e:
+            logger.error(f"Не удалось записать просроченное событие: {e}")
+
 metrics_service = MetricsService()
@@ -1,12 +1,17 @@
+import copy
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy import func, desc
+from sqlalchemy.orm import selectinload
 from loguru import logger
 
 from src.services.enhanced_scheduler_service import DEFAULT_TIMEZONE
 from src.models.base import get_db
 from src.models.game import Game, GameStatus, GameParticipant, GameRole, Location, Photo
 from src.models.user import User
+from src.services.game_service import WITH_PARTICIPANTS
+from src.utils.change_tracking import change_observers
+from src.utils.single_flight import SingleFlight
 
 
 class MonitoringService:
@@ -51,7 +56,7 @@ class MonitoringService:
                         "district": game.district,
                         "scheduled_at": game.scheduled_at,
                         "status": game.status.value,
-                        "participants": len(game.participants),
+                        "participants": game.participants_count,
                         "max_participants": game.max_participants
                     }
                     for game in active_games
@@ -84,32 +89,40 @@ class MonitoringService:
     
     @staticmethod
     def get_game_detailed_info(game_id: int) -> Optional[Dict[str, Any]]:
-        """Получение детальной информации об игре"""
+        """Получение детальной информации об игре (одновременные запросы одной игры выполняют одну выборку)"""
+        return _game_info_flight.do(game_id, MonitoringService._load_game_detailed_info, game_id)
+    
+    @staticmethod
+    def _load_game_detailed_info(game_id: int) -> Optional[Dict[str, Any]]:
         try:
             db_generator = get_db()
             db = next(db_generator)
             
-            game = db.query(Game).filter(Game.id == game_id).first()
+            game = db.query(Game).options(WITH_PARTICIPANTS).filter(Game.id == game_id).first()
             if not game:
                 return None
             
+            # Время последней геолокации и количество фотографий по всем участникам
+            # собираются двумя агрегирующими запросами вместо запросов на каждого участника
+            latest_location_times = dict(
+                db.query(Location.user_id, func.max(Location.timestamp))
+                .filter(Location.game_id == game_id)
+                .group_by(Location.user_id)
+                .all()
+            )
+            photos_counts = dict(
+                db.query(Photo.user_id, func.count(Photo.id))
+                .filter(Photo.game_id == game_id)
+                .group_by(Photo.user_id)
+                .all()
+            )
+            
             # Участники с их ролями
             participants_info = []
             for participant in game.participants:
-                user = db.query(User).filter(User.id == participant.user_id).first()
+                user = participant.user
                 if user:
-                    # Последняя геолокация
-                    latest_location = db.query(Location).filter(
-                        Location.user_id == user.id,
-                        Location.game_id == game_id
-                    ).order_by(Location.timestamp.desc()).first()
-                    
-                    # Количество фотографий
-                    photos_count = db.query(Photo).filter(
-                        Photo.user_id == user.id,
-                        Photo.game_id == game_id
-                    ).count()
-                    
+                    last_location_time = latest_location_times.get(user.id)
                     participants_info.append({
                         "user_id": user.id,
                         "name": user.name,
@@ -117,9 +130,9 @@ class MonitoringService:
                         "role": participant.role.value if participant.role else "Не назначена",
                         "is_found": participant.is_found,
                         "found_at": participant.found_at,
-                        "has_location": latest_location is not None,
-                        "last_location_time": latest_location.timestamp if latest_location else None,
-                        "photos_count": photos_count
+                        "has_location": last_location_time is not None,
+                        "last_location_time": last_location_time,
+                        "photos_count": photos_counts.get(user.id, 0)
                     })
             
             return {
@@ -284,6 +297,9 @@ class MonitoringService:
                 Game, GameParticipant.game_id == Game.id
             ).join(
                 User, GameParticipant.user_id == User.id
+            ).options(
+                selectinload(GameParticipant.game),
+                selectinload(GameParticipant.user)
             ).order_by(desc(GameParticipant.id)).limit(limit // 2).all()
             
             for participation in recent_participations:
@@ -483,4 +499,17 @@ def format_msk_datetime(dt: datetime) -> str:
             f"⏰ {format_msk_datetime(game['scheduled_at'])}\n"
             f"👥 {game['participants']}/{game['max_participants']}\n"
             f"🚗 {game['drivers']} водителей"
-        ) 
\ No newline at end of file
+        ) 
+
+
+# Сводка состоит из простых значений: ожидающие вызовы получают её копии
+_game_info_flight = SingleFlight("get_game_detailed_info", restore=copy.deepcopy)
+
+
+def _forget_game_info_reads(changes: list) -> None:
+    """Сводки, начатые до фиксации изменений игр, не отдаются новым вызовам"""
+    if any(change.model in (Game, GameParticipant, User, Location, Photo) for change in changes):
+        _game_info_flight.forget()
+
+
+change_observers.append(_forget_game_info_reads)
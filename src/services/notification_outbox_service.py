@@ -0,0 +1,263 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.models.base import get_db
+from src.models.notification import NotificationOutbox
+from src.utils.broadcast import BroadcastMessage, send_message
+from src.utils.change_tracking import change_observers
+from src.utils.db_executor import run_db
+
+# Сколько записей очереди обрабатывать за один проход диспетчера
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", "100"))
+# Сколько раз пытаться отправить сообщение, прежде чем отметить его как failed
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "5"))
+# Пауза перед первой повторной попыткой (сек), дальше удваивается
+NOTIFICATION_RETRY_DELAY = float(os.getenv("NOTIFICATION_RETRY_DELAY", "10"))
+# Как часто проверять очередь без сигнала о новых записях (сек)
+NOTIFICATION_POLL_INTERVAL = float(os.getenv("NOTIFICATION_POLL_INTERVAL", "5"))
+# На сколько секунд взятая в отправку запись скрыта от следующих проходов:
+# если процесс остановится посреди отправки, запись будет отправлена снова
+NOTIFICATION_LEASE = float(os.getenv("NOTIFICATION_LEASE", "60"))
+
+PENDING = "pending"
+SENT = "sent"
+FAILED = "failed"
+
+# Функции, получающие (kind, result) по каждой обработанной записи очереди:
+# sent, retry, failed или expanded (рассылка по игре разложена на сообщения)
+outbox_observers = []
+
+# Запись, взятая в отправку: (id, kind, game_id, chat_id, text, payload)
+ClaimedMessage = Tuple[int, str, Optional[int], Optional[int], Optional[str], Optional[dict]]
+
+
+class NotificationOutboxService:
+    """Сервис очереди исходящих уведомлений"""
+
+    @staticmethod
+    def enqueue_game_notification(db: Session, game_id: int, kind: str, **payload) -> NotificationOutbox:
+        """
+        Постановка рассылки по игре в очередь. Запись добавляется в сессию вызывающего
+        и фиксируется его commit вместе с изменением состояния игры
+        """
+        message = NotificationOutbox(kind=kind, game_id=game_id, payload=payload or None)
+        db.add(message)
+        return message
+
+    @staticmethod
+    def enqueue_message(db: Session, chat_id: int, text: str, kind: str,
+                        game_id: Optional[int] = None, **options) -> NotificationOutbox:
+        """Постановка одного сообщения в очередь (commit делает вызывающий)"""
+        message = NotificationOutbox(kind=kind, game_id=game_id, chat_id=chat_id, text=text, payload=options or None)
+        db.add(message)
+        return message
+
+    @staticmethod
+    def retry_delay(attempts: int) -> timedelta:
+        """Пауза перед следующей попыткой после attempts неудачных"""
+        return timedelta(seconds=NOTIFICATION_RETRY_DELAY * 2 ** max(attempts - 1, 0))
+
+    @staticmethod
+    def claim_due_messages(limit: int = NOTIFICATION_BATCH_SIZE) -> List[ClaimedMessage]:
+        """
+        Взять в отправку записи, время которых пришло. Запись достается одному
+        экземпляру бота, даже если несколько диспетчеров разбирают очередь одновременно
+        """
+        db_generator = get_db()
+        db = next(db_generator)
+
+        try:
+            now = datetime.now()
+            lease_until = now + timedelta(seconds=NOTIFICATION_LEASE)
+            due = (NotificationOutbox.status == PENDING, NotificationOutbox.next_attempt_at <= now)
+            query = db.query(NotificationOutbox).filter(*due).order_by(NotificationOutbox.id).limit(limit)
+
+            if db.get_bind().dialect.name == "postgresql":
+                # Строки, которые прямо сейчас забирает другой экземпляр, пропускаем без ожидания
+                rows = query.with_for_update(skip_locked=True).all()
+                for row in rows:
+                    row.next_attempt_at = lease_until
+            else:
+                # SQLite выполняет записи по очереди: условный UPDATE атомарен, и запись,
+                # которую успел забрать другой экземпляр, уже не подходит под условие
+                rows = [
+                    row for row in query.all()
+                    if db.query(NotificationOutbox).filter(NotificationOutbox.id == row.id, *due).update(
+                        {"next_attempt_at": lease_until}, synchronize_session=False
+                    ) == 1
+                ]
+
+            claimed = [(row.id, row.kind, row.game_id, row.chat_id, row.text, row.payload) for row in rows]
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def expand_game_notification(message_id: int, messages: List[BroadcastMessage]) -> None:
+        """Замена рассылки по игре отдельными сообщениями получателям (одной транзакцией)"""
+        db_generator = get_db()
+        db = next(db_generator)
+
+        try:
+            row = db.get(NotificationOutbox, message_id)
+            if row is None or row.status != PENDING:
+                return
+
+            for message in messages:
+                db.add(NotificationOutbox(
+                    kind=row.kind,
+                    game_id=row.game_id,
+                    chat_id=message.chat_id,
+                    text=message.text,
+                    payload=message.options or None
+                ))
+            row.status = SENT
+            row.attempts += 1
+            row.sent_at = datetime.now()
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def record_results(results: List[Tuple[int, Optional[str], bool]]) -> List[Tuple[str, str]]:
+        """
+        Запись итогов отправки: (id, ошибка или None, повтор бесполезен).
+        Возвращает (kind, sent/retry/failed) по каждой записи
+        """
+        db_generator = get_db()
+        db = next(db_generator)
+
+        try:
+            now = datetime.now()
+            outcomes = []
+            for message_id, error, permanent in results:
+                row = db.get(NotificationOutbox, message_id)
+                if row is None:
+                    continue
+                row.attempts += 1
+                if error is None:
+                    row.status = SENT
+                    row.sent_at = now
+                    row.last_error = None
+                elif permanent or row.attempts >= NOTIFICATION_MAX_ATTEMPTS:
+                    row.status = FAILED
+                    row.last_error = error
+                    logger.error(f"Уведомление {row.id} ({row.kind}) не доставлено после {row.attempts} попыток: {error}")
+                else:
+                    row.next_attempt_at = now + NotificationOutboxService.retry_delay(row.attempts)
+                    row.last_error = error
+                outcomes.append((row.kind, row.status if row.status != PENDING else "retry"))
+            db.commit()
+            return outcomes
+        finally:
+            db.close()
+
+
+class NotificationDispatcher:
+    """
+    Фоновая отправка уведомлений из очереди пачками с повторами.
+    render(kind, game_id, payload) формирует сообщения рассылки по игре
+    """
+
+    def __init__(self, bot, render: Callable[[str, int, dict], List[BroadcastMessage]],
+                 batch_size: int = NOTIFICATION_BATCH_SIZE, poll_interval: float = NOTIFICATION_POLL_INTERVAL):
+        self.bot = bot
+        self.render = render
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._loop = None
+        self._wakeup = None
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запуск диспетчера в текущем цикле событий"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        change_observers.append(self._wake_on_new_messages)
+        logger.info("Диспетчер очереди уведомлений запущен")
+
+    def stop(self) -> None:
+        """Остановка диспетчера; неотправленные записи остаются в очереди"""
+        if self._wake_on_new_messages in change_observers:
+            change_observers.remove(self._wake_on_new_messages)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            logger.info("Диспетчер очереди уведомлений остановлен")
+
+    def wake(self) -> None:
+        """Начать проход по очереди, не дожидаясь интервала опроса (из любого потока)"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _wake_on_new_messages(self, changes: list) -> None:
+        if any(change.model is NotificationOutbox and change.operation == "new" for change in changes):
+            self.wake()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Ошибка обработки очереди уведомлений: {e}")
+                processed = 0
+            # Полная пачка - в очереди, скорее всего, есть еще записи
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def dispatch_once(self) -> int:
+        """Один проход по очереди; возвращает число обработанных записей"""
+        claimed = await run_db(NotificationOutboxService.claim_due_messages, self.batch_size)
+        results = []
+
+        # Рассылки по игре раскладываются на сообщения, которые уйдут следующим проходом
+        for message_id, kind, game_id, chat_id, _, payload in claimed:
+            if chat_id is not None:
+                continue
+            try:
+                messages = await run_db(self.render, kind, game_id, payload or {})
+                await run_db(NotificationOutboxService.expand_game_notification, message_id, messages)
+                _notify_observers([(kind, "expanded")])
+            except Exception as e:
+                logger.error(f"Ошибка подготовки рассылки {kind} для игры {game_id}: {e}")
+                results.append((message_id, str(e), False))
+
+        direct = [message for message in claimed if message[3] is not None]
+        outcomes = await asyncio.gather(*(
+            send_message(self.bot, chat_id, text, **(payload or {}))
+            for _, _, _, chat_id, text, payload in direct
+        ))
+        for (message_id, *_), outcome in zip(direct, outcomes):
+            error = None if outcome.message is not None else str(outcome.error or "сообщение не отправлено")
+            results.append((message_id, error, outcome.permanent))
+
+        if results:
+            _notify_observers(await run_db(NotificationOutboxService.record_results, results))
+        return len(claimed)
+
+
+def _notify_observers(outcomes: List[Tuple[str, str]]) -> None:
+    for kind, result in outcomes:
+        for observer in outbox_observers:
+            try:
+                observer(kind, result)
+            except Exception as e:
+                logger.error(f"Ошибка обработки итогов отправки уведомления {kind}: {e}")
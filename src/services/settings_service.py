@@ -1,12 +1,31 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict
+from types import MappingProxyType
 import json
 import os
+import threading
 from loguru import logger
 
 from src.models.base import get_db
 from src.models.settings import District, GameRule, RoleDisplay
 from src.models.user import UserRole
+from src.utils.change_tracking import change_observers
+
+
+class ReferenceData:
+    """Неизменяемый снимок справочников: районы, названия ролей и правила"""
+    
+    def __init__(self, districts: List[str], role_displays: List[RoleDisplay], game_rules: Optional[str]):
+        self.districts = tuple(districts)
+        self.role_names = MappingProxyType({rd.role: rd.display_name for rd in role_displays})
+        self.roles_by_name = MappingProxyType({rd.display_name: rd.role for rd in role_displays})
+        self.available_roles = tuple(rd.display_name for rd in role_displays)
+        self.game_rules = game_rules
+
+
+_reference_data: Optional[ReferenceData] = None
+_reference_data_lock = threading.Lock()
+
 
 class SettingsService:
     """Сервис для управления настройками системы"""
@@ -18,6 +37,40 @@ class SettingsService:
         UserRole.OBSERVER: "👁 Наблюдатель"
     }
     
+    @staticmethod
+    def reload_reference_data() -> ReferenceData:
+        """Перечитать справочники из БД и атомарно заменить снимок"""
+        global _reference_data
+        with _reference_data_lock:
+            SettingsService._get_or_create_default_districts()
+            SettingsService._get_or_create_default_role_displays()
+            
+            db_generator = get_db()
+            db = next(db_generator)
+            
+            districts = db.query(District.name).filter(District.is_active == True).order_by(District.name).all()
+            role_displays = db.query(RoleDisplay).order_by(RoleDisplay.id).all()
+            rule = db.query(GameRule).filter(GameRule.is_active == True).order_by(GameRule.version.desc()).first()
+            
+            _reference_data = ReferenceData(
+                [name for (name,) in districts],
+                role_displays,
+                rule.content if rule else None
+            )
+            logger.debug(
+                f"Справочники загружены: {len(_reference_data.districts)} районов, "
+                f"{len(_reference_data.role_names)} ролей"
+            )
+            return _reference_data
+    
+    @staticmethod
+    def get_reference_data() -> ReferenceData:
+        """Текущий снимок справочников (загружается при первом обращении)"""
+        reference_data = _reference_data
+        if reference_data is None:
+            reference_data = SettingsService.reload_reference_data()
+        return reference_data
+    
     @staticmethod
     def _get_or_create_default_districts() -> None:
         """Создает дефолтные районы если их нет в БД"""
@@ -55,13 +108,7 @@ class SettingsService:
     @staticmethod
     def get_districts() -> List[str]:
         """Получение списка активных районов"""
-        SettingsService._get_or_create_default_districts()
-        
-        db_generator = get_db()
-        db = next(db_generator)
-        
-        districts = db.query(District).filter(District.is_active == True).order_by(District.name).all()
-        return [district.name for district in districts]
+        return list(SettingsService.get_reference_data().districts)
     
     @staticmethod
     def get_all_districts() -> List[District]:
@@ -76,39 +123,20 @@ class SettingsService:
     @staticmethod
     def get_available_roles() -> List[str]:
         """Получение списка доступных ролей"""
-        SettingsService._get_or_create_default_role_displays()
-        
-        db_generator = get_db()
-        db = next(db_generator)
-        
-        role_displays = db.query(RoleDisplay).all()
-        return [role_display.display_name for role_display in role_displays]
+        return list(SettingsService.get_reference_data().available_roles)
     
     @staticmethod
     def get_role_display_name(role: UserRole) -> str:
         """Получить отображаемое имя для роли"""
-        SettingsService._get_or_create_default_role_displays()
-        
-        db_generator = get_db()
-        db = next(db_generator)
-        
-        role_display = db.query(RoleDisplay).filter(RoleDisplay.role == role).first()
-        if role_display:
-            return role_display.display_name
+        display_name = SettingsService.get_reference_data().role_names.get(role)
+        if display_name:
+            return display_name
         return SettingsService.DEFAULT_ROLE_DISPLAYS.get(role, str(role))
     
     @staticmethod
     def get_role_from_display_name(display_name: str) -> Optional[UserRole]:
         """Получить роль из отображаемого имени"""
-        SettingsService._get_or_create_default_role_displays()
-        
-        db_generator = get_db()
-        db = next(db_generator)
-        
-        role_display = db.query(RoleDisplay).filter(RoleDisplay.display_name == display_name).first()
-        if role_display:
-            return role_display.role
-        return None
+        return SettingsService.get_reference_data().roles_by_name.get(display_name)
     
     @staticmethod
     def update_role_display(role: UserRole, new_display_name: str) -> bool:
@@ -125,6 +153,7 @@ class SettingsService:
                 db.add(role_display)
             
             db.commit()
+            SettingsService.reload_reference_data()
             logger.info(f"Обновлено отображение роли {role}: {new_display_name}")
             return True
         except Exception as e:
@@ -145,6 +174,7 @@ class SettingsService:
                     # Реактивируем неактивный район
                     existing.is_active = True
                     db.commit()
+                    SettingsService.reload_reference_data()
                     logger.info(f"Реактивирован район: {district_name}")
                     return True
                 else:
@@ -155,6 +185,7 @@ class SettingsService:
             district = District(name=district_name, is_active=True)
             db.add(district)
             db.commit()
+            SettingsService.reload_reference_data()
             
             logger.info(f"Добавлен новый район: {district_name}")
             return True
@@ -176,6 +207,7 @@ class SettingsService:
             
             district.is_active = False
             db.commit()
+            SettingsService.reload_reference_data()
             
             logger.info(f"Район {district_name} деактивирован")
             return True
@@ -186,11 +218,7 @@ class SettingsService:
     @staticmethod
     def get_game_rules() -> str:
         """Получение активных правил игры"""
-        db_generator = get_db()
-        db = next(db_generator)
-        
-        rule = db.query(GameRule).filter(GameRule.is_active == True).order_by(GameRule.version.desc()).first()
-        return rule.content if rule else "Правила не найдены"
+        return SettingsService.get_reference_data().game_rules or "Правила не найдены"
     
     @staticmethod
     def update_game_rules(new_rules: str) -> bool:
@@ -210,9 +238,24 @@ class SettingsService:
             new_rule = GameRule(content=new_rules, version=new_version, is_active=True)
             db.add(new_rule)
             db.commit()
+            SettingsService.reload_reference_data()
             
             logger.info(f"Правила игры обновлены до версии {new_version}")
             return True
         except Exception as e:
             logger.error(f"Ошибка при обновлении правил: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _reset_reference_data(changes: list) -> None:
+    """
+    Справочники, измененные в другом процессе бота (изменения приходят через общий
+    кэш), перечитываются при следующем обращении. Без блокировки: reload_reference_data
+    может сам фиксировать дефолтные значения, держа _reference_data_lock
+    """
+    global _reference_data
+    if any(change.model in (District, GameRule, RoleDisplay) for change in changes):
+        _reference_data = None
+
+
+change_observers.append(_reset_reference_data)
@@ -1,15 +1,37 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Set
 from datetime import datetime
 from loguru import logger
 from sqlalchemy.orm import selectinload
 import logging
+import os
+import threading
 from src.models.base import get_db
 from src.models.user import User
 from src.models.game import Game, GameStatus, GameParticipant, GameRole
+from src.services.game_service import GameService, PARTICIPANT_COLUMNS
 from src.services.user_service import UserService
+from src.utils.cache_backend import create_cache
+from src.utils.change_tracking import change_observers
+from src.utils.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Кэш контекста по telegram_id: хранит значения колонок игры, её участников и их
+# пользователей; записи помечены тегами "game:<id>" и "user:<user.id>" и сбрасываются
+# после фиксации изменений игр и участий (с CACHE_BACKEND=redis - в любом процессе бота)
+USER_CONTEXT_CACHE_SIZE = int(os.getenv("USER_CONTEXT_CACHE_SIZE", "10000"))
+USER_CONTEXT_CACHE_TTL = float(os.getenv("USER_CONTEXT_CACHE_TTL", "300"))
+context_cache = create_cache("user_contexts", maxsize=USER_CONTEXT_CACHE_SIZE, ttl=USER_CONTEXT_CACHE_TTL)
+
+# Сколько секунд после завершения игра считается "недавно завершенной"
+RECENTLY_FINISHED_SECONDS = 60 * 5
+
+# Поколение увеличивается при каждом сбросе, чтобы не сохранить контекст,
+# прочитанный до фиксации изменений, которые уже его сбросили
+_context_lock = threading.Lock()
+_context_generation = 0
+
+
 class UserGameContext:
     """Класс для хранения контекста игрока"""
     
@@ -32,95 +54,260 @@ class UserContextService:
     
     @staticmethod
     def get_user_game_context(user_id: int) -> UserGameContext:
-        """Определить текущий игровой контекст пользователя"""
-        db_generator = get_db()
-        db = next(db_generator)
+        """Определить текущий игровой контекст пользователя (через кэш)"""
         if not isinstance(user_id, int):
             logger.error(f"Некорректный тип user_id: {user_id} (тип {type(user_id)})")
             return UserGameContext(UserContextService.STATUS_NORMAL)
+        
+        snapshot = context_cache.get(user_id)
+        if snapshot is not None:
+            return UserContextService._restore_context(snapshot)
+        
+        return UserContextService._load_shared_context(user_id)
+    
+    @staticmethod
+    def get_context_snapshot(user_id: int) -> dict:
+        """
+        Снимок контекста (значения колонок игры и участия) без восстановления объектов -
+        для горячих путей вроде главной клавиатуры, которым нужны только статусы и флаги
+        """
+        if not isinstance(user_id, int):
+            return UserContextService._snapshot_context(UserContextService.get_user_game_context(user_id))
+
+        snapshot = context_cache.get(user_id)
+        if snapshot is None:
+            context = UserContextService._load_shared_context(user_id)
+            snapshot = UserContextService._snapshot_context(context)
+        return snapshot
+    
+    @staticmethod
+    def _load_shared_context(user_id: int) -> UserGameContext:
+        """
+        Загрузка контекста, общая для одновременных запросов одного пользователя.
+        Поколение входит в ключ: запрос после сброса кэша не ждет чтение, начатое до него
+        """
+        generation = _context_generation
+        return _context_flight.do(
+            (user_id, generation), UserContextService._load_user_game_context, user_id, generation
+        )
+    
+    @staticmethod
+    def _load_user_game_context(user_id: int, generation: int) -> UserGameContext:
+        """Определить контекст по БД и сохранить его снимок в кэш"""
+        db_generator = get_db()
+        db = next(db_generator)
         try:
             # Получаем пользователя
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = UserService.get_cached_user(user_id)
             if not user:
                 logger.warning(f"Пользователь с telegram_id {user_id} не найден")
                 return UserGameContext(UserContextService.STATUS_NORMAL)
             
             # Находим все участия пользователя с релевантными статусами
-            all_participations = db.query(GameParticipant)\
-                .join(Game)\
-                .options(selectinload(GameParticipant.game).selectinload(Game.participants))\
-                .filter(
-                    GameParticipant.user_id == user.id,
-                    Game.status.in_([
-                        GameStatus.RECRUITING,
-                        GameStatus.UPCOMING, 
-                        GameStatus.HIDING_PHASE,
-                        GameStatus.SEARCHING_PHASE,
-                        GameStatus.COMPLETED
-                    ])
-                )\
-                .order_by(Game.scheduled_at.desc())\
-                .all()
-            
-            if not all_participations:
-                return UserGameContext(UserContextService.STATUS_NORMAL)
-            
-            # Разделяем участия по приоритету статусов
-            active_games = []        # HIDING_PHASE, SEARCHING_PHASE
-            upcoming_games = []      # RECRUITING, UPCOMING  
-            completed_games = []     # COMPLETED
+            all_participations = UserContextService._query_participations(db, [user.id])
             
-            for participation in all_participations:
-                game = participation.game
-                if game.status in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
-                    active_games.append(participation)
-                elif game.status in [GameStatus.RECRUITING, GameStatus.UPCOMING]:
-                    upcoming_games.append(participation)
-                elif game.status == GameStatus.COMPLETED:
-                    completed_games.append(participation)
+            context = UserContextService._select_context(all_participations)
+            UserContextService._store_context(
+                user_id, user.id, context,
+                {participation.game_id for participation in all_participations},
+                generation
+            )
+            return context
             
-            # Проверяем по приоритету
+        except Exception as e:
+            logger.error(f"Ошибка при определении контекста пользователя {user_id}: {e}")
+            return UserGameContext(UserContextService.STATUS_NORMAL)
+    
+    @staticmethod
+    def get_context_snapshots(user_ids: List[int]) -> Dict[int, dict]:
+        """
+        Снимки контекстов нескольких пользователей (по telegram_id): промахи кэша
+        загружаются вместе - одним запросом пользователей и одним запросом участий
+        """
+        snapshots = {}
+        missing = []
+        for user_id in user_ids:
+            snapshot = context_cache.get(user_id)
+            if snapshot is not None:
+                snapshots[user_id] = snapshot
+            else:
+                missing.append(user_id)
+        if not missing:
+            return snapshots
+        
+        generation = _context_generation
+        db_generator = get_db()
+        db = next(db_generator)
+        try:
+            users = db.query(User).filter(User.telegram_id.in_(missing)).all()
+            participations_by_user = {user.id: [] for user in users}
+            for participation in UserContextService._query_participations(db, list(participations_by_user)):
+                participations_by_user[participation.user_id].append(participation)
             
-            # 1. Активные игры (наивысший приоритет)
-            if active_games:
-                # Берем самую последнюю по времени планирования среди активных
-                latest_active = max(active_games, key=lambda p: p.game.scheduled_at)
-                return UserGameContext(
-                    UserContextService.STATUS_IN_GAME,
-                    latest_active.game,
-                    latest_active
+            for user in users:
+                participations = participations_by_user[user.id]
+                context = UserContextService._select_context(participations)
+                UserContextService._store_context(
+                    user.telegram_id, user.id, context,
+                    {participation.game_id for participation in participations},
+                    generation
                 )
+                snapshots[user.telegram_id] = UserContextService._snapshot_context(context)
+        except Exception as e:
+            logger.error(f"Ошибка при определении контекстов пользователей {missing}: {e}")
+        
+        for user_id in missing:
+            snapshots.setdefault(user_id, UserContextService._snapshot_context(UserGameContext(UserContextService.STATUS_NORMAL)))
+        return snapshots
+    
+    @staticmethod
+    def _query_participations(db, user_db_ids: List[int]) -> list:
+        """Участия пользователей в играх с релевантными статусами, от поздних игр к ранним"""
+        return db.query(GameParticipant)\
+            .join(Game)\
+            .options(
+                selectinload(GameParticipant.game)
+                .selectinload(Game.participants)
+                .selectinload(GameParticipant.user)
+            )\
+            .filter(
+                GameParticipant.user_id.in_(user_db_ids),
+                Game.status.in_([
+                    GameStatus.RECRUITING,
+                    GameStatus.UPCOMING, 
+                    GameStatus.HIDING_PHASE,
+                    GameStatus.SEARCHING_PHASE,
+                    GameStatus.COMPLETED
+                ])
+            )\
+            .order_by(Game.scheduled_at.desc())\
+            .all()
+    
+    @staticmethod
+    def _select_context(all_participations: list) -> UserGameContext:
+        """Выбрать контекст по приоритету статусов игр пользователя"""
+        if not all_participations:
+            return UserGameContext(UserContextService.STATUS_NORMAL)
+        
+        # Разделяем участия по приоритету статусов
+        active_games = []        # HIDING_PHASE, SEARCHING_PHASE
+        upcoming_games = []      # RECRUITING, UPCOMING  
+        completed_games = []     # COMPLETED
+        
+        for participation in all_participations:
+            game = participation.game
+            if game.status in [GameStatus.HIDING_PHASE, GameStatus.SEARCHING_PHASE]:
+                active_games.append(participation)
+            elif game.status in [GameStatus.RECRUITING, GameStatus.UPCOMING]:
+                upcoming_games.append(participation)
+            elif game.status == GameStatus.COMPLETED:
+                completed_games.append(participation)
+        
+        # Проверяем по приоритету
+        
+        # 1. Активные игры (наивысший приоритет)
+        if active_games:
+            # Берем самую последнюю по времени планирования среди активных
+            latest_active = max(active_games, key=lambda p: p.game.scheduled_at)
+            return UserGameContext(
+                UserContextService.STATUS_IN_GAME,
+                latest_active.game,
+                latest_active
+            )
+        
+        # 2. Предстоящие игры
+        if upcoming_games:
+            # Берем самую ближайшую предстоящую игру
+            nearest_upcoming = min(upcoming_games, key=lambda p: p.game.scheduled_at)
+            return UserGameContext(
+                UserContextService.STATUS_REGISTERED,
+                nearest_upcoming.game,
+                nearest_upcoming
+            )
+        
+        # 3. Недавно завершенные игры
+        if completed_games:
+            # Берем самую последнюю завершенную
+            latest_completed = max(completed_games, key=lambda p: p.game.scheduled_at)
+            game = latest_completed.game
             
-            # 2. Предстоящие игры
-            if upcoming_games:
-                # Берем самую ближайшую предстоящую игру
-                nearest_upcoming = min(upcoming_games, key=lambda p: p.game.scheduled_at)
+            # Проверяем, завершена ли игра недавно (в последние 5 минут)
+            if game.ended_at and \
+               (datetime.now() - game.ended_at).total_seconds() < RECENTLY_FINISHED_SECONDS:
                 return UserGameContext(
-                    UserContextService.STATUS_REGISTERED,
-                    nearest_upcoming.game,
-                    nearest_upcoming
+                    UserContextService.STATUS_GAME_FINISHED,
+                    game,
+                    latest_completed
                 )
-            
-            # 3. Недавно завершенные игры
-            if completed_games:
-                # Берем самую последнюю завершенную
-                latest_completed = max(completed_games, key=lambda p: p.game.scheduled_at)
-                game = latest_completed.game
-                
-                # Проверяем, завершена ли игра недавно (в последние 5 минут)
-                if game.ended_at and \
-                   (datetime.now() - game.ended_at).total_seconds() < 60*5:
-                    return UserGameContext(
-                        UserContextService.STATUS_GAME_FINISHED,
-                        game,
-                        latest_completed
-                    )
-            
-            return UserGameContext(UserContextService.STATUS_NORMAL)
-            
-        except Exception as e:
-            logger.error(f"Ошибка при определении контекста пользователя {user_id}: {e}")
-            return UserGameContext(UserContextService.STATUS_NORMAL)
+        
+        return UserGameContext(UserContextService.STATUS_NORMAL)
+    
+    @staticmethod
+    def _snapshot_context(context: UserGameContext) -> dict:
+        """Значения колонок контекста, не зависящие от сессии"""
+        snapshot = {"status": context.status, "game": None, "participants": [], "participant": None}
+        if context.game is not None:
+            snapshot.update(GameService.snapshot_game(context.game))
+        if context.participant is not None:
+            snapshot["participant"] = {key: getattr(context.participant, key) for key in PARTICIPANT_COLUMNS}
+        return snapshot
+    
+    @staticmethod
+    def _restore_context(snapshot: dict) -> UserGameContext:
+        """Контекст из снимка: отсоединенные копии игры, участников и их пользователей"""
+        if snapshot["game"] is None:
+            return UserGameContext(snapshot["status"])
+        
+        game = GameService.restore_game(snapshot)
+        own_participant_id = snapshot["participant"]["id"] if snapshot["participant"] else None
+        own_participant = next(
+            (participant for participant in game.participants if participant.id == own_participant_id), None
+        )
+        return UserGameContext(snapshot["status"], game, own_participant)
+    
+    @staticmethod
+    def _store_context(telegram_id: int, user_db_id: int, context: UserGameContext,
+                       game_ids: Set[int], generation: int) -> None:
+        ttl = None
+        if context.status == UserContextService.STATUS_GAME_FINISHED:
+            # Запись живет, пока игра считается недавно завершенной
+            ttl = RECENTLY_FINISHED_SECONDS - (datetime.now() - context.game.ended_at).total_seconds()
+            if ttl <= 0:
+                return
+        snapshot = UserContextService._snapshot_context(context)
+        
+        with _context_lock:
+            if generation != _context_generation:
+                # Пока контекст читался, были зафиксированы изменения игр
+                return
+            tags = [f"user:{user_db_id}", *(f"game:{game_id}" for game_id in game_ids)]
+            context_cache.set(telegram_id, snapshot, ttl=ttl, tags=tags)
+    
+    @staticmethod
+    def invalidate_user_context(telegram_id: int) -> None:
+        """Сбросить контекст пользователя"""
+        global _context_generation
+        with _context_lock:
+            _context_generation += 1
+            context_cache.invalidate(telegram_id)
+    
+    @staticmethod
+    def invalidate_contexts(game_ids: Set[int] = frozenset(), user_ids: Set[int] = frozenset()) -> None:
+        """Сбросить контексты участников игр и пользователей (по user.id)"""
+        global _context_generation
+        with _context_lock:
+            _context_generation += 1
+            context_cache.invalidate_tags(
+                [f"game:{game_id}" for game_id in game_ids] + [f"user:{user_db_id}" for user_db_id in user_ids]
+            )
+    
+    @staticmethod
+    def clear_cache() -> None:
+        """Сбросить все контексты"""
+        global _context_generation
+        with _context_lock:
+            _context_generation += 1
+            context_cache.clear()
     
     @staticmethod
     def get_user_current_game(user_id: int) -> Optional[Game]:
@@ -249,4 +436,37 @@ class UserContextService:
         ]
         info["total_upcoming_games"] = len(upcoming_games)
         
-        return info 
\ No newline at end of file
+        return info
+
+
+def _invalidate_changed_contexts(changes: list) -> None:
+    """
+    Сброс контекстов по изменениям, записанным в любой сессии: вступление и выход
+    из игры, назначение ролей, смена фаз, отметки "найден"/"спрятался"
+    """
+    game_ids, user_ids = set(), set()
+    for change in changes:
+        if change.model is Game:
+            game_ids.add(change.identity[0])
+        elif change.model is GameParticipant:
+            game_id = change.values.get("game_id")
+            user_id = change.values.get("user_id")
+            if game_id is None or user_id is None:
+                # Неизвестно, чьи контексты затронуты - сбрасываем все
+                UserContextService.clear_cache()
+                return
+            game_ids.add(game_id)
+            user_ids.add(user_id)
+        elif change.model is User:
+            user_ids.add(change.identity[0])
+    if game_ids or user_ids:
+        UserContextService.invalidate_contexts(game_ids, user_ids)
+
+
+change_observers.append(_invalidate_changed_contexts)
+
+_context_flight = SingleFlight(
+    "get_user_game_context",
+    share=UserContextService._snapshot_context,
+    restore=UserContextService._restore_context,
+)
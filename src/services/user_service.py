@@ -1,24 +1,115 @@
 from src.models.game import GameParticipant
-from sqlalchemy.orm import Session
+from sqlalchemy import select, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
 from typing import Optional, List, Tuple
 import os
 from loguru import logger
 
-from src.models.base import get_db
+from src.models.base import get_db, get_async_db
 from src.models.user import User, UserRole
+from src.utils.cache_backend import create_cache
+
+# Кэш пользователей по telegram_id: хранит значения колонок, а не объекты сессии
+# (с CACHE_BACKEND=redis - общий для всех процессов бота)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+user_cache = create_cache("users", maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+USER_COLUMNS = [attribute.key for attribute in inspect(User).column_attrs]
 
 class UserService:
     """Сервис для работы с пользователями"""
     
+    @staticmethod
+    def _cache_user(user: Optional[User]) -> None:
+        values = UserService._user_values(user)
+        if values is not None:
+            user_cache.set(user.telegram_id, values)
+    
+    @staticmethod
+    def _get_user_from_cache(telegram_id: int) -> Optional[User]:
+        """Отсоединенная копия пользователя из кэша"""
+        return UserService._restore_user(user_cache.get(telegram_id))
+    
+    @staticmethod
+    def _user_values(user: Optional[User]) -> Optional[dict]:
+        return {key: getattr(user, key) for key in USER_COLUMNS} if isinstance(user, User) else None
+    
+    @staticmethod
+    def _restore_user(values: Optional[dict]) -> Optional[User]:
+        if values is None:
+            return None
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+    
+    @staticmethod
+    async def _cache_user_async(user: Optional[User]) -> None:
+        values = UserService._user_values(user)
+        if values is not None:
+            await user_cache.set_async(user.telegram_id, values)
+    
+    @staticmethod
+    async def _get_user_from_cache_async(telegram_id: int) -> Optional[User]:
+        """Отсоединенная копия пользователя из кэша (без блокировки цикла событий)"""
+        return UserService._restore_user(await user_cache.get_async(telegram_id))
+    
+    @staticmethod
+    def invalidate_user_cache(telegram_id: int) -> None:
+        user_cache.invalidate(telegram_id)
+    
+    @staticmethod
+    def get_cached_user(telegram_id: int) -> Optional[User]:
+        """Получение пользователя по Telegram ID без его участий в играх (через кэш)"""
+        user = UserService._get_user_from_cache(telegram_id)
+        if user is not None:
+            return user
+        
+        db_generator = get_db()
+        db = next(db_generator)
+        user = db.query(User).filter(User.telegram_id == telegram_id).first()
+        UserService._cache_user(user)
+        return user
+    
+    @staticmethod
+    async def get_cached_user_async(telegram_id: int) -> Optional[User]:
+        """Получение пользователя по Telegram ID без его участий в играх (через кэш, асинхронно)"""
+        user = await UserService._get_user_from_cache_async(telegram_id)
+        if user is not None:
+            return user
+        
+        async with get_async_db() as db:
+            result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+            user = result.scalars().first()
+        await UserService._cache_user_async(user)
+        return user
+    
     @staticmethod
     def get_user_by_telegram_id(telegram_id: int) -> Tuple[User, List[GameParticipant]]:
         """Получение пользователя по Telegram ID"""
         db_generator = get_db()
         db = next(db_generator)
-        user = db.query(User).filter(User.telegram_id == telegram_id).first()
+        user = UserService._get_user_from_cache(telegram_id)
+        if user is None:
+            user = db.query(User).filter(User.telegram_id == telegram_id).first()
+            UserService._cache_user(user)
         participations = db.query(GameParticipant).filter(GameParticipant.user_id == user.id).all() if user else []
         return user, participations
     
+    @staticmethod
+    async def get_user_by_telegram_id_async(telegram_id: int) -> Tuple[User, List[GameParticipant]]:
+        """Получение пользователя по Telegram ID (асинхронно)"""
+        async with get_async_db() as db:
+            user = await UserService._get_user_from_cache_async(telegram_id)
+            if user is None:
+                result = await db.execute(select(User).where(User.telegram_id == telegram_id))
+                user = result.scalars().first()
+                await UserService._cache_user_async(user)
+            if not user:
+                return None, []
+            result = await db.execute(select(GameParticipant).where(GameParticipant.user_id == user.id))
+            return user, list(result.unique().scalars().all())
+    
     @staticmethod
     def get_user_by_id(user_id: int) -> Tuple[User, List[GameParticipant]]:
         """Получение пользователя по внутреннему ID"""
@@ -62,6 +153,7 @@ class UserService:
             db.add(user)
             db.commit()
             db.refresh(user)
+            UserService.invalidate_user_cache(telegram_id)
             
             logger.info(f"Создан новый пользователь: {user.id} ({user.name})")
             return True
@@ -79,12 +171,15 @@ class UserService:
         if not user:
             return None
         
+        previous_telegram_id = user.telegram_id
         for key, value in kwargs.items():
             if hasattr(user, key):
                 setattr(user, key, value)
         
         db.commit()
         db.refresh(user)
+        UserService.invalidate_user_cache(previous_telegram_id)
+        UserService.invalidate_user_cache(user.telegram_id)
         
         return user
     
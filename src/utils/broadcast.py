@@ -0,0 +1,194 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from loguru import logger
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+
+# Лимиты Telegram Bot API: около 30 сообщений в секунду на бота,
+# 1 сообщение в секунду в один чат и 20 сообщений в минуту в группу
+BROADCAST_GLOBAL_RATE = float(os.getenv("BROADCAST_GLOBAL_RATE", "30"))
+BROADCAST_CHAT_RATE = float(os.getenv("BROADCAST_CHAT_RATE", "1"))
+BROADCAST_GROUP_RATE_PER_MINUTE = float(os.getenv("BROADCAST_GROUP_RATE_PER_MINUTE", "20"))
+# Сколько раз повторять отправку после RetryAfter или сетевой ошибки
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+
+# Функции, получающие BroadcastResult после каждой рассылки (например, метрики)
+broadcast_observers = []
+
+# Сколько ведер отдельных чатов хранить, прежде чем выбросить неиспользуемые
+_CHAT_BUCKETS_LIMIT = 10000
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity подряд"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Забрать токен и вернуть, сколько секунд ждать до его появления.
+        Токены можно занимать в долг: одновременные отправки выстраиваются в очередь
+        без опроса, каждая ждет свою долю
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def hold(self, until: float) -> None:
+        """Не выдавать токены до момента until: за паузу ведро не наполняется"""
+        self.tokens = min(self.tokens, 0.0)
+        self.updated = max(self.updated, until)
+
+    def is_idle(self) -> bool:
+        """Ведро успело наполниться: его можно выбросить без потери ограничения"""
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """Ограничение частоты отправки: общее для бота, по чатам и по группам"""
+
+    def __init__(self, global_rate: float = BROADCAST_GLOBAL_RATE, chat_rate: float = BROADCAST_CHAT_RATE,
+                 group_rate_per_minute: float = BROADCAST_GROUP_RATE_PER_MINUTE):
+        self.chat_rate = chat_rate
+        self.group_rate = min(chat_rate, group_rate_per_minute / 60)
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[int, TokenBucket] = {}
+        self._paused_until = 0.0
+
+    async def acquire(self, chat_id: int) -> None:
+        """Дождаться права на отправку в чат"""
+        # Сначала очередь чата, затем общая: ожидание своего чата не занимает общий лимит
+        await _sleep(self._chat_bucket(chat_id).reserve())
+        while True:
+            await _sleep(self._global.reserve())
+            paused_for = self._paused_until - time.monotonic()
+            if paused_for <= 0:
+                return
+            # Место в общей очереди, занятое до паузы, сгорает: после паузы отправки
+            # снова идут с общим лимитом, а не все разом в момент ее окончания
+            await _sleep(paused_for)
+
+    def pause(self, seconds: float) -> None:
+        """Остановить все отправки (Telegram ответил RetryAfter)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._global.hold(self._paused_until)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _CHAT_BUCKETS_LIMIT:
+                self._chats = {key: value for key, value in self._chats.items() if not value.is_idle()}
+            # Отрицательные chat_id - группы и каналы
+            bucket = self._chats[chat_id] = TokenBucket(self.group_rate if chat_id < 0 else self.chat_rate, 1)
+        return bucket
+
+
+rate_limiter = RateLimiter()
+
+
+class BroadcastMessage(NamedTuple):
+    """Сообщение рассылки: chat_id, текст и дополнительные параметры send_message"""
+    chat_id: int
+    text: str
+    options: Optional[Dict[str, Any]] = None
+
+
+class SendResult(NamedTuple):
+    """Итог отправки одного сообщения: сообщение (None при ошибке), число повторов и ошибка"""
+    message: Optional[Any]
+    retries: int
+    error: Optional[Exception] = None
+
+    @property
+    def permanent(self) -> bool:
+        """Повторная отправка не поможет: чат недоступен или запрос неверен"""
+        return isinstance(self.error, (BadRequest, Forbidden))
+
+
+class BroadcastResult(NamedTuple):
+    """Итог рассылки"""
+    name: str
+    total: int
+    sent: int
+    failed: int
+    retries: int
+    duration: float
+    failed_chats: tuple = ()  # chat_id сообщений, которые не удалось отправить
+
+
+async def send_message(bot, chat_id: int, text: str, **options) -> SendResult:
+    """
+    Отправка одного сообщения с учетом лимитов Telegram: ждет свою очередь,
+    после RetryAfter приостанавливает все отправки и повторяет попытку
+    """
+    retries = 0
+    while True:
+        await rate_limiter.acquire(chat_id)
+        try:
+            return SendResult(await bot.send_message(chat_id=chat_id, text=text, **options), retries)
+        except RetryAfter as e:
+            if retries >= BROADCAST_MAX_RETRIES:
+                logger.error(f"Сообщение в чат {chat_id} не отправлено: превышен лимит Telegram ({e})")
+                return SendResult(None, retries, e)
+            retries += 1
+            logger.warning(f"Telegram просит подождать {e.retry_after} сек перед отправкой в чат {chat_id}")
+            rate_limiter.pause(_seconds(e.retry_after))
+        except (BadRequest, Forbidden, TimedOut) as e:
+            # Повтор не поможет (или сообщение могло уже дойти - TimedOut)
+            logger.error(f"Ошибка отправки сообщения в чат {chat_id}: {e}")
+            return SendResult(None, retries, e)
+        except NetworkError as e:
+            if retries >= BROADCAST_MAX_RETRIES:
+                logger.error(f"Ошибка сети при отправке сообщения в чат {chat_id}: {e}")
+                return SendResult(None, retries, e)
+            retries += 1
+            await asyncio.sleep(2 ** retries)
+        except Exception as e:
+            logger.error(f"Ошибка отправки сообщения в чат {chat_id}: {e}")
+            return SendResult(None, retries, e)
+
+
+async def broadcast(bot, messages: Iterable[BroadcastMessage], name: str) -> BroadcastResult:
+    """Одновременная отправка сообщений в пределах лимитов Telegram"""
+    messages = list(messages)
+    started_at = time.monotonic()
+    outcomes = await asyncio.gather(*(
+        send_message(bot, message.chat_id, message.text, **(message.options or {}))
+        for message in messages
+    ))
+    sent = sum(1 for outcome in outcomes if outcome.message is not None)
+    result = BroadcastResult(
+        name=name,
+        total=len(messages),
+        sent=sent,
+        failed=len(messages) - sent,
+        retries=sum(outcome.retries for outcome in outcomes),
+        duration=time.monotonic() - started_at,
+        failed_chats=tuple(message.chat_id for message, outcome in zip(messages, outcomes) if outcome.message is None),
+    )
+    if messages:
+        logger.info(f"Рассылка {name}: отправлено {result.sent}/{result.total} за {result.duration:.1f} сек")
+    for observer in broadcast_observers:
+        try:
+            observer(result)
+        except Exception as e:
+            logger.error(f"Ошибка обработки итогов рассылки {name}: {e}")
+    return result
+
+
+async def _sleep(seconds: float) -> None:
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+
+
+def _seconds(retry_after) -> float:
+    """retry_after - число секунд или timedelta (в новых версиях python-telegram-bot)"""
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
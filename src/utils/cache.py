@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+
+from loguru import logger
+
+# Функции, получающие (имя кэша, попадание) при каждом обращении (например, метрики)
+cache_observers = []
+
+_MISSING = object()
+
+
+def notify_cache_request(name: str, hit: bool) -> None:
+    for observer in cache_observers:
+        try:
+            observer(name, hit)
+        except Exception as e:
+            logger.error(f"Ошибка обработки обращения к кэшу {name}: {e}")
+
+
+class TTLCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением времени жизни записей.
+    Записи можно пометить тегами (например, "game:5"), чтобы сбрасывать их группами
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение по ключу или default, если записи нет или она устарела"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        self._notify(entry is not _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        """Сохранить значение; ttl переопределяет время жизни записи по умолчанию"""
+        tags = tuple(tags)
+        with self._lock:
+            self._remove(key)
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        """get для корутин: кэш в памяти не блокирует цикл событий"""
+        return self.get(key, default)
+
+    async def set_async(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        self.set(key, value, ttl=ttl, tags=tags)
+
+    async def invalidate_async(self, key: Hashable) -> None:
+        self.invalidate(key)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        """Сбросить все записи, помеченные любым из тегов"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _notify(self, hit: bool) -> None:
+        notify_cache_request(self.name, hit)
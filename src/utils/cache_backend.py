@@ -0,0 +1,377 @@
+import asyncio
+import enum
+import functools
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from loguru import logger
+
+from src.utils.cache import TTLCache, notify_cache_request
+from src.utils.change_tracking import ModelChange, change_publishers, notify_change_observers
+
+# Где хранить кэши пользователей и игровых контекстов: "memory" - в памяти процесса,
+# "redis" - в Redis, общем для всех процессов бота (REDIS_URL)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Префикс ключей и канала: разные боты могут работать с одним Redis
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "pryton")
+
+# Функции, получающие результат каждой рассылки изменений другим процессам ("ok" или "error"),
+# например, метрики: при ошибке другие процессы держат устаревшие снимки до истечения TTL
+change_publish_observers = []
+
+_MISSING = object()
+
+# Метки типов, которых нет в JSON
+_TAGS = ("__datetime__", "__date__", "__enum__", "__model__", "__tuple__", "__items__")
+
+
+@functools.lru_cache(maxsize=1)
+def _known_types() -> Dict[str, type]:
+    """
+    Классы, которые можно восстановить из Redis: модели и перечисления их колонок.
+    Из общего хранилища читаются только данные - произвольные классы не создаются
+    """
+    import src.models  # noqa: F401 - регистрирует все модели
+    from src.models.base import Base
+
+    types = {}
+    for mapper in Base.registry.mappers:
+        types[mapper.class_.__name__] = mapper.class_
+        for column in mapper.columns:
+            enum_class = getattr(column.type, "enum_class", None)
+            if enum_class is not None:
+                types[enum_class.__name__] = enum_class
+    return types
+
+
+def _encode(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, enum.Enum):
+        return {"__enum__": type(value).__name__, "value": _encode(value.value)}
+    if isinstance(value, type) and _known_types().get(value.__name__) is value:
+        return {"__model__": value.__name__}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and key not in _TAGS for key in value):
+            return {key: _encode(item) for key, item in value.items()}
+        return {"__items__": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    raise TypeError(f"Тип {type(value).__name__} нельзя сохранить в Redis")
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__date__" in value:
+        return date.fromisoformat(value["__date__"])
+    if "__enum__" in value:
+        enum_class = _known_types().get(value["__enum__"])
+        if enum_class is None or not issubclass(enum_class, enum.Enum):
+            raise ValueError(f"Неизвестное перечисление {value['__enum__']}")
+        return enum_class(_decode(value["value"]))
+    if "__model__" in value:
+        model = _known_types().get(value["__model__"])
+        if model is None or issubclass(model, enum.Enum):
+            raise ValueError(f"Неизвестная модель {value['__model__']}")
+        return model
+    if "__tuple__" in value:
+        return tuple(_decode(item) for item in value["__tuple__"])
+    if "__items__" in value:
+        return {_decode(key): _decode(item) for key, item in value["__items__"]}
+    return {key: _decode(item) for key, item in value.items()}
+
+
+def dumps(value: Any) -> bytes:
+    """Сериализация значения кэша в JSON (даты, перечисления, кортежи и модели помечаются)"""
+    return json.dumps(_encode(value), ensure_ascii=False).encode()
+
+
+def loads(raw: bytes) -> Any:
+    """Восстановление значения, сохраненного dumps"""
+    return _decode(json.loads(raw))
+
+
+class MemoryCacheBackend:
+    """Кэши в памяти процесса; изменения другим процессам не рассылаются"""
+
+    shared = False
+
+    def create_cache(self, name: str, maxsize: int = 1024, ttl: float = 60.0) -> TTLCache:
+        return TTLCache(name, maxsize=maxsize, ttl=ttl)
+
+    def publish_changes(self, changes: list) -> None:
+        pass
+
+    def subscribe(self, handler: Callable[[list], None]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def _on_event_loop() -> bool:
+    """Вызов выполняется в потоке работающего цикла событий asyncio"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+_writer_thread = threading.local()
+
+
+def _mark_writer_thread() -> None:
+    _writer_thread.active = True
+
+
+def _create_writer() -> ThreadPoolExecutor:
+    # Один поток: записи, сбросы и рассылки выполняются в том порядке, в котором поставлены
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="redis-cache", initializer=_mark_writer_thread)
+
+
+class RedisCache:
+    """
+    Кэш в Redis с тем же интерфейсом, что и TTLCache. Значения сериализуются в JSON (dumps);
+    размер ограничивается политикой вытеснения Redis, а не maxsize.
+    Синхронные методы не обращаются к Redis из потока цикла событий: get возвращает
+    промах, записи и сбросы выполняются по порядку в фоновом потоке writer
+    """
+
+    def __init__(self, client, prefix: str, name: str, maxsize: int = 1024, ttl: float = 60.0,
+                 writer: Optional[ThreadPoolExecutor] = None):
+        self.client = client
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._prefix = f"{prefix}:{name}"
+        self._writer = writer or _create_writer()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        if _on_event_loop():
+            # Обработчик, не переведенный на get_async, читает из БД, а не ждет Redis в цикле событий
+            self.misses += 1
+            notify_cache_request(self.name, False)
+            return default
+        try:
+            raw = self.client.get(self._key(key))
+        except Exception as e:
+            logger.error(f"Ошибка чтения кэша {self.name} из Redis: {e}")
+            raw = None
+        value = _MISSING
+        if raw is not None:
+            try:
+                value = loads(raw)
+            except Exception as e:
+                logger.error(f"Поврежденная запись кэша {self.name}: {e}")
+        if value is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+        notify_cache_request(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        self._write(self._set, key, value, ttl, tuple(tags))
+
+    def _set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        redis_key = self._key(key)
+        try:
+            pipe = self.client.pipeline()
+            pipe.set(redis_key, dumps(value), px=max(1, int(ttl * 1000)))
+            for tag in tags:
+                # Набор ключей тега живет не меньше самой долгой записи в нем
+                pipe.sadd(self._tag_key(tag), redis_key)
+                pipe.pexpire(self._tag_key(tag), max(1, int(max(ttl, self.ttl) * 1000)))
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Ошибка записи кэша {self.name} в Redis: {e}")
+
+    async def get_async(self, key: Hashable, default: Any = None) -> Any:
+        """get для корутин: запрос к Redis выполняется вне цикла событий"""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(self.get, key, default))
+
+    async def set_async(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()) -> None:
+        await asyncio.wrap_future(self._writer.submit(self._set, key, value, ttl, tuple(tags)))
+
+    async def invalidate_async(self, key: Hashable) -> None:
+        await asyncio.wrap_future(self._writer.submit(self._invalidate, key))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._write(self._invalidate, key)
+
+    def _invalidate(self, key: Hashable) -> None:
+        try:
+            self.client.delete(self._key(key))
+        except Exception as e:
+            logger.error(f"Ошибка сброса записи кэша {self.name} в Redis: {e}")
+
+    def invalidate_tags(self, tags: Iterable[str]) -> None:
+        self._write(self._invalidate_tags, tuple(tags))
+
+    def _invalidate_tags(self, tags: Iterable[str]) -> None:
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+
+                def delete_tagged(pipe, tag_key=tag_key):
+                    # WATCH: если set добавит ключ в тег между чтением и удалением, транзакция повторится
+                    keys = pipe.smembers(tag_key)
+                    pipe.multi()
+                    pipe.delete(tag_key, *keys)
+
+                self.client.transaction(delete_tagged, tag_key)
+        except Exception as e:
+            logger.error(f"Ошибка сброса тегов кэша {self.name} в Redis: {e}")
+
+    def clear(self) -> None:
+        self._write(self._clear)
+
+    def _clear(self) -> None:
+        try:
+            for pattern in (f"{self._prefix}:*", f"{self._prefix}#tag:*"):
+                keys = list(self.client.scan_iter(match=pattern, count=500))
+                for start in range(0, len(keys), 500):
+                    self.client.delete(*keys[start:start + 500])
+        except Exception as e:
+            logger.error(f"Ошибка очистки кэша {self.name} в Redis: {e}")
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self._prefix}:*", count=500))
+
+    def _write(self, operation: Callable, *args) -> None:
+        if getattr(_writer_thread, "active", False):
+            operation(*args)  # уже в потоке записи: ожидание очереди заблокировало бы его
+        elif _on_event_loop():
+            self._writer.submit(operation, *args)
+        else:
+            # Вне цикла событий операция ждет уже поставленные в очередь, чтобы не обогнать их
+            self._writer.submit(operation, *args).result()
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self._prefix}:{key!r}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}#tag:{tag}"
+
+
+class RedisCacheBackend:
+    """
+    Кэши в Redis, общие для всех процессов бота. Зафиксированные изменения моделей
+    рассылаются через pub/sub: каждый процесс передает чужие изменения своим
+    change_observers и сбрасывает собственные снимки (список игр, настройки, справочники).
+    Рассылка выполняется фоновым потоком и не задерживает commit
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = CACHE_KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+        self.channel = f"{prefix}:changes"
+        self.instance_id = uuid.uuid4().hex
+        self._pubsub = None
+        self._listener = None
+        self._writer = _create_writer()
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = CACHE_KEY_PREFIX) -> "RedisCacheBackend":
+        import redis
+
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def create_cache(self, name: str, maxsize: int = 1024, ttl: float = 60.0) -> RedisCache:
+        return RedisCache(self.client, self.prefix, name, maxsize=maxsize, ttl=ttl, writer=self._writer)
+
+    def publish_changes(self, changes: list) -> None:
+        """Поставить в очередь рассылки изменения, зафиксированные этим процессом"""
+        self._writer.submit(self._publish, changes)
+
+    def flush(self) -> None:
+        """Дождаться рассылок и записей, поставленных в очередь"""
+        self._writer.submit(lambda: None).result()
+
+    def _publish(self, changes: list) -> None:
+        try:
+            self.client.publish(self.channel, dumps((self.instance_id, changes)))
+            result = "ok"
+        except Exception as e:
+            logger.error(f"Ошибка рассылки изменений через Redis ({len(changes)} изменений): {e}")
+            result = "error"
+        for observer in change_publish_observers:
+            try:
+                observer(result)
+            except Exception as e:
+                logger.error(f"Ошибка обработки результата рассылки изменений: {e}")
+
+    def subscribe(self, handler: Callable[[list], None]) -> None:
+        """Передавать handler изменения, зафиксированные другими процессами"""
+
+        def on_message(message):
+            try:
+                sender, changes = loads(message["data"])
+                changes = [ModelChange(*change) for change in changes]
+            except Exception as e:
+                logger.error(f"Некорректное сообщение об изменениях: {e}")
+                return
+            if sender != self.instance_id:
+                handler(changes)
+
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: on_message})
+        self._listener = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+        self._writer.shutdown(wait=True)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_cache_backend():
+    """Хранилище кэшей процесса (выбирается CACHE_BACKEND при первом обращении)"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if CACHE_BACKEND == "redis":
+                _backend = RedisCacheBackend.from_url(REDIS_URL)
+                _backend.subscribe(notify_change_observers)
+                change_publishers.append(_backend.publish_changes)
+                logger.info(f"Кэши хранятся в Redis ({CACHE_KEY_PREFIX}), изменения рассылаются через pub/sub")
+            else:
+                if CACHE_BACKEND != "memory":
+                    logger.warning(f"Неизвестный CACHE_BACKEND={CACHE_BACKEND}, кэши хранятся в памяти")
+                _backend = MemoryCacheBackend()
+        return _backend
+
+
+def create_cache(name: str, maxsize: int = 1024, ttl: float = 60.0):
+    """Кэш с интерфейсом TTLCache в текущем хранилище"""
+    return get_cache_backend().create_cache(name, maxsize=maxsize, ttl=ttl)
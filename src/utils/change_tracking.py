@@ -0,0 +1,78 @@
+from typing import NamedTuple, Optional
+
+from loguru import logger
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# Функции, получающие список ModelChange после завершения транзакции, в которой
+# изменения были записаны в БД. Вызываются и после commit, и после rollback:
+# до отката незафиксированные данные могли быть прочитаны и закэшированы
+change_observers = []
+# Функции, рассылающие зафиксированные изменения другим процессам бота
+# (см. src/utils/cache_backend.py); после rollback не вызываются. Вызываются в потоке,
+# выполнившем commit (часто в цикле событий), поэтому только ставят рассылку в очередь
+change_publishers = []
+
+_CHANGES_KEY = "model_changes"
+
+
+class ModelChange(NamedTuple):
+    """Изменение объекта модели, записанное flush"""
+    model: type
+    operation: str  # "new", "dirty" или "deleted"
+    identity: Optional[tuple]
+    values: dict  # загруженные значения колонок на момент flush
+
+
+def _collect_changes(session: Session, flush_context) -> None:
+    changes = session.info.setdefault(_CHANGES_KEY, [])
+    for operation, instances in (("new", session.new), ("dirty", session.dirty), ("deleted", session.deleted)):
+        for instance in instances:
+            state = inspect(instance)
+            values = {
+                attribute.key: state.dict[attribute.key]
+                for attribute in state.mapper.column_attrs
+                if attribute.key in state.dict
+            }
+            identity = state.identity
+            if identity is None:
+                # Новые объекты получают identity после flush, первичный ключ уже известен
+                identity = tuple(values.get(column.key) for column in state.mapper.primary_key)
+            changes.append(ModelChange(type(instance), operation, identity, values))
+
+
+def has_uncommitted_changes(session: Session) -> bool:
+    """Есть ли в сессии изменения, не зафиксированные в БД (ожидающие flush или уже записанные)"""
+    return bool(session.new or session.dirty or session.deleted or session.info.get(_CHANGES_KEY))
+
+
+def notify_change_observers(changes: list) -> None:
+    """Передать изменения наблюдателям процесса (в том числе полученные от других процессов)"""
+    for observer in change_observers:
+        try:
+            observer(changes)
+        except Exception as e:
+            logger.error(f"Ошибка обработки изменений моделей: {e}")
+
+
+def _notify_observers(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        notify_change_observers(changes)
+
+
+def _notify_and_publish(session: Session) -> None:
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    notify_change_observers(changes)
+    for publisher in change_publishers:
+        try:
+            publisher(changes)
+        except Exception as e:
+            logger.error(f"Ошибка рассылки изменений моделей: {e}")
+
+
+event.listen(Session, "after_flush", _collect_changes)
+event.listen(Session, "after_commit", _notify_and_publish)
+event.listen(Session, "after_rollback", _notify_observers)
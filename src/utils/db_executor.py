@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from src.models.base import DB_POOL_SIZE, DB_MAX_OVERFLOW
+
+
+def _default_workers() -> int:
+    """Размер пула потоков: по умолчанию столько же, сколько соединений в пуле БД"""
+    configured = os.getenv("DB_EXECUTOR_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return max(1, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+
+
+class DbExecutor:
+    """Ограниченный пул потоков для блокирующих вызовов сервисов из обработчиков"""
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or _default_workers()
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        # Функции, получающие время ожидания в очереди в секундах (например, метрики)
+        self.wait_observers = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество задач, ожидающих свободный поток"""
+        return self._queued
+
+    @property
+    def running(self) -> int:
+        """Количество задач, выполняющихся прямо сейчас"""
+        return self._running
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="db"
+                    )
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Выполняет блокирующую функцию в пуле потоков и возвращает её результат"""
+        from src.middlewares.db_session import get_current_unit_of_work
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        # Сессия обновления передаётся потоку, пока обработчик ждёт результат
+        unit_of_work = get_current_unit_of_work()
+        if unit_of_work is not None and not unit_of_work.owns_current_context():
+            unit_of_work = None
+        call = functools.partial(func, *args, **kwargs)
+        submitted_at = time.perf_counter()
+
+        state = {"dequeued": False}
+
+        with self._lock:
+            self._queued += 1
+
+        def dequeue() -> bool:
+            with self._lock:
+                if state["dequeued"]:
+                    return False
+                state["dequeued"] = True
+                self._queued -= 1
+                return True
+
+        def worker():
+            waited = time.perf_counter() - submitted_at
+            if not dequeue():
+                return None  # обработчик уже отменил ожидание
+            with self._lock:
+                self._running += 1
+            for observer in self.wait_observers:
+                observer(waited)
+            try:
+                if unit_of_work is not None:
+                    with unit_of_work.delegate_to_current_thread():
+                        return context.run(call)
+                return context.run(call)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        future = loop.run_in_executor(self._get_executor(), worker)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not dequeue():
+                # Задача уже выполняется в сессии обновления: unit_of_work откатит и закроет
+                # сессию после отмены, поэтому отмена завершается только вместе с потоком
+                while not future.done():
+                    try:
+                        await asyncio.shield(future)
+                    except asyncio.CancelledError:
+                        continue
+                    except Exception:
+                        break
+            raise
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+db_executor = DbExecutor()
+
+
+async def run_db(func: Callable, *args, **kwargs) -> Any:
+    """Выполнение блокирующего вызова сервиса вне цикла событий"""
+    return await db_executor.run(func, *args, **kwargs)
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+# Порог количества запросов на одно обновление, после которого пишется предупреждение
+DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "20"))
+
+# Длина текста SQL, сохраняемая для самого медленного запроса
+MAX_STATEMENT_LENGTH = 300
+
+
+class QueryStats:
+    """Статистика SQL-запросов, выполненных при обработке одного обновления"""
+
+    def __init__(self, handler: str):
+        self.handler = handler
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.active = True
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, duration: float) -> None:
+        with self._lock:
+            if not self.active:
+                return
+            self.count += 1
+            self.total_time += duration
+            if duration >= self.slowest_time:
+                self.slowest_time = duration
+                self.slowest_statement = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+
+    def close(self) -> None:
+        with self._lock:
+            self.active = False
+
+
+# Статистика текущего обновления
+current_query_stats: ContextVar = ContextVar("current_query_stats", default=None)
+
+# Функции, получающие QueryStats по завершении обновления (например, метрики)
+query_stats_observers = []
+
+
+@contextmanager
+def track_queries(handler: str, warn_threshold: Optional[int] = None):
+    """Подсчёт SQL-запросов, выполненных внутри блока, с предупреждением о возможном N+1"""
+    stats = QueryStats(handler)
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        stats.close()
+        current_query_stats.reset(token)
+        _report(stats, DB_QUERY_WARN_THRESHOLD if warn_threshold is None else warn_threshold)
+
+
+def _report(stats: QueryStats, warn_threshold: int) -> None:
+    for observer in query_stats_observers:
+        try:
+            observer(stats)
+        except Exception as e:
+            logger.error(f"Ошибка обработки статистики запросов: {e}")
+
+    if warn_threshold and stats.count > warn_threshold:
+        logger.warning(
+            f"⚠️ MANY QUERIES: {stats.handler} выполнил {stats.count} SQL-запросов "
+            f"за {stats.total_time:.3f}s (порог {warn_threshold}), самый медленный "
+            f"{stats.slowest_time:.3f}s: {stats.slowest_statement}"
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = time.perf_counter() - start_times.pop()
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def _handle_error(exception_context):
+    # Запрос завершился ошибкой: after_cursor_execute не будет вызван
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def install_query_listeners(engine) -> None:
+    """Подключение учёта запросов к синхронному движку SQLAlchemy"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
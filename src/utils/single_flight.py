@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from loguru import logger
+
+from src.utils.change_tracking import has_uncommitted_changes
+
+# Функции, получающие имя операции каждый раз, когда вызов присоединился
+# к уже выполняющемуся одинаковому вызову (например, метрики)
+single_flight_observers = []
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.thread_id = threading.get_ident()
+        self.waiters = 0
+        self.result = None
+        self.shared = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Совмещение одновременных одинаковых чтений: пока вызов с ключом выполняется,
+    остальные вызовы с тем же ключом ждут его результат вместо собственного запроса.
+    share превращает результат в значение, не привязанное к сессии первого вызова,
+    restore делает из него копию для каждого ожидавшего вызова.
+    """
+
+    def __init__(self, name: str, share: Callable[[Any], Any] = None, restore: Callable[[Any], Any] = None):
+        self.name = name
+        self.share = share or (lambda result: result)
+        self.restore = restore or (lambda shared: shared)
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        if _in_write_transaction():
+            # Незафиксированные изменения видны только в своей сессии - читаем сами
+            return func(*args, **kwargs)
+
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            elif call.thread_id == threading.get_ident():
+                # Повторный вызов внутри выполняющегося (рекурсия) ждал бы сам себя
+                leader = None
+            elif _on_event_loop():
+                # Ожидание в потоке цикла событий остановило бы все обработчики бота
+                # до конца чужого запроса - дешевле прочитать самому
+                leader = None
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+
+        if leader is None:
+            return func(*args, **kwargs)
+        if leader:
+            return self._lead(key, call, func, args, kwargs)
+
+        self._notify()
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return self.restore(call.shared)
+
+    def forget(self) -> None:
+        """
+        Следующие вызовы не присоединяются к уже выполняющимся: их чтение могло начаться
+        до фиксации изменений, которые вызывающий код ожидает увидеть
+        """
+        with self._lock:
+            self._calls.clear()
+
+    def _lead(self, key: Hashable, call: _Call, func: Callable, args: tuple, kwargs: dict) -> Any:
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                waiters = call.waiters
+            if waiters and call.error is None:
+                try:
+                    call.shared = self.share(call.result)
+                except Exception as e:
+                    call.error = e
+            call.done.set()
+        return call.result
+
+    def _notify(self) -> None:
+        for observer in single_flight_observers:
+            try:
+                observer(self.name)
+            except Exception as e:
+                logger.error(f"Ошибка обработки совмещенного вызова {self.name}: {e}")
+
+
+def _on_event_loop() -> bool:
+    """Вызов выполняется в потоке работающего цикла событий asyncio"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _in_write_transaction() -> bool:
+    """Есть ли у сессии текущего обновления изменения, еще не зафиксированные в БД"""
+    from src.middlewares.db_session import get_current_unit_of_work
+
+    unit_of_work = get_current_unit_of_work()
+    if unit_of_work is None or not unit_of_work.has_session or not unit_of_work.owns_current_context():
+        return False
+    return has_uncommitted_changes(unit_of_work.session)
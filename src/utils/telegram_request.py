@@ -0,0 +1,97 @@
+import os
+import time
+from typing import Optional
+
+from loguru import logger
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from telegram.request import HTTPXRequest, RequestData
+
+# Размер пула HTTP-соединений к Telegram API: одновременные отправки рассылок не ждут друг друга
+TELEGRAM_POOL_SIZE = int(os.getenv("TELEGRAM_POOL_SIZE", "256"))
+# Таймауты запросов к Telegram API (сек): соединение, чтение ответа, отправка запроса
+TELEGRAM_CONNECT_TIMEOUT = float(os.getenv("TELEGRAM_CONNECT_TIMEOUT", "5"))
+TELEGRAM_READ_TIMEOUT = float(os.getenv("TELEGRAM_READ_TIMEOUT", "10"))
+TELEGRAM_WRITE_TIMEOUT = float(os.getenv("TELEGRAM_WRITE_TIMEOUT", "10"))
+# Сколько ждать свободное соединение пула, прежде чем считать запрос неудачным (сек)
+TELEGRAM_POOL_TIMEOUT = float(os.getenv("TELEGRAM_POOL_TIMEOUT", "5"))
+
+# Функции, получающие (метод, результат, длительность в секундах) каждого запроса к Telegram API
+# и (метод, пауза в секундах) для каждого RetryAfter (например, метрики)
+telegram_api_observers = []
+retry_after_observers = []
+# Корутины, получающие (chat_id, reply_markup) каждого успешно отправленного сообщения
+# с разметкой; reply_markup передается в виде, в котором ушел в Telegram (dict)
+sent_markup_observers = []
+
+
+def request_result(error: Optional[Exception]) -> str:
+    """Результат запроса для метрик по исключению, которым он завершился"""
+    if error is None:
+        return "ok"
+    if isinstance(error, RetryAfter):
+        return "retry_after"
+    if isinstance(error, Forbidden):
+        return "forbidden"
+    if isinstance(error, BadRequest):
+        return "bad_request"
+    if isinstance(error, TimedOut):
+        return "timeout"
+    if isinstance(error, NetworkError):
+        return "network_error"
+    return "error"
+
+
+class InstrumentedHTTPXRequest(HTTPXRequest):
+    """HTTP-клиент бота, замеряющий длительность и результат каждого метода Telegram API"""
+
+    async def post(self, url: str, request_data: Optional[RequestData] = None, *args, **kwargs):
+        method = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        error = None
+        try:
+            response = await super().post(url, request_data, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            result = request_result(error)
+            for observer in telegram_api_observers:
+                try:
+                    observer(method, result, duration)
+                except Exception as e:
+                    logger.error(f"Ошибка обработки статистики запроса {method}: {e}")
+            if isinstance(error, RetryAfter):
+                logger.warning(f"Flood control Telegram API в {method}: пауза {error.retry_after} сек")
+                for observer in retry_after_observers:
+                    try:
+                        observer(method, error.retry_after)
+                    except Exception as e:
+                        logger.error(f"Ошибка обработки RetryAfter {method}: {e}")
+        await self._notify_sent_markup(method, request_data)
+        return response
+
+    @staticmethod
+    async def _notify_sent_markup(method: str, request_data: Optional[RequestData]) -> None:
+        if not sent_markup_observers or request_data is None:
+            return
+        parameters = request_data.parameters
+        reply_markup = parameters.get("reply_markup")
+        if reply_markup is None or "chat_id" not in parameters:
+            return
+        for observer in sent_markup_observers:
+            try:
+                await observer(parameters["chat_id"], reply_markup)
+            except Exception as e:
+                logger.error(f"Ошибка обработки отправленной разметки {method}: {e}")
+
+
+def create_bot_request() -> InstrumentedHTTPXRequest:
+    """HTTP-клиент для методов бота с настраиваемым пулом соединений и таймаутами"""
+    return InstrumentedHTTPXRequest(
+        connection_pool_size=TELEGRAM_POOL_SIZE,
+        connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+        read_timeout=TELEGRAM_READ_TIMEOUT,
+        write_timeout=TELEGRAM_WRITE_TIMEOUT,
+        pool_timeout=TELEGRAM_POOL_TIMEOUT,
+    )
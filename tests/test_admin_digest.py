@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from telegram import InlineKeyboardButton
+
+from src.handlers.location import notify_admins_about_location
+from src.services.admin_digest_service import AdminDigest, DigestItem, digest_observers
+from src.services.user_service import UserService
+from src.utils.broadcast import RateLimiter
+
+ADMINS = [SimpleNamespace(telegram_id=1), SimpleNamespace(telegram_id=2)]
+
+
+@pytest.fixture
+def admins():
+    with patch.object(UserService, "get_admin_users", return_value=ADMINS), \
+         patch("src.utils.broadcast.rate_limiter", RateLimiter(global_rate=1000, chat_rate=100)), \
+         patch("src.services.admin_digest_service.rate_limiter", RateLimiter(global_rate=1000, chat_rate=100)):
+        yield ADMINS
+
+
+@pytest.fixture
+def saved():
+    collected = []
+    digest_observers.append(collected.append)
+    yield collected
+    digest_observers.remove(collected.append)
+
+
+def _bot():
+    bot = Mock()
+    bot.send_message = AsyncMock()
+    bot.send_location = AsyncMock()
+    bot.send_media_group = AsyncMock()
+    return bot
+
+
+class TestAdminDigest:
+    """Тесты сводки событий игры для администраторов"""
+
+    @pytest.mark.asyncio
+    async def test_events_are_sent_as_one_message_per_admin(self, admins, saved):
+        digest = AdminDigest(interval=0.05, max_items=20)
+        bot = _bot()
+
+        for index in range(5):
+            await digest.add(bot, 7, "Центр", DigestItem(f"📍 Игрок {index}", calls=2))
+        assert bot.send_message.await_count == 0
+        await asyncio.sleep(0.1)
+
+        assert bot.send_message.await_count == len(admins)
+        text = bot.send_message.await_args.kwargs["text"]
+        assert "Центр" in text and "Игрок 0" in text and "Игрок 4" in text
+        # 5 событий по 2 запроса на каждого из 2 админов вместо 2 сообщений
+        assert saved == [5 * 2 * 2 - 2]
+
+    @pytest.mark.asyncio
+    async def test_photos_go_as_album_with_buttons(self, admins, saved):
+        digest = AdminDigest(interval=60, max_items=3)
+        bot = _bot()
+        buttons = [InlineKeyboardButton("✅", callback_data="admin_approve_photo_1")]
+
+        for index in range(3):
+            await digest.add(bot, 7, "Центр", DigestItem(f"📸 {index}", photo_id=f"file{index}", buttons=buttons))
+
+        # Набралось max_items - сводка ушла, не дожидаясь интервала
+        assert bot.send_media_group.await_count == len(admins)
+        assert len(bot.send_media_group.await_args.kwargs["media"]) == 3
+        assert len(bot.send_message.await_args.kwargs["reply_markup"].inline_keyboard) == 3
+        assert saved == [3 * 2 - 2 * 2]
+        assert digest._timers == {}
+
+
+class TestLocationNotifications:
+    """Геолокации в зоне попадают в сводку, выход из зоны сообщается сразу"""
+
+    @pytest.mark.asyncio
+    async def test_in_zone_is_digested_and_out_of_zone_is_urgent(self, admins):
+        digest = AdminDigest(interval=60)
+        context = SimpleNamespace(bot=_bot())
+        user = SimpleNamespace(id=5, name="Игрок")
+        game = SimpleNamespace(id=7, district="Центр", participants=[])
+
+        with patch("src.handlers.location.admin_digest", digest):
+            await notify_admins_about_location(context, user, game, 55.75, 37.61, True)
+            assert context.bot.send_location.await_count == 0
+            assert len(digest._items[7]) == 1
+
+            await notify_admins_about_location(context, user, game, 55.75, 37.61, False)
+            assert context.bot.send_location.await_count == len(admins)
+            assert "❌" in context.bot.send_message.await_args.kwargs["text"]
+
+        digest._timers.pop(7).cancel()
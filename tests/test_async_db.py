@@ -0,0 +1,121 @@
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models import base
+from src.models.base import Base, get_async_database_url
+from src.models.user import User, UserRole
+from src.models.game import Game, GameStatus, GameParticipant
+from src.services.user_service import UserService
+from src.services.game_service import GameService
+from src.services.location_service import LocationService
+
+
+@pytest.fixture
+def sync_session(tmp_path):
+    """Синхронная сессия к временной БД для подготовки данных"""
+    url = f"sqlite:///{tmp_path / 'async_test.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session, url
+    session.close()
+    engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_db(sync_session, monkeypatch):
+    """Асинхронный движок, направленный на временную БД"""
+    session, url = sync_session
+    monkeypatch.setenv("ASYNC_DATABASE_URL", get_async_database_url(url))
+    await base.dispose_async_engine()
+    yield session
+    await base.dispose_async_engine()
+
+
+def _create_game_with_player(session, status=GameStatus.RECRUITING):
+    user = User(telegram_id=1001, name="Игрок", district="Центр", default_role=UserRole.PLAYER)
+    session.add(user)
+    session.flush()
+    game = Game(
+        district="Центр",
+        max_participants=5,
+        scheduled_at=datetime.now() + timedelta(hours=2),
+        creator_id=user.id,
+        status=status
+    )
+    session.add(game)
+    session.flush()
+    session.add(GameParticipant(game_id=game.id, user_id=user.id))
+    session.commit()
+    return user.id, game.id
+
+
+class TestAsyncDatabaseUrl:
+    """Тесты преобразования строки подключения"""
+
+    def test_sqlite_url(self, monkeypatch):
+        monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+        assert get_async_database_url("sqlite:///./bot.db") == "sqlite+aiosqlite:///./bot.db"
+
+    def test_postgresql_url(self, monkeypatch):
+        monkeypatch.delenv("ASYNC_DATABASE_URL", raising=False)
+        url = get_async_database_url("postgresql://user:pass@db:5432/pryton")
+        assert url == "postgresql+asyncpg://user:pass@db:5432/pryton"
+
+    def test_explicit_url(self, monkeypatch):
+        monkeypatch.setenv("ASYNC_DATABASE_URL", "sqlite+aiosqlite:///custom.db")
+        assert get_async_database_url("sqlite:///./bot.db") == "sqlite+aiosqlite:///custom.db"
+
+
+class TestAsyncServices:
+    """Тесты асинхронных вариантов методов сервисов"""
+
+    @pytest.mark.asyncio
+    async def test_get_user_by_telegram_id_async(self, async_db):
+        user_id, game_id = _create_game_with_player(async_db)
+
+        user, participations = await UserService.get_user_by_telegram_id_async(1001)
+        assert user.id == user_id
+        assert [p.game_id for p in participations] == [game_id]
+
+        missing, participations = await UserService.get_user_by_telegram_id_async(9999)
+        assert missing is None
+        assert participations == []
+
+    @pytest.mark.asyncio
+    async def test_game_queries_async(self, async_db):
+        user_id, game_id = _create_game_with_player(async_db)
+
+        game = await GameService.get_game_by_id_async(game_id)
+        assert game.id == game_id
+        assert len(game.participants) == 1
+        assert game.participants[0].user.telegram_id == 1001
+
+        upcoming = await GameService.get_upcoming_games_async(limit=5)
+        assert [g.id for g in upcoming] == [game_id]
+
+        not_completed = await GameService.get_user_games_not_completed_async(user_id)
+        assert [g.id for g in not_completed] == [game_id]
+        assert await GameService.get_user_active_games_async(user_id) == []
+
+    @pytest.mark.asyncio
+    async def test_location_async(self, async_db):
+        user_id, game_id = _create_game_with_player(async_db, status=GameStatus.HIDING_PHASE)
+
+        assert await LocationService.is_user_in_game_zone_async(user_id, game_id) is False
+        assert await LocationService.save_user_location_async(user_id, game_id, 55.75, 37.61) is True
+
+        location = await LocationService.get_user_latest_location_async(user_id, game_id)
+        assert (location.latitude, location.longitude) == (55.75, 37.61)
+
+        game = async_db.get(Game, game_id)
+        game.set_game_zone(55.75, 37.61, 100)
+        async_db.commit()
+        assert await LocationService.is_user_in_game_zone_async(user_id, game_id) is True
+
+        game.set_game_zone(56.0, 38.0, 100)
+        async_db.commit()
+        assert await LocationService.is_user_in_game_zone_async(user_id, game_id) is False
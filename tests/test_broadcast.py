@@ -0,0 +1,136 @@
+import asyncio
+import time
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from telegram.error import Forbidden, RetryAfter
+
+from src.models.game import GameRole
+from src.services.enhanced_scheduler_service import EnhancedSchedulerService
+from src.services.game_service import GameService
+from src.services.user_service import UserService
+from src.utils.broadcast import (
+    BroadcastMessage, RateLimiter, TokenBucket, broadcast, broadcast_observers
+)
+
+
+@pytest.fixture
+def fast_limits():
+    """Лимиты, при которых тесты не ждут секундами"""
+    limiter = RateLimiter(global_rate=1000, chat_rate=20, group_rate_per_minute=600)
+    with patch("src.utils.broadcast.rate_limiter", limiter):
+        yield limiter
+
+
+@pytest.fixture
+def results():
+    collected = []
+    broadcast_observers.append(collected.append)
+    yield collected
+    broadcast_observers.remove(collected.append)
+
+
+def _bot(side_effect=None):
+    bot = Mock()
+    bot.send_message = AsyncMock(side_effect=side_effect)
+    return bot
+
+
+class TestTokenBucket:
+    """Тесты ведра токенов"""
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+
+        delays = [bucket.reserve() for _ in range(4)]
+
+        assert delays[:2] == [0.0, 0.0]
+        assert delays[2] == pytest.approx(0.1, abs=0.01)
+        assert delays[3] == pytest.approx(0.2, abs=0.01)
+
+
+class TestBroadcast:
+    """Тесты рассылки с учетом лимитов Telegram"""
+
+    @pytest.mark.asyncio
+    async def test_messages_to_different_chats_go_out_together(self, fast_limits, results):
+        bot = _bot()
+
+        result = await broadcast(bot, [BroadcastMessage(chat_id, "привет") for chat_id in range(100)], "test")
+
+        assert bot.send_message.await_count == 100
+        assert (result.sent, result.failed, result.retries) == (100, 0, 0)
+        assert result.duration < 1
+        assert results == [result]
+
+    @pytest.mark.asyncio
+    async def test_one_chat_is_limited(self, fast_limits):
+        started_at = time.monotonic()
+
+        await broadcast(_bot(), [BroadcastMessage(1, str(index)) for index in range(3)], "test")
+
+        # 1 сообщение сразу, затем по одному в 1/20 сек
+        assert time.monotonic() - started_at >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_and_retries(self, fast_limits):
+        bot = _bot([RetryAfter(0.05), SimpleNamespace(message_id=1), SimpleNamespace(message_id=2)])
+        started_at = time.monotonic()
+
+        result = await broadcast(bot, [BroadcastMessage(1, "a"), BroadcastMessage(2, "b")], "test")
+
+        assert (result.sent, result.failed, result.retries) == (2, 0, 1)
+        assert bot.send_message.await_count == 3
+        assert time.monotonic() - started_at >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_sends_after_pause_keep_the_global_rate(self):
+        limiter = RateLimiter(global_rate=50, chat_rate=1000, group_rate_per_minute=60000)
+        sent_at = []
+
+        async def send(chat_id):
+            await limiter.acquire(chat_id)
+            sent_at.append(time.monotonic())
+
+        # Telegram попросил паузу 0.1 сек, пока в общем ведре был полный запас токенов
+        paused_at = time.monotonic()
+        limiter.pause(0.1)
+        await asyncio.gather(*(send(chat_id) for chat_id in range(20)))
+
+        # Отправки идут после паузы и не чаще 50 в секунду, а не пачкой в момент ее окончания
+        assert min(sent_at) - paused_at >= 0.1
+        assert max(sent_at) - min(sent_at) >= 19 / 50 * 0.9
+
+    @pytest.mark.asyncio
+    async def test_blocked_chat_is_not_retried(self, fast_limits):
+        bot = _bot(Forbidden("bot was blocked by the user"))
+
+        result = await broadcast(bot, [BroadcastMessage(1, "a", {"parse_mode": "HTML"})], "test")
+
+        assert (result.sent, result.failed, result.retries) == (0, 1, 0)
+        assert bot.send_message.await_args.kwargs == {"chat_id": 1, "text": "a", "parse_mode": "HTML"}
+
+
+@pytest.mark.asyncio
+async def test_phase_change_reaches_every_participant(fast_limits, results):
+    participants = [
+        SimpleNamespace(role=GameRole.DRIVER if index < 10 else GameRole.SEEKER,
+                        user=SimpleNamespace(telegram_id=1000 + index))
+        for index in range(100)
+    ]
+    game = SimpleNamespace(id=1, district="Центр", started_at=datetime.now(), participants=participants)
+    application = Mock()
+    application.bot = _bot()
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+        scheduler = EnhancedSchedulerService(application)
+
+    with patch.object(GameService, "get_game_by_id", return_value=game), \
+         patch.object(UserService, "get_admin_users", return_value=[SimpleNamespace(telegram_id=1)]):
+        await scheduler.notify_game_started(1)
+
+    result, = results
+    assert result.name == "game_started" and result.sent == 101
+    texts = {call.kwargs["chat_id"]: call.kwargs["text"] for call in application.bot.send_message.await_args_list}
+    assert "Водитель" in texts[1000] and "Искатель" in texts[1050]
+    assert "Уведомлений участникам: 100" in texts[1]
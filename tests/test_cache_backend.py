@@ -0,0 +1,213 @@
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import pickle
+
+from src.models.game import Game, GameRole, GameStatus
+from src.services.game_list_service import GameListSnapshot
+from src.services import game_list_service
+from src.utils.cache import TTLCache
+from src.utils.cache_backend import RedisCacheBackend, change_publish_observers, dumps, loads
+from src.utils.change_tracking import ModelChange, notify_change_observers
+
+
+@pytest.fixture
+def backends():
+    """Два процесса бота с общим Redis"""
+    server = fakeredis.FakeServer()
+    first = RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="test")
+    second = RedisCacheBackend(fakeredis.FakeRedis(server=server), prefix="test")
+    yield first, second
+    first.close()
+    second.close()
+
+
+def _wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestTaggedMemoryCache:
+    """Тесты сброса записей TTLCache по тегам"""
+
+    def test_invalidate_tags(self):
+        cache = TTLCache("tags", maxsize=10, ttl=60)
+        cache.set(1, "first", tags=["game:1", "user:1"])
+        cache.set(2, "second", tags=["game:1"])
+        cache.set(3, "third", tags=["game:2"])
+
+        cache.invalidate_tags(["game:1"])
+
+        assert cache.get(1) is None and cache.get(2) is None
+        assert cache.get(3) == "third"
+
+    def test_evicted_entries_leave_no_tags(self):
+        cache = TTLCache("tags", maxsize=2, ttl=60)
+        for key in range(5):
+            cache.set(key, key, tags=[f"game:{key}"])
+
+        assert len(cache) == 2
+        assert set(cache._tags) == {"game:3", "game:4"}
+
+
+class TestRedisCacheBackend:
+    """Тесты общего для процессов хранилища кэшей"""
+
+    def test_processes_share_entries_and_invalidations(self, backends):
+        first, second = backends
+        first_cache = first.create_cache("contexts", ttl=60)
+        second_cache = second.create_cache("contexts", ttl=60)
+        snapshot = {"status": "registered", "scheduled_at": datetime(2026, 1, 1, 12, 0)}
+
+        first_cache.set(100, snapshot, tags=["game:1", "user:7"])
+        first_cache.set(101, "other", tags=["game:2"])
+
+        assert second_cache.get(100) == snapshot
+        second_cache.invalidate_tags(["user:7"])
+        assert first_cache.get(100) is None
+        assert first_cache.get(101) == "other"
+
+        second_cache.clear()
+        assert len(first_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_async_access_leaves_the_event_loop(self, backends):
+        first, _ = backends
+        cache = first.create_cache("users", ttl=60)
+        threads = []
+        original = first.client.get
+        first.client.get = lambda *args: threads.append(threading.get_ident()) or original(*args)
+
+        await cache.set_async(7, {"name": "Игрок"}, tags=["user:7"])
+
+        assert await cache.get_async(7) == {"name": "Игрок"}
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_sync_access_on_the_event_loop_does_not_wait_for_redis(self, backends):
+        first, _ = backends
+        cache = first.create_cache("users", ttl=60)
+        calls = []
+        original = first.client.get
+        first.client.get = lambda *args: calls.append(args) or original(*args)
+
+        # Обработчик, еще не переведенный на get_async: чтение - промах, запись уходит в фоновый поток
+        cache.set(7, "old")
+        cache.set(7, "new")
+        cache.invalidate(8)
+        assert cache.get(7) is None and calls == []
+        await asyncio.get_running_loop().run_in_executor(None, first.flush)
+
+        assert await cache.get_async(7) == "new"
+
+    def test_publish_runs_off_the_committing_thread(self, backends):
+        first, _ = backends
+        threads, results = [], []
+        first.client.publish = lambda *args: threads.append(threading.get_ident()) or 1
+        change_publish_observers.append(results.append)
+        try:
+            first.publish_changes([ModelChange(Game, "dirty", (5,), {"id": 5})])
+            first.client.publish = Mock(side_effect=ConnectionError("Redis недоступен"))
+            first.publish_changes([ModelChange(Game, "dirty", (6,), {"id": 6})])
+            first.flush()
+        finally:
+            change_publish_observers.remove(results.append)
+
+        assert threads and threading.get_ident() not in threads
+        # Потерянная рассылка видна в метриках
+        assert results == ["ok", "error"]
+
+    def test_entries_expire(self, backends):
+        first, _ = backends
+        cache = first.create_cache("users", ttl=60)
+
+        cache.set(1, "short", ttl=0.05)
+        cache.set(2, "long")
+        time.sleep(0.1)
+
+        assert cache.get(1) is None
+        assert cache.get(2) == "long"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_changes_reach_other_processes_only(self, backends):
+        first, second = backends
+        received_by_first, received_by_second = [], []
+        first.subscribe(received_by_first.append)
+        second.subscribe(received_by_second.append)
+        time.sleep(0.1)
+        change = ModelChange(Game, "dirty", (5,), {"id": 5, "district": "Центр"})
+
+        first.publish_changes([change])
+
+        assert _wait_for(lambda: received_by_second)
+        assert received_by_second == [[change]]
+        assert received_by_first == []
+
+    def test_remote_change_resets_game_list(self, backends):
+        first, second = backends
+        second.subscribe(notify_change_observers)
+        time.sleep(0.1)
+        game_list_service._snapshot = GameListSnapshot("cached", None, 0)
+        game_list_service._expires_at = time.monotonic() + 60
+
+        first.publish_changes([ModelChange(Game, "new", (9,), {"id": 9, "scheduled_at": datetime.now() + timedelta(hours=1)})])
+
+        assert _wait_for(lambda: game_list_service._snapshot is None)
+
+
+class TestJsonSerialization:
+    """Значения в общем Redis - JSON без произвольных классов"""
+
+    def test_cached_values_round_trip(self):
+        snapshot = {
+            "status": "in_game",
+            "game": {"id": 1, "status": GameStatus.HIDING_PHASE, "scheduled_at": datetime(2026, 1, 1, 12, 0)},
+            "participant": {"role": GameRole.DRIVER},
+            "key": ("in_game", GameRole.DRIVER, None),
+            "by_id": {1: "first"},
+        }
+        change = ModelChange(Game, "dirty", (5,), {"status": GameStatus.COMPLETED})
+
+        assert loads(dumps(snapshot)) == snapshot
+        assert ModelChange(*loads(dumps(change))) == change
+
+    def test_pickle_payload_is_rejected(self, backends):
+        first, _ = backends
+        cache = first.create_cache("users", ttl=60)
+        first.client.set(cache._key(1), pickle.dumps({"id": 1}))
+
+        assert cache.get(1) is None
+        with pytest.raises(ValueError):
+            loads(b'{"__model__": "Popen"}')
+
+
+def test_set_during_tag_invalidation_is_not_orphaned(backends):
+    first, second = backends
+    cache = first.create_cache("contexts", ttl=60)
+    other = second.create_cache("contexts", ttl=60)
+    cache.set(1, "old", tags=["game:1"])
+    smembers = first.client.pipeline().__class__.smembers
+
+    def smembers_then_race(pipe, key):
+        members = smembers(pipe, key)
+        if not getattr(pipe, "raced", False):
+            # Другой процесс записывает ключ с тем же тегом между чтением набора и удалением
+            pipe.raced = True
+            other.set(2, "new", tags=["game:1"])
+        return members
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(first.client.pipeline().__class__, "smembers", smembers_then_race)
+        cache.invalidate_tags(["game:1"])
+
+    # Запись, добавленная во время сброса, тоже сброшена, а не осталась без тега
+    assert cache.get(1) is None and cache.get(2) is None
+    assert not first.client.exists(cache._tag_key("game:1"))
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.middlewares.db_session import unit_of_work
+from src.models.base import Base, AppSession, get_db
+from src.utils.db_executor import DbExecutor
+
+
+@pytest.fixture
+def executor():
+    db_executor = DbExecutor(max_workers=1)
+    yield db_executor
+    db_executor.shutdown()
+
+
+class TestDbExecutor:
+    """Тесты пула потоков для блокирующих вызовов БД"""
+
+    @pytest.mark.asyncio
+    async def test_runs_off_event_loop_thread(self, executor):
+        loop_thread = threading.get_ident()
+        result = await executor.run(lambda x, y=0: (threading.get_ident(), x + y), 2, y=3)
+        assert result[0] != loop_thread
+        assert result[1] == 5
+
+    @pytest.mark.asyncio
+    async def test_queue_depth_and_wait_time(self, executor):
+        waits = []
+        executor.wait_observers.append(waits.append)
+        release = threading.Event()
+
+        first = asyncio.create_task(executor.run(release.wait, 5))
+        second = asyncio.create_task(executor.run(lambda: "done"))
+        await asyncio.sleep(0.05)
+
+        # единственный поток занят, второй вызов ждёт в очереди
+        assert executor.running == 1
+        assert executor.queue_depth == 1
+
+        release.set()
+        assert await first is True
+        assert await second == "done"
+        assert executor.queue_depth == 0
+        assert executor.running == 0
+        assert len(waits) == 2
+        assert waits[1] >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_cancelled_call_leaves_queue(self, executor):
+        release = threading.Event()
+        blocker = asyncio.create_task(executor.run(release.wait, 5))
+        queued = asyncio.create_task(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert executor.queue_depth == 0
+
+        release.set()
+        await blocker
+
+    @pytest.mark.asyncio
+    async def test_cancelled_running_call_is_awaited(self, executor):
+        started, release = threading.Event(), threading.Event()
+        events = []
+
+        def job():
+            started.set()
+            release.wait(5)
+            events.append("job finished")
+
+        running = asyncio.create_task(executor.run(job))
+        assert await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+
+        running.cancel()
+        await asyncio.sleep(0.05)
+        # Поток еще работает в сессии обновления - отмена ждет его
+        assert not running.done()
+
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        events.append("cancelled")
+        assert events == ["job finished", "cancelled"]
+        assert executor.running == 0
+
+    @pytest.mark.asyncio
+    async def test_shares_unit_of_work_session(self, executor, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'executor_test.db'}")
+        Base.metadata.create_all(engine)
+        factory = sessionmaker(bind=engine, class_=AppSession)
+
+        with patch("src.middlewares.db_session.SessionLocal", factory):
+            with unit_of_work("test") as uow:
+                handler_session = uow.session
+                thread_session = await executor.run(lambda: next(get_db()))
+            assert thread_session is handler_session
+
+            # вне единицы работы поток получает собственную сессию
+            private_session = await executor.run(lambda: next(get_db()))
+            assert private_session is not handler_session
+        engine.dispose()
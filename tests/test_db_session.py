@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.middlewares.db_session import unit_of_work, get_current_unit_of_work
+from src.models.base import Base, AppSession, InstrumentedQueuePool, get_db
+from src.models.user import User, UserRole
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Фабрика сессий к временной БД вместо основной"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'uow_test.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=2,
+        max_overflow=0
+    )
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AppSession)
+    with patch("src.middlewares.db_session.SessionLocal", factory), \
+         patch("src.models.base.SessionLocal", factory):
+        yield factory
+    engine.dispose()
+
+
+def _add_user(telegram_id: int) -> None:
+    """Код в стиле сервисов: получает сессию, коммитит и закрывает её"""
+    db = next(get_db())
+    try:
+        db.add(User(telegram_id=telegram_id, name="Игрок", district="Центр", default_role=UserRole.PLAYER))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _count_users(factory) -> int:
+    db = factory()
+    try:
+        return db.query(User).count()
+    finally:
+        db.close()
+
+
+class TestUnitOfWork:
+    """Тесты единицы работы на обновление"""
+
+    def test_services_share_one_session(self, session_factory):
+        with unit_of_work("test") as uow:
+            first = next(get_db())
+            first.close()
+            second = next(get_db())
+            assert first is second is uow.session
+            _add_user(1)
+            assert uow.session.query(User).count() == 1
+
+        assert get_current_unit_of_work() is None
+        assert _count_users(session_factory) == 1
+
+    def test_uncommitted_changes_committed_at_end(self, session_factory):
+        with unit_of_work("test"):
+            db = next(get_db())
+            db.add(User(telegram_id=2, name="Игрок", district="Центр", default_role=UserRole.PLAYER))
+
+        assert _count_users(session_factory) == 1
+
+    def test_exception_rolls_back(self, session_factory):
+        with pytest.raises(RuntimeError):
+            with unit_of_work("test"):
+                db = next(get_db())
+                db.add(User(telegram_id=3, name="Игрок", district="Центр", default_role=UserRole.PLAYER))
+                raise RuntimeError("сбой обработчика")
+
+        assert _count_users(session_factory) == 0
+
+    def test_failed_flush_does_not_break_following_calls(self, session_factory):
+        with unit_of_work("test"):
+            _add_user(4)
+            with pytest.raises(Exception):
+                _add_user(4)  # нарушение уникальности telegram_id
+            _add_user(5)
+
+        assert _count_users(session_factory) == 2
+
+    def test_session_outside_unit_of_work_is_private(self, session_factory):
+        first = next(get_db())
+        second = next(get_db())
+        assert first is not second
+        first.close()
+        second.close()
+
+    def test_nested_unit_of_work_reuses_outer(self, session_factory):
+        with unit_of_work("outer") as outer:
+            with unit_of_work("inner") as inner:
+                assert inner is outer
+            assert outer.active
+        assert not outer.active
+
+    @pytest.mark.asyncio
+    async def test_background_task_gets_own_session(self, session_factory):
+        sessions = {}
+
+        async def background():
+            sessions["task"] = next(get_db())
+
+        with unit_of_work("test") as uow:
+            sessions["handler"] = uow.session
+            await asyncio.create_task(background())
+
+        assert sessions["task"] is not sessions["handler"]
+        sessions["task"].close()
+
+    def test_pool_wait_observer(self, session_factory):
+        observed = []
+        with patch.object(InstrumentedQueuePool, "wait_observers", [observed.append]):
+            with unit_of_work("test"):
+                next(get_db()).query(User).count()
+        assert len(observed) == 1
+        assert observed[0] >= 0
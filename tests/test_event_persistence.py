@@ -0,0 +1,185 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.game import Game, GameStatus
+from src.models.scheduled_event import ScheduledEvent
+from src.models.user import User, UserRole
+from src.services.enhanced_scheduler_service import EnhancedSchedulerService, claimed_event
+from src.services.event_persistence_service import EventPersistenceService, PlannedEvent
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'events.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    factory.statements = statements
+    with patch("src.services.event_persistence_service.get_db", side_effect=lambda: iter([factory()])):
+        yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def game(sessions):
+    session = sessions()
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    game = Game(district="Центр", max_participants=5, status=GameStatus.UPCOMING,
+                scheduled_at=(datetime.now() + timedelta(days=2)).replace(microsecond=0), creator_id=creator.id)
+    session.add(game)
+    session.commit()
+    session.refresh(game)
+    session.close()
+    return game
+
+
+def _events(sessions) -> list:
+    session = sessions()
+    events = session.query(ScheduledEvent).order_by(ScheduledEvent.scheduled_at).all()
+    session.close()
+    return events
+
+
+def test_save_events_skips_existing_rows(sessions, game):
+    plan = [PlannedEvent("game_start", game.scheduled_at, {}),
+            PlannedEvent("hiding_phase_end", game.scheduled_at + timedelta(minutes=30), {"hiding_time": 30})]
+
+    first = EventPersistenceService.save_events(game.id, plan)
+    second = EventPersistenceService.save_events(game.id, plan + [PlannedEvent("reminder_5min", game.scheduled_at - timedelta(minutes=5), {})])
+
+    assert [event.event_type for event in first] == ["game_start", "hiding_phase_end"]
+    assert [event.id for event in second[:2]] == [event.id for event in first]
+    assert len(_events(sessions)) == 3
+
+
+def test_reschedule_back_to_previous_time_rearms_events(sessions, game):
+    def plan(start):
+        return [PlannedEvent("game_start", start, {}),
+                PlannedEvent("hiding_phase_end", start + timedelta(minutes=30), {"hiding_time": 30})]
+
+    first_time, second_time = game.scheduled_at, game.scheduled_at + timedelta(hours=3)
+    # A -> B -> A: перед каждым перепланированием события игры отменяются
+    EventPersistenceService.save_events(game.id, plan(first_time))
+    EventPersistenceService.cancel_game_events(game.id)
+    EventPersistenceService.save_events(game.id, plan(second_time))
+    EventPersistenceService.cancel_game_events(game.id)
+    events = EventPersistenceService.save_events(game.id, plan(first_time))
+
+    assert [event.is_executed for event in events] == [False, False]
+    assert len(_events(sessions)) == 4
+    assert all(EventPersistenceService.claim_event(event.id, owner="bot-1") for event in events)
+
+
+def test_schedule_game_reminders_saves_plan_in_one_statement(sessions, game):
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+        scheduler = EnhancedSchedulerService(Mock())
+    sessions.statements.clear()
+
+    with patch("src.services.enhanced_scheduler_service.GameService.get_game_by_id", return_value=game):
+        scheduler.schedule_game_reminders(game.id)
+        scheduler.schedule_game_reminders(game.id)
+
+    inserts = [statement for statement in sessions.statements if statement.startswith("INSERT")]
+    assert len(inserts) == 2 and "ON CONFLICT" in inserts[0]
+    # Напоминания за 60, 24 и 5 минут, старт, предупреждение и конец пряток
+    events = _events(sessions)
+    assert len(events) == 6
+    assert sorted(job.id for job in scheduler.get_game_jobs(game.id)) == sorted(event.job_id for event in events)
+    start_job = scheduler.scheduler.get_job(next(event.job_id for event in events if event.event_type == "game_start"))
+    assert start_job.args[0] == game.id and start_job.args[-1] == events[3].id
+
+
+def test_event_window_loads_only_upcoming_events(sessions, game):
+    now = datetime.now().replace(microsecond=0)
+    session = sessions()
+    # 20 000 событий на месяцы вперед и три в ближайшие минуты
+    session.execute(ScheduledEvent.__table__.insert(), [
+        {"game_id": game.id, "event_type": "game_start", "scheduled_at": now + timedelta(hours=1, minutes=index),
+         "event_data": {}, "is_executed": False}
+        for index in range(20000)
+    ] + [
+        {"game_id": game.id, "event_type": "hiding_warning", "scheduled_at": now + timedelta(minutes=minutes),
+         "event_data": {}, "is_executed": False}
+        for minutes in (1, 4, 8)
+    ])
+    session.commit()
+    plan = session.connection().exec_driver_sql(
+        "EXPLAIN QUERY PLAN SELECT * FROM scheduled_events WHERE is_executed = 0 AND scheduled_at < ?", (now,)
+    ).fetchall()
+    session.close()
+    assert "ix_scheduled_events_executed_scheduled_at" in str(plan)
+
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])), \
+         patch.dict("os.environ", {"SCHEDULER_EVENT_WINDOW": "10"}):
+        scheduler = EnhancedSchedulerService(Mock())
+    scheduler._restore_events_from_db()
+    assert len(scheduler.scheduler.get_jobs()) == 3
+
+    # Событие, добавленное в окно другим процессом, подхватывается при пополнении
+    session = sessions()
+    session.add(ScheduledEvent(game_id=game.id, event_type="hiding_phase_end",
+                               scheduled_at=now + timedelta(minutes=9), event_data={}))
+    session.commit()
+    session.close()
+    scheduler._fill_event_window()
+    assert len(scheduler.scheduler.get_jobs()) == 4
+
+
+def _pending_event(sessions, game) -> int:
+    session = sessions()
+    event = ScheduledEvent(game_id=game.id, event_type="game_start", scheduled_at=game.scheduled_at, event_data={})
+    session.add(event)
+    session.commit()
+    event_id = event.id
+    session.close()
+    return event_id
+
+
+def test_event_is_claimed_by_one_instance(sessions, game):
+    event_id = _pending_event(sessions, game)
+
+    assert EventPersistenceService.claim_event(event_id, owner="bot-1")
+    assert not EventPersistenceService.claim_event(event_id, owner="bot-2")
+    assert EventPersistenceService.extend_claim(event_id, owner="bot-1")
+    assert not EventPersistenceService.extend_claim(event_id, owner="bot-2")
+
+    # Аренда истекла (экземпляр упал) - событие может захватить другой экземпляр
+    session = sessions()
+    session.get(ScheduledEvent, event_id).claimed_until = datetime.now() - timedelta(seconds=1)
+    session.commit()
+    session.close()
+    assert EventPersistenceService.claim_event(event_id, owner="bot-2")
+
+    EventPersistenceService.mark_event_executed(event_id)
+    session = sessions()
+    session.get(ScheduledEvent, event_id).claimed_until = None
+    session.commit()
+    session.close()
+    assert not EventPersistenceService.claim_event(event_id, owner="bot-1")
+
+
+@pytest.mark.asyncio
+async def test_replicas_run_an_event_once(sessions, game):
+    event_id = _pending_event(sessions, game)
+    runs = []
+
+    @claimed_event
+    async def start_game(game_id: int, event_id: int):
+        runs.append(game_id)
+        await asyncio.sleep(0.01)
+
+    # Оба экземпляра бота восстановили задачу и запускают ее одновременно
+    await asyncio.gather(start_game(game.id, event_id), start_game(game.id, event_id=event_id))
+
+    assert runs == [game.id]
+    session = sessions()
+    assert session.get(ScheduledEvent, event_id).is_executed
+    session.close()
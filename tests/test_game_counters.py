@@ -0,0 +1,142 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameStatus, GameParticipant, GameRole
+from src.services.game_service import GameService
+from src.utils.change_tracking import change_observers
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'counters.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    settings = MagicMock(auto_end_game=False, auto_start_searching=False, manual_control_mode=True)
+    with patch("src.services.game_service.get_db", side_effect=lambda: iter([session])), \
+         patch("src.services.game_settings_service.GameSettingsService.get_settings", return_value=settings):
+        yield session
+    session.close()
+    engine.dispose()
+
+
+def _create_game(session, players: int, max_drivers: int = 1) -> tuple:
+    """Игра в наборе и пользователи, которые на нее запишутся"""
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    game = Game(
+        district="Центр",
+        max_participants=players + 1,
+        max_drivers=max_drivers,
+        scheduled_at=datetime.now() + timedelta(hours=1),
+        creator_id=creator.id
+    )
+    users = [
+        User(telegram_id=100 + index, name=f"Игрок {index}", district="Центр", default_role=UserRole.PLAYER)
+        for index in range(players)
+    ]
+    session.add_all([game, *users])
+    session.commit()
+    return game.id, [user.id for user in users]
+
+
+def _counters(session, game_id: int) -> tuple:
+    game = session.get(Game, game_id)
+    session.refresh(game)
+    return game.participants_count, game.drivers_count, game.found_drivers_count, game.hidden_drivers_count
+
+
+def _recount(session, game_id: int) -> tuple:
+    participants = session.query(GameParticipant).filter(GameParticipant.game_id == game_id).all()
+    drivers = [p for p in participants if p.role == GameRole.DRIVER]
+    return (
+        len(participants),
+        len(drivers),
+        sum(1 for p in drivers if p.is_found),
+        sum(1 for p in drivers if p.has_hidden),
+    )
+
+
+class TestGameCounters:
+    """Тесты денормализованных счетчиков участников игры"""
+
+    def test_counters_follow_game_lifecycle(self, db_session):
+        game_id, user_ids = _create_game(db_session, players=4, max_drivers=2)
+
+        for user_id in user_ids:
+            GameService.join_game(game_id, user_id)
+        assert _counters(db_session, game_id) == (4, 0, 0, 0)
+
+        GameService.leave_game(game_id, user_ids[-1])
+        assert _counters(db_session, game_id) == (3, 0, 0, 0)
+
+        GameService.assign_roles(game_id)
+        assert _counters(db_session, game_id) == (3, 2, 0, 0)
+
+        drivers = [
+            participant.user_id for participant in
+            db_session.query(GameParticipant).filter_by(game_id=game_id, role=GameRole.DRIVER)
+        ]
+        db_session.get(Game, game_id).status = GameStatus.HIDING_PHASE
+        db_session.commit()
+
+        GameService.update_participant_hidden_status(game_id, drivers[0], True)
+        GameService.update_participant_hidden_status(game_id, drivers[0], True)
+        assert _counters(db_session, game_id) == (3, 2, 0, 1)
+
+        GameService.mark_participant_found(game_id, drivers[1])
+        GameService.mark_participant_found(game_id, drivers[1])
+        assert _counters(db_session, game_id) == (3, 2, 1, 1)
+
+        GameService.leave_game(game_id, drivers[0])
+        assert _counters(db_session, game_id) == _recount(db_session, game_id) == (2, 1, 1, 0)
+
+    def test_hiding_stats_and_completion_use_counters(self, db_session):
+        game_id, user_ids = _create_game(db_session, players=3, max_drivers=1)
+        for user_id in user_ids:
+            GameService.join_game(game_id, user_id)
+        GameService.assign_roles(game_id)
+        driver = db_session.query(GameParticipant).filter_by(game_id=game_id, role=GameRole.DRIVER).one()
+
+        stats = GameService.get_hiding_stats(game_id)
+        assert stats["total_drivers"] == 1
+        assert stats["not_hidden_count"] == 1
+        assert [d.user_id for d in stats["not_hidden_drivers"]] == [driver.user_id]
+        assert stats["all_hidden"] is False
+
+        db_session.get(Game, game_id).status = GameStatus.SEARCHING_PHASE
+        db_session.commit()
+        GameService.mark_participant_found(game_id, driver.user_id)
+        with patch.object(GameService, "end_game", return_value=True) as mock_end_game:
+            assert GameService._check_auto_game_completion(game_id) is True
+        mock_end_game.assert_called_once_with(game_id)
+
+    def test_reconcile_repairs_drift(self, db_session):
+        game_id, user_ids = _create_game(db_session, players=3)
+        for user_id in user_ids:
+            GameService.join_game(game_id, user_id)
+
+        # изменение в обход сервиса - счетчики расходятся с таблицей участников
+        db_session.query(GameParticipant).filter_by(game_id=game_id, user_id=user_ids[0]).delete()
+        db_session.query(GameParticipant).filter_by(game_id=game_id).update({GameParticipant.role: GameRole.DRIVER})
+        db_session.commit()
+        assert _counters(db_session, game_id) == (3, 0, 0, 0)
+
+        changes = []
+        change_observers.append(changes.extend)
+        try:
+            assert GameService.reconcile_counters() == 1
+        finally:
+            change_observers.remove(changes.extend)
+        assert _counters(db_session, game_id) == _recount(db_session, game_id) == (2, 2, 0, 0)
+        assert GameService.reconcile_counters() == 0
+
+        # Исправление видно наблюдателям изменений (сброс кэша игр)
+        [change] = [change for change in changes if change.model is Game]
+        assert change.identity == (game_id,)
+        assert (change.values["participants_count"], change.values["drivers_count"]) == (2, 2)
@@ -0,0 +1,111 @@
+import asyncio
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameParticipant, GameRole
+from src.services import game_list_service
+from src.services.game_list_service import GameListService, NO_GAMES_TEXT
+
+
+def _game(game_id: int, hours: float = 2) -> Game:
+    return Game(
+        id=game_id, district="Центр", max_participants=10, participants_count=3,
+        scheduled_at=datetime.now() + timedelta(hours=hours)
+    )
+
+
+@pytest.fixture
+def upcoming_games():
+    """Подмена выборки игр: возвращает список и считает обращения"""
+    games = [_game(1), _game(2)]
+    calls = []
+
+    async def get_upcoming_games_async(limit: int = 10):
+        calls.append(limit)
+        await asyncio.sleep(0.01)
+        return list(games)
+
+    GameListService.invalidate()
+    with patch("src.services.game_list_service.GameService.get_upcoming_games_async", get_upcoming_games_async):
+        yield games, calls
+    GameListService.invalidate()
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'game_list.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestGameListCache:
+    """Тесты общего списка предстоящих игр"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_refreshes_share_one_build(self, upcoming_games):
+        _, calls = upcoming_games
+
+        results = await asyncio.gather(*(GameListService.get_public_game_list() for _ in range(20)))
+        again = await GameListService.get_public_game_list()
+
+        assert calls == [5]
+        assert all(result is results[0] for result in results)
+        assert again is results[0]
+        buttons = [row[0].text for row in again.reply_markup.inline_keyboard]
+        assert buttons[0].endswith("(3/10)")
+        assert buttons[-1] == "🔄 Обновить список"
+
+    @pytest.mark.asyncio
+    async def test_game_and_roster_changes_rebuild(self, upcoming_games, db_session):
+        _, calls = upcoming_games
+        await GameListService.get_public_game_list()
+
+        game = Game(district="Центр", max_participants=10, scheduled_at=datetime.now() + timedelta(hours=1), creator_id=1)
+        db_session.add(game)
+        db_session.commit()
+        await GameListService.get_public_game_list()
+        assert len(calls) == 2
+
+        participant = GameParticipant(game_id=game.id, user_id=1)
+        db_session.add(participant)
+        db_session.commit()
+        await GameListService.get_public_game_list()
+        assert len(calls) == 3
+
+        # роли и отметки участников на список не влияют
+        participant.role = GameRole.DRIVER
+        db_session.commit()
+        await GameListService.get_public_game_list()
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_list_expires_when_first_game_starts(self, upcoming_games):
+        games, _ = upcoming_games
+        games[0] = _game(1, hours=10 / 3600)
+
+        await GameListService.get_public_game_list()
+
+        # список живет до начала ближайшей игры, а не весь GAME_LIST_TTL
+        assert 5 < game_list_service._expires_at - time.monotonic() <= 10
+
+    @pytest.mark.asyncio
+    async def test_empty_list(self, upcoming_games):
+        games, _ = upcoming_games
+        games.clear()
+
+        game_list = await GameListService.get_public_game_list()
+
+        assert game_list.text == NO_GAMES_TEXT
+        assert game_list.reply_markup is None
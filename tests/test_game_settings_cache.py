@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.services.game_settings_service import GameSettingsService, settings_snapshot
+from src.utils.query_stats import install_query_listeners, track_queries
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    settings_snapshot.invalidate()
+    with patch("src.services.game_settings_service.get_db", side_effect=lambda: iter([session_factory()])):
+        yield engine
+    settings_snapshot.invalidate()
+    engine.dispose()
+
+
+def _queries(func, *args, **kwargs) -> int:
+    with track_queries("test", warn_threshold=0) as stats:
+        func(*args, **kwargs)
+    return stats.count
+
+
+class TestGameSettingsSnapshot:
+    """Тесты снимка настроек игры в памяти процесса"""
+
+    def test_settings_read_from_snapshot(self, engine):
+        settings = GameSettingsService.get_settings()
+        assert settings.version == 1
+
+        assert _queries(GameSettingsService.get_settings) == 0
+        assert _queries(GameSettingsService.should_auto_end_game) == 0
+        assert _queries(GameSettingsService.get_hiding_phase_duration) == 0
+        assert GameSettingsService.get_hiding_phase_duration() == 15
+
+    def test_update_bumps_version_and_reloads(self, engine):
+        GameSettingsService.get_settings()
+
+        assert GameSettingsService.update_settings(hiding_phase_duration=25, version=100)
+
+        settings = GameSettingsService.get_settings()
+        assert settings.hiding_phase_duration == 25
+        assert settings.version == 2
+
+        assert GameSettingsService.reset_to_defaults()
+        assert GameSettingsService.get_hiding_phase_duration() == 15
+        assert GameSettingsService.get_settings().version == 3
+
+    def test_polling_picks_up_other_process_changes(self, engine):
+        with patch("src.services.game_settings_service.GAME_SETTINGS_POLL_INTERVAL", 30), \
+             patch("src.services.game_settings_service.time.monotonic", return_value=1000.0):
+            GameSettingsService.get_settings()
+
+        # изменение из другого процесса бота
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE game_settings SET manual_control_mode = 1, version = version + 1"))
+
+        with patch("src.services.game_settings_service.GAME_SETTINGS_POLL_INTERVAL", 30):
+            with patch("src.services.game_settings_service.time.monotonic", return_value=1010.0):
+                assert _queries(GameSettingsService.is_manual_control_mode) == 0
+                assert GameSettingsService.is_manual_control_mode() is False
+            with patch("src.services.game_settings_service.time.monotonic", return_value=1031.0):
+                assert GameSettingsService.is_manual_control_mode() is True
+                # версия совпадает - до следующего интервала БД не опрашивается
+                assert _queries(GameSettingsService.is_manual_control_mode) == 0
@@ -0,0 +1,118 @@
+import os
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from alembic import command
+from alembic.config import Config
+
+from src.models.base import Base
+import src.models  # noqa: F401
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPOSITE_INDEXES = {
+    "game_participants": {"uq_game_participants_game_user", "ix_game_participants_user_game"},
+    "locations": {"ix_locations_game_user_timestamp"},
+    "photos": {"ix_photos_game_user_type"},
+    "games": {"ix_games_status_scheduled_at"},
+    "scheduled_events": {"ix_scheduled_events_executed_scheduled_at"},
+}
+
+
+@pytest.fixture
+def alembic_config(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    engine = create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+
+def _index_names(engine, table: str) -> set:
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def _create_legacy_schema(engine) -> None:
+    """Схема, созданная create_tables() до появления составных индексов"""
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for names in COMPOSITE_INDEXES.values():
+            for name in names:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+
+class TestCompositeIndexesMigration:
+    """Тесты ревизии с составными индексами"""
+
+    def test_upgrade_legacy_database(self, alembic_config):
+        config, engine = alembic_config
+        _create_legacy_schema(engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO users (id, telegram_id, name, district, default_role) "
+                "VALUES (1, 100, 'Игрок', 'Центр', 'PLAYER')"
+            ))
+            conn.execute(text(
+                "INSERT INTO games (id, district, max_participants, status, scheduled_at, creator_id) "
+                "VALUES (1, 'Центр', 5, 'RECRUITING', '2030-01-01 12:00:00', 1)"
+            ))
+            # повторная запись того же участника, которую допускала старая схема
+            for _ in range(2):
+                conn.execute(text("INSERT INTO game_participants (game_id, user_id) VALUES (1, 1)"))
+
+        command.upgrade(config, "head")
+
+        for table, names in COMPOSITE_INDEXES.items():
+            assert names <= _index_names(engine, table)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM game_participants")).scalar() == 1
+            # счетчики участников пересчитаны по таблице game_participants
+            assert conn.execute(text("SELECT participants_count FROM games WHERE id = 1")).scalar() == 1
+
+    def test_upgrade_fresh_database_and_downgrade(self, alembic_config):
+        config, engine = alembic_config
+        Base.metadata.create_all(engine)
+
+        command.upgrade(config, "head")
+        command.downgrade(config, "base")
+        for table, names in COMPOSITE_INDEXES.items():
+            assert not names & _index_names(engine, table)
+
+        command.upgrade(config, "head")
+        for table, names in COMPOSITE_INDEXES.items():
+            assert names <= _index_names(engine, table)
+
+
+class TestGameCountersMigration:
+    """Тесты ревизии со счетчиками участников"""
+
+    def test_adds_missing_columns_and_backfills(self, alembic_config):
+        config, engine = alembic_config
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            # база, созданная до появления счетчиков
+            for column in ("participants_count", "drivers_count", "found_drivers_count", "hidden_drivers_count"):
+                conn.execute(text(f"ALTER TABLE games DROP COLUMN {column}"))
+            conn.execute(text(
+                "INSERT INTO users (id, telegram_id, name, district, default_role) "
+                "VALUES (1, 100, 'Игрок', 'Центр', 'PLAYER'), (2, 200, 'Водитель', 'Центр', 'PLAYER')"
+            ))
+            conn.execute(text(
+                "INSERT INTO games (id, district, max_participants, status, scheduled_at, creator_id) "
+                "VALUES (1, 'Центр', 5, 'HIDING_PHASE', '2030-01-01 12:00:00', 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO game_participants (game_id, user_id, role, is_found, has_hidden) "
+                "VALUES (1, 1, 'SEEKER', 0, 0), (1, 2, 'DRIVER', 0, 1)"
+            ))
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as conn:
+            counters = conn.execute(text(
+                "SELECT participants_count, drivers_count, found_drivers_count, hidden_drivers_count "
+                "FROM games WHERE id = 1"
+            )).one()
+        assert tuple(counters) == (2, 1, 0, 1)
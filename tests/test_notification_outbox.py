@@ -0,0 +1,281 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from telegram.error import Forbidden
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameParticipant, GameRole, GameStatus
+from src.models.notification import NotificationOutbox
+from src.services.game_service import GameService
+from src.services.notification_outbox_service import (
+    NotificationDispatcher, NotificationOutboxService, outbox_observers
+)
+from src.utils.broadcast import BroadcastMessage, RateLimiter
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    """Сессии файловой БД; диспетчер открывает свою сессию на каждый шаг, как в боте"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with patch("src.services.notification_outbox_service.get_db", side_effect=lambda: iter([factory()])), \
+         patch("src.utils.broadcast.rate_limiter", RateLimiter(global_rate=1000, chat_rate=100)):
+        yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def game_id(sessions):
+    session = sessions()
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    game = Game(district="Центр", max_participants=5, status=GameStatus.UPCOMING,
+                scheduled_at=datetime.now() + timedelta(hours=1), creator_id=creator.id)
+    session.add(game)
+    session.commit()
+    yield game.id
+    session.close()
+
+
+@pytest.fixture
+def results():
+    collected = []
+    observer = lambda kind, result: collected.append((kind, result))
+    outbox_observers.append(observer)
+    yield collected
+    outbox_observers.remove(observer)
+
+
+def _rows(sessions) -> list:
+    session = sessions()
+    rows = session.query(NotificationOutbox).order_by(NotificationOutbox.id).all()
+    session.close()
+    return rows
+
+
+def _dispatcher(side_effect=None, messages=None) -> NotificationDispatcher:
+    bot = Mock()
+    bot.send_message = AsyncMock(side_effect=side_effect)
+    render = Mock(return_value=messages or [])
+    return NotificationDispatcher(bot, render, batch_size=10, poll_interval=0.05)
+
+
+class TestEnqueue:
+    """Уведомления записываются в одной транзакции со сменой статуса"""
+
+    def test_cancel_game_enqueues_notification(self, sessions, game_id):
+        session = sessions()
+        with patch("src.services.game_service.get_db", side_effect=lambda: iter([session])):
+            assert GameService.cancel_game(game_id, "Недостаточно участников")
+        session.close()
+
+        row, = _rows(sessions)
+        assert (row.kind, row.game_id, row.chat_id, row.status) == ("game_cancelled", game_id, None, "pending")
+        assert row.payload == {"reason": "Недостаточно участников"}
+
+    def test_rolled_back_transition_leaves_no_notification(self, sessions, game_id):
+        session = sessions()
+        game = session.get(Game, game_id)
+        game.status = GameStatus.HIDING_PHASE
+        NotificationOutboxService.enqueue_game_notification(session, game_id, "game_started", start_type="auto")
+        session.rollback()
+        session.close()
+
+        assert _rows(sessions) == []
+
+    def test_manual_start_cancels_jobs_only_after_commit(self, sessions, game_id):
+        scheduler = Mock()
+        session = sessions()
+        with patch("src.services.game_service.get_db", side_effect=lambda: iter([session])), \
+             patch("src.services.enhanced_scheduler_service.get_enhanced_scheduler", return_value=scheduler), \
+             patch("src.services.keyboard_update_service.KeyboardUpdateService.schedule_keyboard_updates_for_game"):
+            with patch.object(session, "commit", side_effect=RuntimeError("database is locked")):
+                assert not GameService.start_game(game_id, "manual")
+            scheduler.cancel_game_jobs.assert_not_called()
+            session.rollback()
+
+            assert GameService.start_game(game_id, "manual")
+        session.close()
+
+        scheduler.cancel_game_jobs.assert_called_once_with(game_id)
+        assert [row.kind for row in _rows(sessions)] == ["game_started"]
+
+
+class TestClaim:
+    """Записи очереди достаются одному экземпляру бота"""
+
+    def test_concurrent_claims_do_not_overlap(self, sessions):
+        session = sessions()
+        for index in range(200):
+            NotificationOutboxService.enqueue_message(session, index, "привет", "test")
+        session.commit()
+        session.close()
+
+        # Четыре экземпляра бота разбирают очередь одновременно
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            batches = list(executor.map(lambda _: NotificationOutboxService.claim_due_messages(limit=80), range(4)))
+
+        claimed = [message[0] for batch in batches for message in batch]
+        assert claimed and len(claimed) == len(set(claimed))
+        # Записи, не доставшиеся никому в этом проходе, забираются следующими
+        while batch := NotificationOutboxService.claim_due_messages(limit=80):
+            claimed.extend(message[0] for message in batch)
+        assert sorted(claimed) == list(range(1, 201))
+
+    def test_claimed_message_is_hidden_until_lease_expires(self, sessions):
+        session = sessions()
+        NotificationOutboxService.enqueue_message(session, 10, "привет", "test")
+        session.commit()
+        session.close()
+
+        (message_id, *_), = NotificationOutboxService.claim_due_messages()
+        assert NotificationOutboxService.claim_due_messages() == []
+
+        session = sessions()
+        session.get(NotificationOutbox, message_id).next_attempt_at = datetime.now() - timedelta(seconds=1)
+        session.commit()
+        session.close()
+        assert [message[0] for message in NotificationOutboxService.claim_due_messages()] == [message_id]
+
+
+class TestDispatcher:
+    """Тесты отправки уведомлений из очереди"""
+
+    @pytest.mark.asyncio
+    async def test_game_notification_is_expanded_and_sent(self, sessions, game_id, results):
+        session = sessions()
+        NotificationOutboxService.enqueue_game_notification(session, game_id, "game_ended", reason="Время истекло")
+        session.commit()
+        session.close()
+        messages = [BroadcastMessage(chat_id, f"текст {chat_id}", {"parse_mode": "HTML"}) for chat_id in (10, 20)]
+        dispatcher = _dispatcher(messages=messages)
+
+        assert await dispatcher.dispatch_once() == 1
+        assert await dispatcher.dispatch_once() == 2
+
+        dispatcher.render.assert_called_once_with("game_ended", game_id, {"reason": "Время истекло"})
+        assert dispatcher.bot.send_message.await_count == 2
+        assert dispatcher.bot.send_message.await_args_list[0].kwargs == {"chat_id": 10, "text": "текст 10", "parse_mode": "HTML"}
+        assert [row.status for row in _rows(sessions)] == ["sent", "sent", "sent"]
+        assert results == [("game_ended", "expanded"), ("game_ended", "sent"), ("game_ended", "sent")]
+
+    @pytest.mark.asyncio
+    async def test_failed_send_is_retried_with_backoff(self, sessions, results):
+        session = sessions()
+        NotificationOutboxService.enqueue_message(session, 10, "привет", "test")
+        session.commit()
+        session.close()
+        dispatcher = _dispatcher(side_effect=[Exception("сбой"), Mock(message_id=1)])
+
+        await dispatcher.dispatch_once()
+        row, = _rows(sessions)
+        assert (row.status, row.attempts, row.last_error) == ("pending", 1, "сбой")
+        assert row.next_attempt_at > datetime.now() + timedelta(seconds=5)
+
+        # Пока пауза не прошла, запись не берется
+        assert await dispatcher.dispatch_once() == 0
+        session = sessions()
+        session.get(NotificationOutbox, row.id).next_attempt_at = datetime.now()
+        session.commit()
+        session.close()
+        assert await dispatcher.dispatch_once() == 1
+
+        row, = _rows(sessions)
+        assert (row.status, row.attempts, row.last_error) == ("sent", 2, None)
+        assert results == [("test", "retry"), ("test", "sent")]
+
+    @pytest.mark.asyncio
+    async def test_blocked_chat_and_exhausted_attempts_fail(self, sessions):
+        session = sessions()
+        NotificationOutboxService.enqueue_message(session, 10, "a", "test")
+        retried = NotificationOutboxService.enqueue_message(session, 20, "b", "test")
+        session.flush()
+        retried.attempts = 4
+        session.commit()
+        session.close()
+
+        def send(chat_id, **kwargs):
+            raise Forbidden("bot was blocked by the user") if chat_id == 10 else Exception("сбой")
+
+        dispatcher = _dispatcher(side_effect=send)
+
+        with patch("src.services.notification_outbox_service.NOTIFICATION_MAX_ATTEMPTS", 5):
+            await dispatcher.dispatch_once()
+
+        blocked, exhausted = _rows(sessions)
+        assert (blocked.status, blocked.attempts) == ("failed", 1)
+        assert (exhausted.status, exhausted.attempts) == ("failed", 5)
+
+    @pytest.mark.asyncio
+    async def test_commit_wakes_running_dispatcher(self, sessions):
+        dispatcher = _dispatcher()
+        dispatcher.poll_interval = 60
+        dispatcher.start()
+        try:
+            await asyncio.sleep(0.1)
+            session = sessions()
+            NotificationOutboxService.enqueue_message(session, 10, "привет", "test")
+            session.commit()
+            session.close()
+
+            for _ in range(100):
+                if dispatcher.bot.send_message.await_count:
+                    break
+                await asyncio.sleep(0.02)
+            assert dispatcher.bot.send_message.await_count == 1
+        finally:
+            dispatcher.stop()
+            await asyncio.sleep(0.01)
+
+
+class TestRender:
+    """Тесты текстов рассылок, собираемых при отправке из очереди"""
+
+    @pytest.fixture
+    def scheduler(self):
+        from src.services.enhanced_scheduler_service import EnhancedSchedulerService
+        with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+            scheduler = EnhancedSchedulerService(Mock())
+        with patch("src.services.enhanced_scheduler_service.UserService.get_admin_users", return_value=[]):
+            yield scheduler
+
+    @staticmethod
+    def _render(scheduler, game, kind, payload) -> list:
+        with patch("src.services.enhanced_scheduler_service.GameService.get_game_by_id", return_value=game):
+            return [message.text for message in scheduler.render_notification(kind, game.id, payload)]
+
+    @staticmethod
+    def _game(**times) -> Game:
+        game = Game(id=1, district="Центр", status=GameStatus.HIDING_PHASE, **times)
+        game.participants = [GameParticipant(role=GameRole.SEEKER, user=User(telegram_id=10))]
+        return game
+
+    def test_times_come_from_the_game_not_from_dispatch(self, scheduler):
+        # Рассылка ушла через 40 минут после события (задержка очереди и повторы)
+        started_at = datetime(2026, 1, 1, 12, 0)
+        game = self._game(started_at=started_at, ended_at=datetime(2026, 1, 1, 13, 5))
+        scheduler.hiding_time = 30
+
+        [started] = self._render(scheduler, game, "game_started", {"start_type": "auto"})
+        [ended] = self._render(scheduler, game, "game_ended", {"reason": "Время истекло"})
+
+        assert "Время начала:</b> 12:00" in started
+        assert "Фаза поиска начнется в 12:30" in started
+        assert "Время завершения:</b> 13:05" in ended
+
+    def test_searching_phase_time_is_stored_with_notification(self, scheduler):
+        stats = {"all_hidden": True, "total_drivers": 1, "hidden_count": 1, "not_hidden_count": 0}
+        game = self._game()
+
+        with patch("src.services.enhanced_scheduler_service.GameService.get_hiding_stats", return_value=stats):
+            [text] = self._render(scheduler, game, "searching_phase_started",
+                                  {"searching_started_at": datetime(2026, 1, 1, 12, 30).isoformat()})
+
+        assert "Время:</b> 12:30" in text
@@ -280,6 +280,7 @@ class TestPhotoPhaseSystem:
              patch('src.services.enhanced_scheduler_service.GameService.get_hiding_stats', return_value=hiding_stats), \
              patch('src.services.enhanced_scheduler_service.UserService.get_user_by_id', return_value=(self.driver_user, None)), \
              patch('src.services.enhanced_scheduler_service.UserService.get_admin_users', return_value=[self.admin_user]), \
+             patch('src.services.enhanced_scheduler_service.EventPersistenceService.claim_event', return_value=True), \
              patch('src.services.enhanced_scheduler_service.EventPersistenceService.mark_event_executed'):
             
             await scheduler.send_hiding_warning(game_id=1, event_id=1)
@@ -319,13 +320,14 @@ class TestPhotoPhaseSystem:
         mock_game.district = "Test District"
         mock_game.status = GameStatus.HIDING_PHASE
         mock_game.participants = [
-            Mock(user_id=2, role=GameRole.DRIVER),
-            Mock(user_id=3, role=GameRole.SEEKER)
+            Mock(user_id=2, role=GameRole.DRIVER, user=self.driver_user),
+            Mock(user_id=3, role=GameRole.SEEKER, user=self.seeker_user)
         ]
         
         with patch('src.services.enhanced_scheduler_service.GameService.get_game_by_id', return_value=mock_game), \
              patch('src.services.enhanced_scheduler_service.GameService.start_searching_phase', return_value=True), \
              patch('src.services.enhanced_scheduler_service.UserService.get_user_by_id') as mock_get_user, \
+             patch('src.services.enhanced_scheduler_service.EventPersistenceService.claim_event', return_value=True), \
              patch('src.services.enhanced_scheduler_service.EventPersistenceService.mark_event_executed'):
             
             # Настраиваем возврат пользователей
@@ -0,0 +1,147 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameStatus, GameParticipant, GameRole, Location, Photo, PhotoType
+from src.services.monitoring_service import MonitoringService
+from src.services.keyboard_update_service import KeyboardUpdateService
+from src.utils.query_stats import install_query_listeners, track_queries, query_stats_observers
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'query_stats.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _seed_game(session, participants: int) -> int:
+    """Игра с участниками, у каждого из которых есть геолокации и фотографии"""
+    creator = User(telegram_id=4999, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    game = Game(
+        district="Центр",
+        max_participants=participants + 1,
+        scheduled_at=datetime.now() + timedelta(hours=1),
+        creator_id=creator.id,
+        status=GameStatus.SEARCHING_PHASE
+    )
+    session.add(game)
+    session.flush()
+    for index in range(participants):
+        user = User(telegram_id=5000 + index, name=f"Игрок {index}", district="Центр", default_role=UserRole.PLAYER)
+        session.add(user)
+        session.flush()
+        role = GameRole.DRIVER if index == 0 else GameRole.SEEKER
+        session.add(GameParticipant(game_id=game.id, user_id=user.id, role=role))
+        for minute in range(3):
+            session.add(Location(
+                game_id=game.id, user_id=user.id, latitude=55.0, longitude=37.0,
+                timestamp=datetime.now() - timedelta(minutes=minute)
+            ))
+        session.add(Photo(game_id=game.id, user_id=user.id, file_id=f"file_{index}", photo_type=PhotoType.HIDING_SPOT))
+    session.commit()
+    return game.id
+
+
+def _count_queries(engine, func, *args):
+    """Количество запросов, выполненных функцией сервиса"""
+    session = sessionmaker(bind=engine)()
+    try:
+        with track_queries("test", warn_threshold=0) as stats:
+            result = func(session, *args)
+        return stats.count, result
+    finally:
+        session.close()
+
+
+class TestTrackQueries:
+    """Тесты учёта SQL-запросов на обновление"""
+
+    def test_counts_queries_and_slowest_statement(self, db_engine):
+        with track_queries("handler", warn_threshold=0) as stats:
+            with db_engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+
+        assert stats.handler == "handler"
+        assert stats.count == 2
+        assert stats.total_time >= stats.slowest_time > 0
+        assert stats.slowest_statement.startswith("SELECT")
+
+    def test_queries_outside_block_are_ignored(self, db_engine):
+        with track_queries("handler", warn_threshold=0) as stats:
+            pass
+        with db_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        assert stats.count == 0
+
+    def test_observers_and_warning(self, db_engine):
+        reported = []
+        with patch("src.utils.query_stats.query_stats_observers", [reported.append]), \
+             patch("src.utils.query_stats.logger") as mock_logger:
+            with track_queries("noisy_handler", warn_threshold=1):
+                with db_engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                    connection.execute(text("SELECT 2"))
+
+        assert reported[0].count == 2
+        mock_logger.warning.assert_called_once()
+        assert "noisy_handler" in mock_logger.warning.call_args[0][0]
+
+    def test_metrics_observer_registered(self):
+        from src.services.metrics_service import metrics_service
+        assert metrics_service.observe_query_stats in query_stats_observers
+
+
+class TestNoNPlusOne:
+    """Количество запросов не должно расти вместе с числом участников"""
+
+    def _game_info_queries(self, engine, participants):
+        with sessionmaker(bind=engine)() as seed_session:
+            game_id = _seed_game(seed_session, participants)
+
+        def call(session, game_id):
+            with patch("src.services.monitoring_service.get_db", return_value=iter([session])):
+                return MonitoringService.get_game_detailed_info(game_id)
+
+        return _count_queries(engine, call, game_id)
+
+    def test_game_detailed_info(self, db_engine, tmp_path):
+        small_count, small_info = self._game_info_queries(db_engine, 2)
+
+        big_engine = create_engine(f"sqlite:///{tmp_path / 'query_stats_big.db'}")
+        install_query_listeners(big_engine)
+        Base.metadata.create_all(big_engine)
+        big_count, big_info = self._game_info_queries(big_engine, 15)
+        big_engine.dispose()
+
+        assert small_count == big_count
+        assert len(big_info["participants"]) == 15
+        assert big_info["summary"]["total_photos"] == 15
+        assert big_info["summary"]["participants_with_location"] == 15
+        assert big_info["summary"]["drivers_count"] == 1
+
+    def test_keyboard_updates_schedule(self, db_engine):
+        with sessionmaker(bind=db_engine)() as seed_session:
+            game_id = _seed_game(seed_session, 10)
+
+        def call(session, game_id):
+            with patch("src.services.keyboard_update_service.get_db", return_value=iter([session])), \
+                 patch("src.services.enhanced_scheduler_service.get_enhanced_scheduler") as mock_get_scheduler:
+                KeyboardUpdateService.schedule_keyboard_updates_for_game(game_id)
+                return mock_get_scheduler.return_value
+
+        count, scheduler = _count_queries(db_engine, call, game_id)
+
+        assert count == 1
+        job_args = scheduler.scheduler.add_job.call_args.kwargs["args"]
+        assert sorted(job_args[0]) == [5000 + index for index in range(10)]
+        assert job_args[1] == game_id
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import UserRole
+from src.services import settings_service
+from src.services.settings_service import SettingsService
+from src.utils.query_stats import install_query_listeners, track_queries
+
+
+@pytest.fixture
+def reference_db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'reference.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    with patch("src.services.settings_service.get_db", side_effect=lambda: iter([session_factory()])), \
+         patch.object(settings_service, "_reference_data", None):
+        yield engine
+    engine.dispose()
+
+
+def _queries(func, *args) -> int:
+    with track_queries("test", warn_threshold=0) as stats:
+        func(*args)
+    return stats.count
+
+
+class TestReferenceData:
+    """Тесты снимка справочников SettingsService"""
+
+    def test_lookups_served_from_snapshot(self, reference_db):
+        SettingsService.reload_reference_data()
+
+        assert _queries(SettingsService.get_districts) == 0
+        assert _queries(SettingsService.get_available_roles) == 0
+        assert _queries(SettingsService.get_role_display_name, UserRole.DRIVER) == 0
+        assert _queries(SettingsService.get_game_rules) == 0
+
+        assert SettingsService.get_districts() == ["Тестовый район"]
+        assert SettingsService.get_available_roles() == ["🔍 Игрок", "🚗 Водитель", "👁 Наблюдатель"]
+        assert SettingsService.get_role_display_name(UserRole.DRIVER) == "🚗 Водитель"
+        assert SettingsService.get_role_from_display_name("🚗 Водитель") == UserRole.DRIVER
+        assert SettingsService.get_role_from_display_name("Несуществующая роль") is None
+        assert SettingsService.get_game_rules() == "Правила не найдены"
+
+    def test_snapshot_loaded_lazily(self, reference_db):
+        assert settings_service._reference_data is None
+        assert SettingsService.get_districts() == ["Тестовый район"]
+        assert settings_service._reference_data is not None
+
+    def test_mutations_rebuild_snapshot(self, reference_db):
+        SettingsService.reload_reference_data()
+        snapshot = SettingsService.get_reference_data()
+
+        assert SettingsService.add_district("Северный")
+        assert SettingsService.remove_district("Тестовый район")
+        assert SettingsService.update_role_display(UserRole.DRIVER, "🚙 Шофер")
+        assert SettingsService.update_game_rules("Новые правила")
+
+        assert SettingsService.get_districts() == ["Северный"]
+        assert SettingsService.get_role_display_name(UserRole.DRIVER) == "🚙 Шофер"
+        assert SettingsService.get_role_from_display_name("🚙 Шофер") == UserRole.DRIVER
+        assert SettingsService.get_role_from_display_name("🚗 Водитель") is None
+        assert SettingsService.get_game_rules() == "Новые правила"
+
+        # прежний снимок не изменился
+        assert snapshot.districts == ("Тестовый район",)
+        with pytest.raises(TypeError):
+            snapshot.role_names[UserRole.DRIVER] = "другое"
@@ -0,0 +1,124 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameStatus, GameParticipant
+from src.services.game_service import GameService, WITH_PARTICIPANTS
+from src.utils.query_stats import install_query_listeners, track_queries
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'relationships.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _seed_games(session, games: int, participants: int) -> None:
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    for game_index in range(games):
+        game = Game(
+            district="Центр",
+            max_participants=participants + 1,
+            scheduled_at=datetime.now() + timedelta(hours=game_index + 1),
+            creator_id=creator.id
+        )
+        session.add(game)
+        session.flush()
+        for index in range(participants):
+            user = User(
+                telegram_id=1000 * (game_index + 1) + index,
+                name=f"Игрок {game_index}-{index}",
+                district="Центр",
+                default_role=UserRole.PLAYER
+            )
+            session.add(user)
+            session.flush()
+            session.add(GameParticipant(game_id=game.id, user_id=user.id))
+    session.commit()
+
+
+def _list_games(session_factory):
+    """Список игр и имён участников; связи читаются уже после закрытия сессии"""
+    session = session_factory()
+    with track_queries("test", warn_threshold=0) as stats:
+        games = session.query(Game).options(WITH_PARTICIPANTS).filter(Game.status == GameStatus.RECRUITING).all()
+    session.close()
+    names = [participant.user.name for game in games for participant in game.participants]
+    return stats.count, names
+
+
+class TestRelationshipLoading:
+    """Тесты стратегий загрузки связей игры"""
+
+    def test_game_list_query_count_is_constant(self, session_factory, tmp_path):
+        with session_factory() as session:
+            _seed_games(session, games=2, participants=2)
+        small_count, small_names = _list_games(session_factory)
+
+        big_engine = create_engine(f"sqlite:///{tmp_path / 'relationships_big.db'}")
+        install_query_listeners(big_engine)
+        Base.metadata.create_all(big_engine)
+        big_factory = sessionmaker(bind=big_engine)
+        with big_factory() as session:
+            _seed_games(session, games=10, participants=15)
+        big_count, big_names = _list_games(big_factory)
+        big_engine.dispose()
+
+        assert len(small_names) == 4
+        assert len(big_names) == 150
+        # игры, участники, пользователи - без JOIN-ов и без N+1
+        assert small_count == big_count == 3
+
+    def test_status_check_does_not_load_participants(self, session_factory):
+        with session_factory() as session:
+            _seed_games(session, games=1, participants=5)
+            game_id = session.query(Game.id).scalar()
+
+        session = session_factory()
+        try:
+            with patch("src.services.game_service.get_db", return_value=iter([session])), \
+                 track_queries("test", warn_threshold=0) as stats:
+                assert GameService.can_edit_game(game_id) is True
+            assert stats.count == 1
+            assert "game_participants" not in stats.slowest_statement
+        finally:
+            session.close()
+
+    def test_participants_are_loaded_only_on_request(self, session_factory):
+        with session_factory() as session:
+            _seed_games(session, games=1, participants=3)
+
+        with session_factory() as session, track_queries("test", warn_threshold=0) as stats:
+            game = session.query(Game).one()
+            assert game.status == GameStatus.RECRUITING
+            with pytest.raises(InvalidRequestError):
+                game.participants
+            participant = session.query(GameParticipant).first()
+            with pytest.raises(InvalidRequestError):
+                participant.user
+        assert stats.count == 2
+
+    def test_get_game_by_id_loads_roster(self, session_factory):
+        with session_factory() as session:
+            _seed_games(session, games=1, participants=3)
+            game_id = session.query(Game.id).scalar()
+
+        session = session_factory()
+        try:
+            with patch("src.services.game_service.get_db", return_value=iter([session])):
+                game = GameService.get_game_by_id(game_id)
+            assert sorted(participant.user.name for participant in game.participants) == [
+                "Игрок 0-0", "Игрок 0-1", "Игрок 0-2"
+            ]
+        finally:
+            session.close()
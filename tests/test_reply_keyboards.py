@@ -0,0 +1,148 @@
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock, patch
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+
+from src.models.game import Game, GameParticipant, GameRole, GameStatus
+from src.keyboards import reply
+from src.services.dynamic_keyboard_service import DynamicKeyboardService, KeyboardKey, keyboard_cache, sent_keyboards
+from src.services.enhanced_scheduler_service import EnhancedSchedulerService
+from src.services.user_context_service import UserContextService, UserGameContext
+from src.utils.telegram_request import InstrumentedHTTPXRequest
+
+
+@pytest.fixture(autouse=True)
+def clear_keyboard_cache():
+    keyboard_cache.clear()
+    sent_keyboards.clear()
+    yield
+    keyboard_cache.clear()
+    sent_keyboards.clear()
+
+
+def _in_game(role: GameRole, status: GameStatus = GameStatus.HIDING_PHASE, **flags) -> UserGameContext:
+    game = Game(id=1, district="Центр", status=status, scheduled_at=datetime(2026, 1, 1, 12, 0))
+    participant = GameParticipant(id=1, game_id=1, user_id=1, role=role, **flags)
+    game.participants = [participant]
+    return UserGameContext(UserContextService.STATUS_IN_GAME, game, participant)
+
+
+def _texts(keyboard) -> list:
+    return [[button.text for button in row] for row in keyboard.keyboard]
+
+
+def _key(context: UserGameContext, is_admin: bool = False) -> KeyboardKey:
+    return DynamicKeyboardService.get_keyboard_key(UserContextService._snapshot_context(context), is_admin)
+
+
+def _main_keyboard(context: UserGameContext, is_admin: bool = False):
+    snapshot = UserContextService._snapshot_context(context)
+    with patch("src.services.dynamic_keyboard_service.UserContextService.get_context_snapshot", return_value=snapshot), \
+         patch("src.services.dynamic_keyboard_service.UserService.is_admin", return_value=is_admin):
+        return DynamicKeyboardService.get_contextual_main_keyboard(100)
+
+
+class TestKeyboardCache:
+    """Тесты кэша готовых главных клавиатур"""
+
+    def test_same_key_reuses_markup(self):
+        first = _main_keyboard(_in_game(GameRole.DRIVER))
+        second = _main_keyboard(_in_game(GameRole.DRIVER))
+
+        assert first is second
+        assert _texts(first)[0] == ["📍 Отправить локацию", "📸 Фото места"]
+        assert len(keyboard_cache) == 1
+
+    def test_key_reflects_role_phase_and_flags(self):
+        driver = _key(_in_game(GameRole.DRIVER, has_hidden=True))
+        seeker = _key(_in_game(GameRole.SEEKER), is_admin=True)
+        waiting = _key(_in_game(GameRole.SEEKER, GameStatus.UPCOMING), is_admin=True)
+
+        assert driver == KeyboardKey("in_game", GameRole.DRIVER, GameStatus.HIDING_PHASE, False, False, True, None)
+        assert seeker.role == GameRole.SEEKER and seeker.is_admin
+        assert _texts(DynamicKeyboardService.get_keyboard_for_key(waiting))[0] == ["🎮 Статус игры", "⏰ Ожидание старта"]
+
+    def test_normal_and_registered_keyboards(self):
+        normal = _main_keyboard(UserGameContext(UserContextService.STATUS_NORMAL), is_admin=True)
+        assert ["📅 События планировщика"] in _texts(normal)
+
+        context = _in_game(None, GameStatus.RECRUITING)
+        context.status = UserContextService.STATUS_REGISTERED
+        registered = _main_keyboard(context)
+        assert _texts(registered)[0][0].startswith("⏰ Центр в ")
+
+    def test_static_reply_keyboards_built_once(self):
+        assert reply.get_back_keyboard() is reply.get_back_keyboard()
+        assert reply.get_main_keyboard(True) is reply.get_main_keyboard(True)
+        assert reply.get_main_keyboard(True) is not reply.get_main_keyboard(False)
+
+
+async def _deliver(chat_id, text, reply_markup, **kwargs):
+    """Успешная отправка: разметка доходит до наблюдателя, как из InstrumentedHTTPXRequest"""
+    await DynamicKeyboardService.track_sent_reply_markup(chat_id, reply_markup.to_dict())
+
+
+@pytest.mark.asyncio
+async def test_keyboard_updates_skip_unchanged_chats():
+    application = Mock()
+    application.bot.send_message = AsyncMock(side_effect=_deliver)
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+        scheduler = EnhancedSchedulerService(application)
+    hiding = UserContextService._snapshot_context(_in_game(GameRole.DRIVER))
+    searching = UserContextService._snapshot_context(_in_game(GameRole.DRIVER, GameStatus.SEARCHING_PHASE))
+    # Чат 1 уже получил клавиатуру фазы пряток с ответом обработчика
+    with patch("src.services.dynamic_keyboard_service.UserContextService.get_context_snapshot", return_value=hiding), \
+         patch("src.services.dynamic_keyboard_service.UserService.is_admin", return_value=False):
+        await _deliver(1, "Статус игры", DynamicKeyboardService.get_contextual_main_keyboard(1))
+
+    async def send_updates(snapshot):
+        with patch.object(UserContextService, "get_context_snapshots", return_value={1: snapshot, 2: snapshot}) as lookup, \
+             patch("src.services.enhanced_scheduler_service.UserService.is_admin", return_value=False):
+            await scheduler.send_keyboard_updates([1, 2], 7)
+        lookup.assert_called_once_with([1, 2])
+        return [call.kwargs["chat_id"] for call in application.bot.send_message.await_args_list]
+
+    assert await send_updates(hiding) == [2]
+    assert await send_updates(hiding) == [2]
+    assert await send_updates(searching) == [2, 1, 2]
+
+
+def _bot():
+    """Бот, запросы которого проходят через InstrumentedHTTPXRequest без обращения к Telegram"""
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        chat_id = request_data.parameters["chat_id"]
+        message = {"message_id": 1, "date": 0, "chat": {"id": chat_id, "type": "private"}, "text": "ok"}
+        return 200, json.dumps({"ok": True, "result": message}).encode()
+    return Bot("1:x", request=InstrumentedHTTPXRequest()), patch.object(InstrumentedHTTPXRequest, "do_request", do_request)
+
+
+@pytest.mark.asyncio
+async def test_keyboard_is_remembered_only_after_it_is_sent():
+    key = _key(_in_game(GameRole.DRIVER))
+    bot, telegram = _bot()
+
+    # Клавиатура построена, но отправка не состоялась
+    keyboard = _main_keyboard(_in_game(GameRole.DRIVER))
+    assert not DynamicKeyboardService.is_keyboard_sent(100, key)
+
+    with telegram:
+        await bot.send_message(100, "Прятки начались", reply_markup=keyboard)
+        assert DynamicKeyboardService.is_keyboard_sent(100, key)
+        # Inline-кнопки не заменяют reply-клавиатуру
+        await bot.send_message(100, "Игра", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Ок", callback_data="ok")]]))
+        assert DynamicKeyboardService.is_keyboard_sent(100, key)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("other_keyboard", [reply.get_phone_keyboard, reply.remove_keyboard])
+async def test_other_reply_keyboard_resets_sent_keyboard(other_keyboard):
+    key = _key(_in_game(GameRole.DRIVER))
+    bot, telegram = _bot()
+
+    with telegram:
+        await bot.send_message(100, "Прятки начались", reply_markup=_main_keyboard(_in_game(GameRole.DRIVER)))
+        # Экран регистрации или удаление клавиатуры: у пользователя больше нет главной клавиатуры
+        await bot.send_message(100, "Отправьте номер телефона", reply_markup=other_keyboard())
+
+    assert not DynamicKeyboardService.is_keyboard_sent(100, key)
@@ -0,0 +1,62 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from src.models.scheduled_event import ScheduledEvent
+from src.services.enhanced_scheduler_service import EnhancedSchedulerService
+
+GAMES = 5000
+
+
+@pytest.fixture
+def scheduler():
+    application = Mock()
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+        service = EnhancedSchedulerService(application)
+    # Задачи попадают в хранилище, но не выполняются
+    service.scheduler.start(paused=True)
+    with patch("src.services.enhanced_scheduler_service.EventPersistenceService.cancel_game_events"):
+        yield service
+    service.scheduler.shutdown(wait=False)
+
+
+def _schedule_games(scheduler, games: int) -> None:
+    start = datetime.now() + timedelta(days=1)
+    event_id = 0
+    for game_id in range(1, games + 1):
+        for event_type in ("game_start", "hiding_phase_end"):
+            event_id += 1
+            event = ScheduledEvent(id=event_id, game_id=game_id, event_type=event_type,
+                                   scheduled_at=start + timedelta(minutes=game_id))
+            assert scheduler._schedule_event_from_db(event)
+
+
+@pytest.mark.asyncio
+async def test_cancel_touches_only_jobs_of_the_game(scheduler):
+    _schedule_games(scheduler, GAMES)
+
+    with patch.object(scheduler.scheduler, "get_jobs", side_effect=AssertionError("полный перебор задач")):
+        scheduler.cancel_game_jobs(1)
+        # Игры 12, 21 и 100 содержат "1" в id задач, но не отменяются
+        for game_id in (12, 21, 100):
+            assert len(scheduler.get_game_jobs(game_id)) == 2
+        assert scheduler.get_game_jobs(1) == []
+
+        # Перенос игры: отмена и новое планирование стоят столько, сколько задач у игры
+        for game_id in range(2, GAMES + 1, 2):
+            scheduler.cancel_game_jobs(game_id)
+
+    assert len(scheduler.scheduler.get_jobs()) == (GAMES // 2 - 1) * 2
+    assert len(scheduler._job_games) == (GAMES // 2 - 1) * 2
+
+
+@pytest.mark.asyncio
+async def test_removed_jobs_leave_the_index(scheduler):
+    _schedule_games(scheduler, 3)
+    job = scheduler.get_game_jobs(2)[0]
+
+    # Выполненная разовая задача удаляется планировщиком
+    scheduler.scheduler.remove_job(job.id)
+
+    assert [other.id for other in scheduler.get_game_jobs(2)] == ["hiding_phase_end_2_4"]
+    assert job.id not in scheduler._job_games
@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.models.scheduled_event import ScheduledEvent
+from src.services.enhanced_scheduler_service import EnhancedSchedulerService, misfire_observers
+
+
+@pytest.fixture
+def scheduler():
+    with patch("src.services.enhanced_scheduler_service.get_db", side_effect=lambda: iter([Mock()])):
+        yield EnhancedSchedulerService(Mock())
+
+
+@pytest.fixture
+def misfires():
+    collected = []
+    observer = lambda event_type, action, lateness: collected.append((event_type, action, lateness))
+    misfire_observers.append(observer)
+    yield collected
+    misfire_observers.remove(observer)
+
+
+def _event(event_id: int, game_id: int, event_type: str, minutes_ago: float) -> ScheduledEvent:
+    return ScheduledEvent(id=event_id, game_id=game_id, event_type=event_type, is_executed=False,
+                          scheduled_at=datetime.now() - timedelta(minutes=minutes_ago))
+
+
+def test_plan_runs_phases_in_order_and_coalesces_reminders(scheduler, misfires):
+    events = [
+        # Бот лежал 3 минуты: игра 1 должна была начаться, игра 2 - получить напоминания
+        _event(1, 1, "reminder_5min", 7),
+        _event(2, 1, "game_start", 2),
+        _event(3, 2, "reminder_1hour", 70),
+        _event(4, 2, "reminder_24min", 3),
+        _event(5, 2, "reminder_5min", 1),
+        # Игра 3: прятки начались и закончились, пока бот был выключен
+        _event(6, 3, "hiding_phase_end", 1),
+        _event(7, 3, "hiding_warning", 1.5),
+        _event(8, 3, "game_start", 20),
+    ]
+
+    runs = scheduler._plan_catch_up(events, datetime.now())
+
+    assert {game_id: [event.id for event in game_events] for game_id, game_events in runs.items()} == {
+        1: [2], 2: [5], 3: [8, 6]
+    }
+    actions = {event_type_action[:2] for event_type_action in misfires}
+    assert ("reminder_1hour", "expired") in actions
+    assert ("reminder_24min", "coalesced") in actions
+    assert ("hiding_warning", "coalesced") in actions
+    assert all(lateness > 0 for _, _, lateness in misfires)
+
+
+def test_phases_beyond_grace_expire(scheduler, misfires):
+    with patch.dict("src.services.enhanced_scheduler_service.MISFIRE_GRACE", {"game_start": 60}):
+        runs = scheduler._plan_catch_up([_event(1, 1, "game_start", 5)], datetime.now())
+
+    assert runs == {}
+    assert misfires[0][:2] == ("game_start", "expired")
+
+
+@pytest.mark.asyncio
+async def test_restart_catch_up_is_spread_across_games(scheduler):
+    events = [_event(index, index, "game_start", 1) for index in range(1, 4)]
+    events.append(_event(10, 3, "hiding_warning", 120))
+
+    with patch("src.services.enhanced_scheduler_service.EventPersistenceService.get_pending_events", return_value=events), \
+         patch("src.services.enhanced_scheduler_service.EventPersistenceService.mark_event_executed") as mark_executed, \
+         patch("src.services.enhanced_scheduler_service.SCHEDULER_CATCHUP_SPACING", 2):
+        scheduler._restore_events_from_db()
+
+    mark_executed.assert_called_once_with(10)
+    jobs = [scheduler.get_game_jobs(game_id)[0] for game_id in (1, 2, 3)]
+    assert [job.id for job in jobs] == ["catch_up_1", "catch_up_2", "catch_up_3"]
+    # Игры догоняются не разом, а через SCHEDULER_CATCHUP_SPACING
+    run_dates = sorted(job.trigger.run_date for job in jobs)
+    assert [later - earlier for earlier, later in zip(run_dates, run_dates[1:])] == [timedelta(seconds=2)] * 2
+
+    start_game, args = jobs[0].args[1][0]
+    assert start_game == scheduler.start_game and args == [1, 1]
+    first, second = AsyncMock(), AsyncMock()
+    await scheduler._catch_up_game(1, [(first, [1, 2]), (second, [1, 3])])
+    first.assert_awaited_once_with(1, 2)
+    second.assert_awaited_once_with(1, 3)
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameParticipant, GameRole
+from src.services import game_service
+from src.services.game_service import GameService
+from src.utils.single_flight import SingleFlight, single_flight_observers
+
+
+class _SlowRead:
+    """Чтение, которое не завершается, пока тест его не отпустит"""
+
+    def __init__(self, func=lambda key: {"key": key}):
+        self.func = func
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, key):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.func(key)
+
+
+def _run_concurrently(flight: SingleFlight, key, read: _SlowRead, followers: int) -> list:
+    """Первый вызов начинает чтение, остальные присоединяются к нему; результаты в порядке вызовов"""
+    results = [None] * (followers + 1)
+    errors = []
+
+    def call(index):
+        try:
+            results[index] = flight.do(key, read, key)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    assert read.started.wait(5)
+    coalesced_before = flight.coalesced
+    for index in range(1, followers + 1):
+        thread = threading.Thread(target=call, args=(index,))
+        threads.append(thread)
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight.coalesced - coalesced_before < followers and time.monotonic() < deadline:
+        time.sleep(0.001)
+    read.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results + errors
+
+
+@pytest.fixture
+def coalesced_operations():
+    operations = []
+    single_flight_observers.append(operations.append)
+    yield operations
+    single_flight_observers.remove(operations.append)
+
+
+class TestSingleFlight:
+    """Тесты совмещения одновременных одинаковых чтений"""
+
+    def test_concurrent_calls_share_one_read(self, coalesced_operations):
+        flight = SingleFlight("test_read")
+        read = _SlowRead()
+
+        results = _run_concurrently(flight, 1, read, followers=7)
+
+        assert read.calls == 1
+        assert results == [{"key": 1}] * 8
+        assert flight.coalesced == 7
+        assert coalesced_operations == ["test_read"] * 7
+        # после завершения следующий вызов читает заново
+        assert flight.do(1, lambda key: "fresh", 1) == "fresh"
+
+    def test_error_is_raised_for_every_waiting_call(self):
+        def fail(key):
+            raise ValueError("db is down")
+
+        flight = SingleFlight("failing_read")
+        results = _run_concurrently(flight, 1, _SlowRead(fail), followers=3)
+
+        assert [type(result) for result in results] == [type(None)] * 4 + [ValueError] * 4
+
+    def test_forget_starts_new_read(self):
+        flight = SingleFlight("forgetful_read")
+        read = _SlowRead()
+        leader = threading.Thread(target=flight.do, args=(1, read, 1))
+        leader.start()
+        assert read.started.wait(5)
+
+        flight.forget()
+        result = flight.do(1, lambda key: "after change", 1)
+
+        read.release.set()
+        leader.join(5)
+        assert result == "after change"
+        assert flight.coalesced == 0
+
+    @pytest.mark.asyncio
+    async def test_event_loop_does_not_wait_for_other_thread(self):
+        flight = SingleFlight("loop_read")
+        read = _SlowRead()
+        leader = threading.Thread(target=flight.do, args=(1, read, 1))
+        leader.start()
+        assert read.started.wait(5)
+
+        # Чтение из корутины не ждет запрос потока run_db: цикл событий не блокируется
+        result = flight.do(1, lambda key: "own read", 1)
+        assert leader.is_alive()
+
+        read.release.set()
+        leader.join(5)
+        assert result == "own read"
+        assert flight.coalesced == 0
+
+
+@pytest.fixture
+def game_id(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'single_flight.db'}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    session = factory()
+    user = User(telegram_id=1, name="Игрок", district="Центр", default_role=UserRole.PLAYER)
+    session.add(user)
+    session.flush()
+    game = Game(
+        district="Центр", max_participants=5,
+        scheduled_at=datetime.now() + timedelta(hours=1), creator_id=user.id
+    )
+    session.add(game)
+    session.flush()
+    session.add(GameParticipant(game_id=game.id, user_id=user.id, role=GameRole.DRIVER))
+    session.commit()
+    result = game.id
+    session.close()
+    with patch("src.services.game_service.get_db", side_effect=lambda: iter([factory()])):
+        yield result
+    engine.dispose()
+
+
+def test_waiting_calls_get_detached_copies_of_game(game_id):
+    flight = game_service._game_by_id_flight
+    read = _SlowRead(GameService._load_game_by_id)
+
+    games = _run_concurrently(flight, game_id, read, followers=3)
+
+    assert read.calls == 1
+    assert len({id(game) for game in games}) == 4
+    for game in games[1:]:
+        assert game.id == game_id
+        assert game.participants[0].role == GameRole.DRIVER
+        assert game.participants[0].user.name == "Игрок"
+        assert game.participants[0].game is game
@@ -0,0 +1,69 @@
+import json
+import pytest
+from unittest.mock import patch
+from telegram.error import RetryAfter
+
+from src.utils.telegram_request import (
+    InstrumentedHTTPXRequest, create_bot_request, retry_after_observers, telegram_api_observers
+)
+
+URL = "https://api.telegram.org/bot1:x/"
+
+
+@pytest.fixture
+def observed():
+    requests, pauses = [], []
+    on_request = lambda method, result, duration: requests.append((method, result, duration))
+    on_pause = lambda method, retry_after: pauses.append((method, retry_after))
+    telegram_api_observers.append(on_request)
+    retry_after_observers.append(on_pause)
+    yield requests, pauses
+    telegram_api_observers.remove(on_request)
+    retry_after_observers.remove(on_pause)
+
+
+def _response(code: int, body: dict):
+    async def do_request(self, *args, **kwargs):
+        return code, json.dumps(body).encode()
+    return patch.object(InstrumentedHTTPXRequest, "do_request", do_request)
+
+
+class TestInstrumentedRequest:
+    """Тесты замеров запросов к Telegram API"""
+
+    @pytest.mark.asyncio
+    async def test_records_method_result_and_latency(self, observed):
+        requests, pauses = observed
+        request = InstrumentedHTTPXRequest()
+
+        with _response(200, {"ok": True, "result": True}):
+            assert await request.post(URL + "answerCallbackQuery") is True
+        with _response(400, {"ok": False, "description": "Bad Request: message is not modified"}):
+            with pytest.raises(Exception):
+                await request.post(URL + "editMessageText")
+
+        assert [(method, result) for method, result, _ in requests] == [
+            ("answerCallbackQuery", "ok"), ("editMessageText", "bad_request")
+        ]
+        assert all(duration >= 0 for _, _, duration in requests)
+        assert pauses == []
+
+    @pytest.mark.asyncio
+    async def test_flood_control_is_counted(self, observed):
+        requests, pauses = observed
+        request = InstrumentedHTTPXRequest()
+        body = {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 7}}
+
+        with _response(429, body), pytest.raises(RetryAfter):
+            await request.post(URL + "sendMessage")
+
+        assert requests[0][:2] == ("sendMessage", "retry_after")
+        assert pauses == [("sendMessage", 7)]
+
+    def test_pool_and_timeouts_are_configurable(self):
+        with patch("src.utils.telegram_request.TELEGRAM_POOL_SIZE", 64), \
+             patch("src.utils.telegram_request.TELEGRAM_POOL_TIMEOUT", 3.0):
+            request = create_bot_request()
+
+        assert request._client_kwargs["limits"].max_connections == 64
+        assert request._client_kwargs["timeout"].pool == 3.0
@@ -0,0 +1,123 @@
+import pytest
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.services.user_service import UserService, user_cache
+from src.utils.cache import TTLCache, cache_observers
+from src.utils.query_stats import install_query_listeners, track_queries
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'user_cache.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user_cache.clear()
+    with patch("src.services.user_service.get_db", side_effect=lambda: iter([session])):
+        yield session
+    user_cache.clear()
+    session.close()
+    engine.dispose()
+
+
+def _add_user(session, telegram_id: int = 777, name: str = "Игрок") -> User:
+    user = User(telegram_id=telegram_id, name=name, district="Центр", default_role=UserRole.PLAYER)
+    session.add(user)
+    session.commit()
+    return user
+
+
+class TestTTLCache:
+    """Тесты LRU/TTL-кэша"""
+
+    def test_hits_misses_and_lru_eviction(self):
+        cache = TTLCache("test", maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)  # вытесняет "b" - к нему дольше всего не обращались
+
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+        assert (cache.hits, cache.misses) == (2, 1)
+        assert len(cache) == 2
+
+    def test_expired_entries_are_misses(self):
+        cache = TTLCache("test", ttl=10)
+        with patch("src.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("key", "value")
+        with patch("src.utils.cache.time.monotonic", return_value=109.0):
+            assert cache.get("key") == "value"
+        with patch("src.utils.cache.time.monotonic", return_value=111.0):
+            assert cache.get("key", "default") == "default"
+        assert len(cache) == 0
+
+    def test_observers_receive_results(self):
+        calls = []
+        cache = TTLCache("observed")
+        with patch("src.utils.cache.cache_observers", [lambda name, hit: calls.append((name, hit))]):
+            cache.get("key")
+            cache.set("key", 1)
+            cache.get("key")
+        assert calls == [("observed", False), ("observed", True)]
+
+    def test_metrics_observer_registered(self):
+        from src.services.metrics_service import metrics_service
+        assert metrics_service.record_cache_request in cache_observers
+
+
+class TestUserCache:
+    """Тесты кэша пользователей UserService"""
+
+    def test_second_lookup_does_not_query(self, db_session):
+        _add_user(db_session)
+
+        with track_queries("test", warn_threshold=0) as first:
+            user = UserService.get_cached_user(777)
+        with track_queries("test", warn_threshold=0) as second:
+            cached = UserService.get_cached_user(777)
+
+        assert first.count == 1
+        assert second.count == 0
+        assert (cached.id, cached.name, cached.district) == (user.id, "Игрок", "Центр")
+
+    def test_full_lookup_reuses_cached_user(self, db_session):
+        _add_user(db_session)
+        UserService.get_cached_user(777)
+
+        with track_queries("test", warn_threshold=0) as stats:
+            user, participations = UserService.get_user_by_telegram_id(777)
+
+        assert stats.count == 1  # только участия в играх
+        assert user.telegram_id == 777
+        assert participations == []
+
+    def test_update_user_invalidates(self, db_session):
+        user = _add_user(db_session)
+        UserService.get_cached_user(777)
+
+        UserService.update_user(user.id, name="Новое имя")
+
+        assert UserService.get_cached_user(777).name == "Новое имя"
+
+    def test_missing_user_is_not_cached(self, db_session):
+        assert UserService.get_cached_user(888) is None
+
+        assert UserService.create_user(888, "new", "Новичок", None, "Центр", UserRole.PLAYER)
+
+        assert UserService.get_cached_user(888).name == "Новичок"
+
+    @pytest.mark.asyncio
+    async def test_async_lookup_uses_cache(self, db_session):
+        _add_user(db_session)
+        UserService.get_cached_user(777)
+
+        with patch("src.services.user_service.get_async_db") as mock_get_async_db:
+            user = await UserService.get_cached_user_async(777)
+
+        mock_get_async_db.assert_not_called()
+        assert user.name == "Игрок"
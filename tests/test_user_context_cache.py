@@ -0,0 +1,190 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.base import Base
+from src.models.user import User, UserRole
+from src.models.game import Game, GameStatus, GameParticipant, GameRole
+from src.services.game_service import GameService
+from src.services.user_context_service import UserContextService
+from src.services.user_service import user_cache
+from src.utils.query_stats import install_query_listeners, track_queries
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'context.db'}")
+    install_query_listeners(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    new_session = lambda: iter([factory()])
+    UserContextService.clear_cache()
+    user_cache.clear()
+    with patch("src.services.user_context_service.get_db", side_effect=new_session), \
+         patch("src.services.user_service.get_db", side_effect=new_session), \
+         patch("src.services.game_service.get_db", side_effect=new_session):
+        yield factory
+    UserContextService.clear_cache()
+    user_cache.clear()
+    engine.dispose()
+
+
+@pytest.fixture
+def game_with_players(session_factory):
+    """Игра в наборе и два пользователя: (game_id, [(user.id, telegram_id), ...])"""
+    session = session_factory()
+    creator = User(telegram_id=1, name="Админ", district="Центр", default_role=UserRole.PLAYER)
+    session.add(creator)
+    session.flush()
+    game = Game(
+        district="Центр",
+        max_participants=5,
+        scheduled_at=datetime.now() + timedelta(hours=1),
+        creator_id=creator.id
+    )
+    users = [
+        User(telegram_id=100 + index, name=f"Игрок {index}", district="Центр", default_role=UserRole.PLAYER)
+        for index in range(2)
+    ]
+    session.add_all([game, *users])
+    session.commit()
+    result = game.id, [(user.id, user.telegram_id) for user in users]
+    session.close()
+    return result
+
+
+def _context(telegram_id: int):
+    with track_queries("test", warn_threshold=0) as stats:
+        context = UserContextService.get_user_game_context(telegram_id)
+    return context, stats.count
+
+
+def _set_game(session_factory, game_id: int, **values) -> None:
+    """Изменение игры в отдельной сессии (как это делают планировщик и админка)"""
+    session = session_factory()
+    game = session.get(Game, game_id)
+    for key, value in values.items():
+        setattr(game, key, value)
+    session.commit()
+    session.close()
+
+
+class TestUserContextCache:
+    """Тесты кэша игрового контекста пользователя"""
+
+    def test_repeated_context_costs_no_queries(self, game_with_players):
+        game_id, players = game_with_players
+        for user_id, _ in players:
+            GameService.join_game(game_id, user_id)
+
+        first, first_queries = _context(100)
+        second, second_queries = _context(100)
+
+        assert first_queries > 0
+        assert second_queries == 0
+        assert second.status == UserContextService.STATUS_REGISTERED
+        assert second.game.id == game_id
+        assert second.participant.user.name == "Игрок 0"
+        assert second.participant.game is second.game
+        assert sorted(p.user.telegram_id for p in second.game.participants) == [100, 101]
+
+    def test_join_and_leave_invalidate(self, game_with_players):
+        game_id, [(user_id, telegram_id), _] = game_with_players
+
+        assert _context(telegram_id)[0].status == UserContextService.STATUS_NORMAL
+
+        GameService.join_game(game_id, user_id)
+        assert _context(telegram_id)[0].status == UserContextService.STATUS_REGISTERED
+
+        GameService.leave_game(game_id, user_id)
+        assert _context(telegram_id)[0].status == UserContextService.STATUS_NORMAL
+
+    def test_roster_and_roles_invalidate_other_participants(self, game_with_players):
+        game_id, [(first_id, first_telegram_id), (second_id, _)] = game_with_players
+        GameService.join_game(game_id, first_id)
+        assert len(_context(first_telegram_id)[0].game.participants) == 1
+
+        GameService.join_game(game_id, second_id)
+        assert len(_context(first_telegram_id)[0].game.participants) == 2
+
+        GameService.assign_roles(game_id)
+        context, queries = _context(first_telegram_id)
+        assert queries > 0
+        assert context.participant.role in (GameRole.DRIVER, GameRole.SEEKER)
+
+    def test_phase_transitions_invalidate(self, session_factory, game_with_players):
+        game_id, [(user_id, telegram_id), _] = game_with_players
+        GameService.join_game(game_id, user_id)
+        _context(telegram_id)
+
+        _set_game(session_factory, game_id, status=GameStatus.HIDING_PHASE, started_at=datetime.now())
+        assert _context(telegram_id)[0].status == UserContextService.STATUS_IN_GAME
+
+        _set_game(session_factory, game_id, status=GameStatus.COMPLETED, ended_at=datetime.now())
+        assert _context(telegram_id)[0].status == UserContextService.STATUS_GAME_FINISHED
+
+    def test_recently_finished_entry_expires(self, session_factory, game_with_players):
+        game_id, [(user_id, telegram_id), _] = game_with_players
+        GameService.join_game(game_id, user_id)
+        ended_at = datetime.now() - timedelta(minutes=4)
+        _set_game(session_factory, game_id, status=GameStatus.COMPLETED, ended_at=ended_at)
+
+        with patch("src.utils.cache.time.monotonic", return_value=1000.0):
+            assert _context(telegram_id)[0].status == UserContextService.STATUS_GAME_FINISHED
+        # запись живет до конца пятиминутного окна, а не весь TTL кэша
+        with patch("src.utils.cache.time.monotonic", return_value=1055.0):
+            assert _context(telegram_id)[1] == 0
+        with patch("src.utils.cache.time.monotonic", return_value=1061.0):
+            assert _context(telegram_id)[1] > 0
+
+    def test_rolled_back_changes_invalidate(self, session_factory, game_with_players):
+        game_id, [(user_id, telegram_id), _] = game_with_players
+        GameService.join_game(game_id, user_id)
+        _context(telegram_id)
+
+        session = session_factory()
+        participant = session.query(GameParticipant).filter(GameParticipant.user_id == user_id).first()
+        participant.role = GameRole.DRIVER
+        session.flush()
+        session.rollback()
+        session.close()
+
+        assert _context(telegram_id)[1] > 0
+
+    def test_snapshot_shares_cache_with_context(self, game_with_players):
+        game_id, [(user_id, telegram_id), _] = game_with_players
+        GameService.join_game(game_id, user_id)
+        UserContextService.get_user_game_context(telegram_id)
+
+        with track_queries("test", warn_threshold=0) as stats:
+            snapshot = UserContextService.get_context_snapshot(telegram_id)
+
+        assert stats.count == 0
+        assert snapshot["status"] == UserContextService.STATUS_REGISTERED
+        assert snapshot["game"]["status"] == GameStatus.RECRUITING
+        assert snapshot["participant"]["user_id"] == user_id
+
+    def test_batched_snapshots_match_single_lookups(self, game_with_players):
+        game_id, players = game_with_players
+        for user_id, _ in players:
+            GameService.join_game(game_id, user_id)
+        UserContextService.clear_cache()
+
+        with track_queries("test", warn_threshold=0) as stats:
+            snapshots = UserContextService.get_context_snapshots([100, 101, 999])
+        batched_queries = stats.count
+        with track_queries("test", warn_threshold=0) as stats:
+            assert UserContextService.get_context_snapshots([100, 101]) == {
+                telegram_id: snapshots[telegram_id] for telegram_id in (100, 101)
+            }
+
+        assert stats.count == 0
+        # пользователи, участия, игры, их участники и пользователи - независимо от числа чатов
+        assert batched_queries == 5
+        assert snapshots[101]["status"] == UserContextService.STATUS_REGISTERED
+        assert snapshots[101]["participant"]["user_id"] == players[1][0]
+        assert snapshots[999]["status"] == UserContextService.STATUS_NORMAL
+        UserContextService.clear_cache()
+        assert UserContextService.get_context_snapshot(100)["participant"] == snapshots[100]["participant"]